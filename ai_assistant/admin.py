@@ -1,3 +1,17 @@
 from django.contrib import admin
+from .models import Job, PromptCacheEntry
 
-# Register your models here.
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'kind', 'status', 'progress', 'attempts', 'created_by', 'created_at', 'finished_at']
+    list_filter = ['status', 'kind', 'created_at']
+    search_fields = ['kind', 'error']
+    readonly_fields = ['created_at', 'started_at', 'finished_at', 'heartbeat_at', 'locked_by']
+
+
+@admin.register(PromptCacheEntry)
+class PromptCacheEntryAdmin(admin.ModelAdmin):
+    list_display = ['key', 'model_name', 'hits', 'last_used_at', 'expires_at']
+    list_filter = ['model_name']
+    readonly_fields = ['key', 'model_name', 'response', 'hits', 'created_at', 'last_used_at', 'expires_at']
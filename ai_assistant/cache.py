@@ -0,0 +1,161 @@
+"""
+Content-addressed cache of Gemini responses.
+
+Responses are keyed on the model name plus the prompt with whitespace
+normalized, so the same question asked twice (a profile regenerated from
+unchanged details, notes summarized again) is answered without another API
+call. Entries live in the database, which every web and worker process
+shares, with a small per-process LRU in front. Entries expire after
+AI_CACHE_TTL seconds and the least recently used rows are culled once the
+table grows past AI_CACHE_MAX_ENTRIES.
+"""
+from collections import OrderedDict
+from datetime import timedelta
+import hashlib
+import logging
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import DatabaseError
+from django.db.models import F
+from django.utils import timezone
+
+from .models import PromptCacheEntry
+
+logger = logging.getLogger(__name__)
+
+_prompt_cache = None
+_prompt_cache_lock = threading.Lock()
+
+
+def normalize_prompt(prompt):
+    return ' '.join(prompt.split())
+
+
+def prompt_cache_key(model_name, prompt):
+    return hashlib.sha256(f'{model_name}\0{normalize_prompt(prompt)}'.encode('utf-8')).hexdigest()
+
+
+class PromptCache:
+    def __init__(self, ttl=None, max_entries=None, memory_entries=None):
+        self.ttl = settings.AI_CACHE_TTL if ttl is None else ttl
+        self.max_entries = settings.AI_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self.memory_entries = settings.AI_CACHE_MEMORY_ENTRIES if memory_entries is None else memory_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.memory_hits = 0
+        self.misses = 0
+
+    def _remember(self, key, response, expires):
+        if not self.memory_entries:
+            return
+        with self._lock:
+            self._memory[key] = (response, expires)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def _count(self, hit, memory=False):
+        with self._lock:
+            if hit:
+                self.hits += 1
+                self.memory_hits += memory
+            else:
+                self.misses += 1
+
+    def get(self, key):
+        """Cached response text for a key, or None"""
+        with self._lock:
+            item = self._memory.get(key)
+            if item is not None and item[1] <= time.time():
+                del self._memory[key]
+                item = None
+            elif item is not None:
+                self._memory.move_to_end(key)
+        if item is not None:
+            self._count(True, memory=True)
+            return item[0]
+
+        now = timezone.now()
+        try:
+            entry = PromptCacheEntry.objects.filter(key=key, expires_at__gt=now).only('response', 'expires_at').first()
+            if entry is not None:
+                PromptCacheEntry.objects.filter(key=key).update(last_used_at=now, hits=F('hits') + 1)
+        except DatabaseError as e:
+            # The cache is best-effort: a busy database must not fail the AI call
+            logger.warning(f"Prompt cache lookup failed: {e}")
+            entry = None
+        if entry is None:
+            self._count(False)
+            return None
+
+        self._remember(key, entry.response, entry.expires_at.timestamp())
+        self._count(True)
+        return entry.response
+
+    def set(self, key, model_name, response):
+        now = timezone.now()
+        expires_at = now + timedelta(seconds=self.ttl)
+        self._remember(key, response, expires_at.timestamp())
+        try:
+            PromptCacheEntry.objects.update_or_create(key=key, defaults={
+                'model_name': model_name,
+                'response': response,
+                'last_used_at': now,
+                'expires_at': expires_at,
+            })
+            self.cull()
+        except DatabaseError as e:
+            logger.warning(f"Prompt cache write failed: {e}")
+
+    async def aget(self, key):
+        return await sync_to_async(self.get)(key)
+
+    async def aset(self, key, model_name, response):
+        await sync_to_async(self.set)(key, model_name, response)
+
+    def cull(self):
+        """Drop expired entries and the least recently used ones beyond max_entries"""
+        entries = PromptCacheEntry.objects.all()
+        entries.filter(expires_at__lte=timezone.now()).delete()
+        overflow = list(
+            entries.order_by('-last_used_at').values_list('last_used_at', flat=True)[self.max_entries:self.max_entries + 1]
+        )
+        if overflow:
+            entries.filter(last_used_at__lte=overflow[0]).delete()
+
+    def clear(self):
+        PromptCacheEntry.objects.all().delete()
+        with self._lock:
+            self._memory.clear()
+
+    def stats(self):
+        """Hit/miss counters for this process"""
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'memory_hits': self.memory_hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+def get_prompt_cache():
+    """The process-wide prompt cache, or None when AI_CACHE_ENABLED is off"""
+    global _prompt_cache
+    if not settings.AI_CACHE_ENABLED:
+        return None
+    with _prompt_cache_lock:
+        if _prompt_cache is None:
+            _prompt_cache = PromptCache()
+        return _prompt_cache
+
+
+def prompt_cache_stats():
+    cache = get_prompt_cache()
+    if cache is None:
+        return {'hits': 0, 'memory_hits': 0, 'misses': 0, 'hit_rate': 0.0}
+    return cache.stats()
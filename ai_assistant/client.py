@@ -0,0 +1,118 @@
+"""
+Process-wide Gemini client.
+
+``genai.configure()`` throws away the library's cached API clients, so
+configuring it on every request meant a new gRPC channel (or HTTP session
+with transport='rest') and a fresh connection handshake for every call. The
+model is now built once per process, on first use, and shared by every
+thread and request; its channel/session stays open and is reused.
+
+Tests and load tests swap in a stand-in with ``override_model()``. Changing
+any GEMINI_* setting (e.g. with override_settings) resets the client.
+"""
+from contextlib import contextmanager
+import logging
+import threading
+import time
+
+import google.generativeai as genai
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+MODEL_NAME = 'gemini-1.5-flash'
+
+_model = None
+_initialized = False
+_override = None
+_lock = threading.Lock()
+
+
+def build_model():
+    """Create the model for the configured backend, or None when there is no API key"""
+    if settings.GEMINI_BACKEND == 'fake':
+        from .fakes import FakeGenerativeModel
+        return FakeGenerativeModel(latency=settings.GEMINI_FAKE_LATENCY)
+    if not settings.GEMINI_API_KEY:
+        logger.warning("GEMINI_API_KEY not configured")
+        return None
+    options = {'api_key': settings.GEMINI_API_KEY}
+    if settings.GEMINI_TRANSPORT:
+        options['transport'] = settings.GEMINI_TRANSPORT
+    genai.configure(**options)
+    return genai.GenerativeModel(MODEL_NAME)
+
+
+def get_model():
+    """The shared model, created on first use"""
+    global _model, _initialized
+    if _override is not None:
+        return _override
+    if not _initialized:
+        with _lock:
+            if not _initialized:
+                _model = build_model()
+                _initialized = True
+    return _model
+
+
+def reset_client():
+    """Forget the shared model, transport and default service; the next call rebuilds them"""
+    global _model, _initialized
+    with _lock:
+        _model = None
+        _initialized = False
+    from . import services, transport
+    transport.reset_transport()
+    services.reset_default_service()
+
+
+@contextmanager
+def override_model(model):
+    """Route every GeminiService through ``model`` (e.g. a FakeGenerativeModel) inside the block"""
+    global _override
+    previous = _override
+    _override = model
+    from . import services
+    services.reset_default_service()
+    try:
+        yield model
+    finally:
+        _override = previous
+        services.reset_default_service()
+
+
+@receiver(setting_changed)
+def reset_client_on_setting_change(setting, **kwargs):
+    if setting.startswith('GEMINI_') or setting.startswith('AI_CACHE_'):
+        reset_client()
+
+
+def health_check(timeout=5.0):
+    """
+    Check that the model can be reached.
+
+    For the real API this fetches the model's metadata, which costs no
+    tokens; other backends are sent a one-word prompt.
+    """
+    model = get_model()
+    if model is None:
+        return {'status': 'unavailable', 'model': MODEL_NAME, 'error': 'GEMINI_API_KEY not configured'}
+
+    model_name = getattr(model, 'model_name', MODEL_NAME)
+    started = time.perf_counter()
+    try:
+        if isinstance(model, genai.GenerativeModel):
+            genai.get_model(model_name, request_options={'timeout': timeout})
+        else:
+            model.generate_content('ping', request_options={'timeout': timeout})
+    except Exception as e:
+        logger.error(f"Gemini health check failed: {e}")
+        return {'status': 'error', 'model': model_name, 'error': str(e)}
+    return {
+        'status': 'ok',
+        'model': model_name,
+        'latency_ms': round((time.perf_counter() - started) * 1000, 1),
+    }
@@ -0,0 +1,121 @@
+"""
+Local stand-in for ``google.generativeai.GenerativeModel``.
+
+Used by the tests and for load testing without an API key
+(``GEMINI_BACKEND=fake``). It answers after a configurable delay with canned
+text, so concurrency, timeout and cancellation behaviour can be exercised
+without network access.
+"""
+import asyncio
+import itertools
+import json
+import re
+import time
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+FAKE_MEETING_SUMMARY = {
+    "summary": "Fake summary of the meeting.",
+    "action_items": "- Send follow-up notes",
+    "sentiment": "neutral",
+    "risks": "",
+    "follow_up": "Schedule a check-in",
+}
+
+MEETING_ID_RE = re.compile(r'^\s*Meeting id: (.+)$', re.MULTILINE)
+
+
+class FakeStream:
+    """Async iterator of response chunks, like a streamed generate_content_async reply"""
+
+    def __init__(self, text, chunk_delay=0.0, words_per_chunk=3, first_delay=0.0):
+        words = text.split(' ')
+        self.chunks = [
+            ' '.join(words[i:i + words_per_chunk]) + (' ' if i + words_per_chunk < len(words) else '')
+            for i in range(0, len(words), words_per_chunk)
+        ]
+        self.chunk_delay = chunk_delay
+        self.first_delay = first_delay
+
+    async def __aiter__(self):
+        for index, chunk in enumerate(self.chunks):
+            delay = self.first_delay if index == 0 else self.chunk_delay
+            if delay:
+                await asyncio.sleep(delay)
+            yield FakeResponse(chunk)
+
+
+def default_reply(prompt):
+    """Plausible reply for any prompt the service sends"""
+    meeting_ids = MEETING_ID_RE.findall(prompt)
+    if meeting_ids:
+        return json.dumps([dict(FAKE_MEETING_SUMMARY, id=meeting_id.strip()) for meeting_id in meeting_ids])
+    if '"summary"' in prompt:
+        return json.dumps(FAKE_MEETING_SUMMARY)
+    return f"Fake response ({len(prompt)} character prompt)"
+
+
+class FakeGenerativeModel:
+    """
+    Drop-in fake for the two GenerativeModel methods GeminiService uses.
+
+    ``responses`` may be a string, a list of strings (returned in turn) or a
+    callable taking the prompt. ``error`` is raised instead of responding;
+    ``failures`` is a list of exceptions raised one per call before the model
+    starts answering, to simulate a flaky upstream.
+    Streamed replies arrive a few words at a time, ``chunk_delay`` seconds apart.
+    Every prompt received is recorded in ``prompts``, and the generation
+    config sent with it (None for plain text) in ``generation_configs``.
+    """
+
+    model_name = 'fake'
+
+    def __init__(self, responses=None, latency=0.0, error=None, chunk_delay=0.0, failures=()):
+        if responses is None:
+            self._reply = default_reply
+        elif callable(responses):
+            self._reply = responses
+        elif isinstance(responses, str):
+            self._reply = lambda prompt: responses
+        else:
+            replies = itertools.cycle(responses)
+            self._reply = lambda prompt: next(replies)
+        self.latency = latency
+        self.error = error
+        self.failures = list(failures)
+        self.chunk_delay = chunk_delay
+        self.prompts = []
+        self.generation_configs = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def _respond(self, prompt):
+        self.prompts.append(prompt)
+        if self.error is not None:
+            raise self.error
+        if self.failures:
+            raise self.failures.pop(0)
+        return FakeResponse(self._reply(prompt))
+
+    def generate_content(self, prompt, **kwargs):
+        self.generation_configs.append(kwargs.get('generation_config'))
+        if self.latency:
+            time.sleep(self.latency)
+        return self._respond(prompt)
+
+    async def generate_content_async(self, prompt, stream=False, **kwargs):
+        self.generation_configs.append(kwargs.get('generation_config'))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if stream:
+                return FakeStream(self._respond(prompt).text, self.chunk_delay, first_delay=self.latency)
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            return self._respond(prompt)
+        finally:
+            self.in_flight -= 1
@@ -0,0 +1,203 @@
+"""
+Database-backed background jobs.
+
+Views enqueue a Job and return its id straight away; ``manage.py run_worker``
+claims queued jobs and runs the registered handler for each kind on a pool of
+threads. Jobs are claimed with a conditional UPDATE, so several worker
+processes can share one queue without double-running a job.
+
+Handlers are registered per kind::
+
+    @register('stakeholder_profile')
+    def generate_profile(job):
+        ...
+        job.set_progress(50)
+        ...
+        return {'insights': text}
+
+The return value is stored as the job's result. A handler that raises is
+retried with exponential backoff until ``max_attempts`` is reached.
+
+Deployments without a worker process (``JOB_WORKER_ENABLED`` off, the
+default) run each job inline instead, in the enqueuing process once its
+transaction commits, so jobs never wait on a worker that does not exist.
+Failed attempts are then retried straight away.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+import logging
+import os
+import socket
+import threading
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+_handlers = {}
+
+# Seconds before the first retry; doubles with every further attempt
+RETRY_BASE_DELAY = 5
+
+# Running jobs whose worker has been silent this long are returned to the queue
+STALE_AFTER = timedelta(minutes=10)
+
+
+def register(kind):
+    """Decorator registering the handler for a job kind"""
+    def decorator(func):
+        _handlers[kind] = func
+        return func
+    return decorator
+
+
+def get_handler(kind):
+    return _handlers.get(kind)
+
+
+def enqueue(kind, payload=None, user=None, max_attempts=3):
+    job = Job.objects.create(kind=kind, payload=payload or {}, created_by=user, max_attempts=max_attempts)
+    if not settings.JOB_WORKER_ENABLED:
+        transaction.on_commit(lambda: run_inline(job.pk))
+    return job
+
+
+async def aenqueue(kind, payload=None, user=None, max_attempts=3):
+    job = await Job.objects.acreate(kind=kind, payload=payload or {}, created_by=user, max_attempts=max_attempts)
+    if not settings.JOB_WORKER_ENABLED:
+        await sync_to_async(transaction.on_commit)(lambda: run_inline(job.pk))
+    return job
+
+
+def _claim(pk, worker_id):
+    now = timezone.now()
+    claimed = Job.objects.filter(pk=pk, status='queued').update(
+        status='running',
+        locked_by=worker_id,
+        started_at=now,
+        heartbeat_at=now,
+        attempts=F('attempts') + 1,
+    )
+    return Job.objects.get(pk=pk) if claimed else None
+
+
+def claim_next(worker_id, kinds=None):
+    """Atomically take the oldest ready job, or return None if the queue is empty"""
+    candidates = Job.objects.ready()
+    if kinds:
+        candidates = candidates.filter(kind__in=kinds)
+    for pk in candidates.values_list('id', flat=True)[:10]:
+        job = _claim(pk, worker_id)
+        if job is not None:
+            return job
+    return None
+
+
+def run_inline(job_id):
+    """Run a queued job in this process until it succeeds or runs out of attempts"""
+    worker_id = f'inline:{socket.gethostname()}:{os.getpid()}'
+    job = _claim(job_id, worker_id)
+    while job is not None:
+        run_job(job)
+        if job.status != 'queued':
+            break
+        job = _claim(job_id, worker_id)
+    return job
+
+
+def run_job(job):
+    """Run a claimed job's handler and record the outcome"""
+    handler = get_handler(job.kind)
+    if handler is None:
+        _finish(job, 'failed', error=f'No handler registered for job kind "{job.kind}"')
+        return job
+
+    try:
+        result = handler(job)
+    except Exception as e:
+        logger.exception(f"Job {job.pk} ({job.kind}) failed on attempt {job.attempts}")
+        if job.attempts < job.max_attempts:
+            delay = RETRY_BASE_DELAY * 2 ** (job.attempts - 1)
+            Job.objects.filter(pk=job.pk).update(
+                status='queued',
+                error=str(e),
+                locked_by='',
+                run_after=timezone.now() + timedelta(seconds=delay),
+            )
+            job.status = 'queued'
+        else:
+            _finish(job, 'failed', error=str(e))
+    else:
+        _finish(job, 'succeeded', result=result)
+    return job
+
+
+def _finish(job, status, result=None, error=''):
+    job.status = status
+    job.result = result
+    job.error = error
+    job.finished_at = timezone.now()
+    if status == 'succeeded':
+        job.progress = 100
+    job.save(update_fields=['status', 'result', 'error', 'finished_at', 'progress'])
+
+
+def requeue_stale_jobs(stale_after=STALE_AFTER):
+    """Return jobs abandoned by a crashed worker to the queue"""
+    return Job.objects.filter(
+        status='running', heartbeat_at__lt=timezone.now() - stale_after
+    ).update(status='queued', locked_by='')
+
+
+class Worker:
+    """
+    Run queued jobs on ``concurrency`` threads until stopped.
+
+    Each thread claims and runs one job at a time, sleeping ``poll_interval``
+    seconds when the queue is empty. With ``burst`` the worker exits once the
+    queue is drained instead of waiting for more work.
+    """
+
+    def __init__(self, concurrency=4, poll_interval=1.0, kinds=None, burst=False):
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.kinds = kinds
+        self.burst = burst
+        self.worker_id = f'{socket.gethostname()}:{os.getpid()}'
+        self.stop_event = threading.Event()
+        self.processed = 0
+        self._lock = threading.Lock()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def run(self):
+        requeue_stale_jobs()
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='job-worker') as pool:
+            futures = [pool.submit(self._loop, index) for index in range(self.concurrency)]
+            for future in futures:
+                future.result()
+        return self.processed
+
+    def _loop(self, index):
+        worker_id = f'{self.worker_id}:{index}'
+        try:
+            while not self.stop_event.is_set():
+                close_old_connections()
+                job = claim_next(worker_id, self.kinds)
+                if job is None:
+                    if self.burst:
+                        return
+                    self.stop_event.wait(self.poll_interval)
+                    continue
+                run_job(job)
+                with self._lock:
+                    self.processed += 1
+        finally:
+            connection.close()
@@ -0,0 +1,62 @@
+import logging
+import signal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from ai_assistant.jobs import Worker
+
+
+class Command(BaseCommand):
+    help = 'Process queued background jobs (AI profile generation, meeting summaries)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=settings.JOB_WORKER_CONCURRENCY,
+            help=f'Number of jobs to run at once (default: {settings.JOB_WORKER_CONCURRENCY})',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=1.0,
+            help='Seconds to wait before checking an empty queue again (default: 1.0)',
+        )
+        parser.add_argument(
+            '--kind',
+            action='append',
+            dest='kinds',
+            help='Only run jobs of this kind (can be given more than once)',
+        )
+        parser.add_argument(
+            '--burst',
+            action='store_true',
+            help='Exit once the queue is empty instead of waiting for new jobs',
+        )
+
+    def handle(self, *args, **options):
+        logging.basicConfig(level=logging.INFO, format='%(asctime)s %(threadName)s %(levelname)s %(message)s')
+
+        worker = Worker(
+            concurrency=options['concurrency'],
+            poll_interval=options['poll_interval'],
+            kinds=options['kinds'],
+            burst=options['burst'],
+        )
+
+        def shutdown(signum, frame):
+            self.stdout.write(self.style.WARNING('Stopping after the jobs in progress finish...'))
+            worker.stop()
+
+        signal.signal(signal.SIGINT, shutdown)
+        signal.signal(signal.SIGTERM, shutdown)
+
+        if not settings.JOB_WORKER_ENABLED:
+            self.stdout.write(self.style.WARNING(
+                'JOB_WORKER_ENABLED is off, so the web processes run their jobs inline; '
+                'set it for them to hand jobs to this worker'
+            ))
+        self.stdout.write(f'Worker {worker.worker_id} started with {worker.concurrency} thread(s)')
+        processed = worker.run()
+        self.stdout.write(self.style.SUCCESS(f'Worker stopped after processing {processed} job(s)'))
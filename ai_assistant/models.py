@@ -1,3 +1,103 @@
+from django.contrib.auth.models import User
 from django.db import models
+from django.utils import timezone
 
-# Create your models here.
+
+class JobQuerySet(models.QuerySet):
+    def for_user(self, user):
+        return self.filter(created_by=user)
+
+    def ready(self, now=None):
+        """Queued jobs whose retry delay has passed, oldest first"""
+        return self.filter(status='queued', run_after__lte=now or timezone.now()).order_by('run_after', 'id')
+
+
+class Job(models.Model):
+    """A unit of background work (usually an AI call) run by the run_worker command"""
+
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    ]
+
+    FINISHED_STATUSES = ('succeeded', 'failed')
+
+    kind = models.CharField(max_length=50)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    progress = models.PositiveSmallIntegerField(default=0, help_text="Percent complete (0-100)")
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+
+    # Retries
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)
+
+    # Worker bookkeeping
+    locked_by = models.CharField(max_length=100, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+
+    # Metadata
+    created_by = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name='jobs')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    objects = JobQuerySet.as_manager()
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='job_status_run_after_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.pk} ({self.status})"
+
+    @property
+    def is_finished(self):
+        return self.status in self.FINISHED_STATUSES
+
+    def set_progress(self, progress):
+        """Record progress from inside a handler (also refreshes the heartbeat)"""
+        self.progress = max(0, min(100, int(progress)))
+        self.heartbeat_at = timezone.now()
+        Job.objects.filter(pk=self.pk).update(progress=self.progress, heartbeat_at=self.heartbeat_at)
+
+    def as_dict(self):
+        return {
+            'id': self.pk,
+            'kind': self.kind,
+            'status': self.status,
+            'progress': self.progress,
+            'result': self.result,
+            'error': self.error,
+            'attempts': self.attempts,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+
+class PromptCacheEntry(models.Model):
+    """A stored model response, keyed by a hash of the model name and normalized prompt"""
+
+    key = models.CharField(max_length=64, primary_key=True)
+    model_name = models.CharField(max_length=100)
+    response = models.TextField()
+    hits = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(default=timezone.now)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['last_used_at'], name='prompt_cache_last_used_idx'),
+            models.Index(fields=['expires_at'], name='prompt_cache_expires_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.model_name} {self.key[:12]}"
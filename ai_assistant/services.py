@@ -1,30 +1,168 @@
-import google.generativeai as genai
 from django.conf import settings
-import json
+import asyncio
 import logging
+import threading
+
+from .cache import get_prompt_cache, prompt_cache_key
+from .client import MODEL_NAME, get_model
+from .throttling import estimate_tokens, EXPECTED_RESPONSE_TOKENS
+from .structured import (
+    MEETING_SUMMARY_FIELDS, SENTIMENTS, extract_json, generation_config, meeting_batch_schema,
+    meeting_summary_schema,
+)
+from .transport import get_transport
 
 logger = logging.getLogger(__name__)
 
+MEETING_SUMMARY_FIELD_HINTS = {
+    "summary": "A concise summary of key discussion points",
+    "action_items": "List of action items with responsible parties and deadlines",
+    "sentiment": "positive, neutral, or negative (lowercase only)",
+    "risks": "Any risks or concerns identified",
+    "follow_up": "Suggested follow-up actions",
+}
+
+
 class GeminiService:
-    def __init__(self):
-        if settings.GEMINI_API_KEY:
-            genai.configure(api_key=settings.GEMINI_API_KEY)
-            self.model = genai.GenerativeModel('gemini-1.5-flash')
-        else:
-            self.model = None
-            logger.warning("GEMINI_API_KEY not configured")
+    """
+    Thin wrapper around the Gemini model used by the AI features.
+
+    Every prompt has a blocking method (``summarize_meeting``) for management
+    commands and sync views, and the endpoints hit by users also have an async
+    twin (``asummarize_meeting``) built on ``agenerate_content``. Async calls
+    don't hold a worker thread while the model responds, so a single ASGI
+    process can keep many requests in flight.
+
+    The model is the process-wide one from ai_assistant.client, so building
+    a service is cheap; ``get_gemini_service()`` returns a shared default
+    instance. Pass ``model`` to use a stand-in such as
+    ``ai_assistant.fakes.FakeGenerativeModel``; ``GEMINI_BACKEND = 'fake'`` or
+    ``client.override_model()`` does the same for the whole process.
+
+    Responses are cached by prompt (see ai_assistant.cache); every method
+    takes ``use_cache=False`` to force a fresh answer. An optional
+    ``rate_limiter`` (ai_assistant.throttling.RateLimiter) paces calls that
+    actually reach the model.
+
+    Calls that reach the model go through ``transport`` (by default the
+    process-wide ai_assistant.transport.Transport), which applies the
+    deadline, the cap on concurrent calls, retries and the circuit breaker.
+
+    Prompts that expect JSON pass a ``response_schema``; with
+    ``structured_output`` (default GEMINI_STRUCTURED_OUTPUT) the model is
+    asked for schema-constrained JSON instead of being told to write some.
+
+    The ``*_prompt`` builders and ``parse_meeting_summary`` are public so bulk
+    callers can issue the same requests through ``generate_content`` and
+    handle errors themselves.
+    """
+
+    def __init__(self, model=None, timeout=None, cache=None, rate_limiter=None, transport=None,
+                 structured_output=None):
+        self.timeout = settings.GEMINI_TIMEOUT if timeout is None else timeout
+        self.model = model if model is not None else get_model()
+        self.model_name = getattr(self.model, 'model_name', MODEL_NAME)
+        self.cache = cache if cache is not None else get_prompt_cache()
+        self.rate_limiter = rate_limiter
+        self.transport = transport if transport is not None else get_transport()
+        self.structured_output = (
+            settings.GEMINI_STRUCTURED_OUTPUT if structured_output is None else structured_output
+        )
     
     def is_available(self):
         return self.model is not None
+
+    def _cache_key(self, prompt):
+        return prompt_cache_key(self.model_name, prompt) if self.cache is not None else None
+
+    def _request_options(self, response_schema):
+        # Structured and free-text replies to the same prompt share a cache entry:
+        # both are parsed by the same tolerant parser
+        if response_schema is None or not self.structured_output:
+            return {}
+        return {'generation_config': generation_config(response_schema)}
+
+    def generate_content(self, prompt, use_cache=True, response_schema=None):
+        """
+        Blocking call to the model, returning the response text.
+
+        Responses come from the prompt cache when possible; ``use_cache=False``
+        always asks the model (the fresh response still replaces the cached one).
+        ``response_schema`` requests JSON matching the schema.
+        """
+        key = self._cache_key(prompt)
+        if key and use_cache:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire(estimate_tokens(prompt) + EXPECTED_RESPONSE_TOKENS)
+        response = self.transport.generate(
+            self.model, prompt, self.timeout, **self._request_options(response_schema)
+        )
+        if key:
+            self.cache.set(key, self.model_name, response.text)
+        return response.text
+
+    async def agenerate_content(self, prompt, timeout=None, use_cache=True, response_schema=None):
+        """
+        Await the model's response text.
+
+        Raises asyncio.TimeoutError once ``timeout`` seconds (default
+        GEMINI_TIMEOUT) have passed, including any wait for a free slot and
+        retries. The in-flight request is cancelled on timeout, and cancelling
+        the awaiting task (e.g. the client disconnects) cancels it too. Cached
+        like generate_content.
+        """
+        key = self._cache_key(prompt)
+        if key and use_cache:
+            cached = await self.cache.aget(key)
+            if cached is not None:
+                return cached
+
+        if self.rate_limiter is not None:
+            await self.rate_limiter.aacquire(estimate_tokens(prompt) + EXPECTED_RESPONSE_TOKENS)
+        timeout = self.timeout if timeout is None else timeout
+        response = await self.transport.agenerate(
+            self.model, prompt, timeout, **self._request_options(response_schema)
+        )
+        if key:
+            await self.cache.aset(key, self.model_name, response.text)
+        return response.text
     
-    def generate_stakeholder_profile(self, basic_info):
+    async def astream_content(self, prompt, timeout=None, use_cache=True, response_schema=None):
         """
-        Generate comprehensive stakeholder profile from basic information
+        Yield the model's response text in chunks as it is generated.
+
+        Each chunk must arrive within ``timeout`` seconds (default
+        GEMINI_TIMEOUT) or asyncio.TimeoutError is raised. The complete text
+        is cached once the stream finishes; a cached response is yielded as a
+        single chunk.
         """
-        if not self.is_available():
-            return "AI service not available"
-        
-        prompt = f"""
+        key = self._cache_key(prompt)
+        if key and use_cache:
+            cached = await self.cache.aget(key)
+            if cached is not None:
+                yield cached
+                return
+
+        if self.rate_limiter is not None:
+            await self.rate_limiter.aacquire(estimate_tokens(prompt) + EXPECTED_RESPONSE_TOKENS)
+        timeout = self.timeout if timeout is None else timeout
+        parts = []
+        async for chunk in self.transport.astream(
+            self.model, prompt, timeout, **self._request_options(response_schema)
+        ):
+            if chunk.text:
+                parts.append(chunk.text)
+                yield chunk.text
+
+        if key:
+            await self.cache.aset(key, self.model_name, ''.join(parts))
+    
+    def stakeholder_profile_prompt(self, basic_info):
+        return f"""
         Based on the following basic stakeholder information, generate a comprehensive analysis:
         
         Name: {basic_info.get('name', 'N/A')}
@@ -43,22 +181,24 @@ class GeminiService:
         
         Format your response as a structured analysis.
         """
+
+    def generate_stakeholder_profile(self, basic_info, use_cache=True):
+        """
+        Generate comprehensive stakeholder profile from basic information
+        """
+        if not self.is_available():
+            return "AI service not available"
+        
+        prompt = self.stakeholder_profile_prompt(basic_info)
         
         try:
-            response = self.model.generate_content(prompt)
-            return response.text
+            return self.generate_content(prompt, use_cache=use_cache)
         except Exception as e:
             logger.error(f"Error generating stakeholder profile: {e}")
             return f"Error generating profile: {str(e)}"
     
-    def draft_communication(self, stakeholder_info, communication_type, purpose):
-        """
-        Draft communication for stakeholder
-        """
-        if not self.is_available():
-            return "AI service not available"
-        
-        prompt = f"""
+    def draft_communication_prompt(self, stakeholder_info, communication_type, purpose):
+        return f"""
         Draft a {communication_type} for the following stakeholder:
         
         Stakeholder: {stakeholder_info.get('name', 'N/A')} - {stakeholder_info.get('title', 'N/A')}
@@ -76,21 +216,41 @@ class GeminiService:
         3. Clearly states the purpose
         4. Includes a clear call to action if needed
         5. Maintains professional relationships
-        """        
+        """
+
+    def draft_communication(self, stakeholder_info, communication_type, purpose, use_cache=True):
+        """
+        Draft communication for stakeholder
+        """
+        if not self.is_available():
+            return "AI service not available"
+        
+        prompt = self.draft_communication_prompt(stakeholder_info, communication_type, purpose)
         try:
-            response = self.model.generate_content(prompt)
-            return response.text
+            return self.generate_content(prompt, use_cache=use_cache)
         except Exception as e:
             logger.error(f"Error drafting communication: {e}")
             return f"Error drafting communication: {str(e)}"
-    
-    def summarize_meeting(self, meeting_notes, stakeholder_info):
+
+    async def adraft_communication(self, stakeholder_info, communication_type, purpose, use_cache=True):
+        """
+        Async version of draft_communication
         """
-        Generate meeting summary and extract action items        """
         if not self.is_available():
-            return {"summary": "AI service not available", "action_items": "", "sentiment": "neutral", "risks": "", "follow_up": ""}
-        
-        prompt = f"""
+            return "AI service not available"
+
+        prompt = self.draft_communication_prompt(stakeholder_info, communication_type, purpose)
+        try:
+            return await self.agenerate_content(prompt, use_cache=use_cache)
+        except asyncio.TimeoutError:
+            logger.warning("Timed out drafting communication")
+            return "Error drafting communication: the AI service timed out"
+        except Exception as e:
+            logger.error(f"Error drafting communication: {e}")
+            return f"Error drafting communication: {str(e)}"
+    
+    def meeting_summary_prompt(self, meeting_notes, stakeholder_info):
+        return f"""
         Analyze the following meeting notes with stakeholder {stakeholder_info.get('name', 'N/A')}:
         
         Meeting Notes:
@@ -98,13 +258,7 @@ class GeminiService:
         
         Please provide your analysis in the following JSON format ONLY. Do not include any other text or formatting:
         
-        {{
-            "summary": "A concise summary of key discussion points",
-            "action_items": "List of action items with responsible parties and deadlines",
-            "sentiment": "positive, neutral, or negative (lowercase only)",
-            "risks": "Any risks or concerns identified",
-            "follow_up": "Suggested follow-up actions"
-        }}
+        {self.meeting_summary_format(MEETING_SUMMARY_FIELDS)}
         
         Requirements:
         1. Use only "positive", "neutral", or "negative" (lowercase) for sentiment
@@ -112,62 +266,305 @@ class GeminiService:
         3. Do not include any markdown formatting or code blocks
         4. Return only valid JSON
         """
+
+    @staticmethod
+    def meeting_summary_format(fields):
+        members = ',\n'.join(f'            "{field}": "{MEETING_SUMMARY_FIELD_HINTS[field]}"' for field in fields)
+        return f"{{\n{members}\n        }}"
+
+    def meeting_summary_repair_prompt(self, meeting_notes, stakeholder_info, fields):
+        """Ask for just the summary ``fields`` a previous reply left out"""
+        return f"""
+        Analyze the following meeting notes with stakeholder {stakeholder_info.get('name', 'N/A')}:
+        
+        Meeting Notes:
+        {meeting_notes}
+        
+        Provide ONLY the following fields as JSON, with no other text or formatting:
         
+        {self.meeting_summary_format(fields)}
+        
+        If no specific information is available for a field, use an empty string "".
+        """
+
+    @staticmethod
+    def meeting_summary_fields(parsed_response):
+        """The summary fields present in a parsed reply; lists (e.g. of action items) become bullet lines"""
+        fields = {}
+        for field in MEETING_SUMMARY_FIELDS:
+            value = parsed_response.get(field)
+            if isinstance(value, list):
+                value = '\n'.join(f'- {item}' for item in value)
+            if isinstance(value, str):
+                fields[field] = value
+        return fields
+
+    @staticmethod
+    def _meeting_summary_result(parsed_response):
+        # Ensure all required keys exist and normalize sentiment
+        sentiment = parsed_response.get("sentiment", "neutral").strip().lower()
+        return {
+            "summary": parsed_response.get("summary", ""),
+            "action_items": parsed_response.get("action_items", ""),
+            "sentiment": sentiment if sentiment in SENTIMENTS else "neutral",
+            "risks": parsed_response.get("risks", ""),
+            "follow_up": parsed_response.get("follow_up", "")
+        }
+
+    @staticmethod
+    def _meeting_summary_error(message):
+        return {
+            "summary": message,
+            "action_items": "",
+            "sentiment": "neutral",
+            "risks": "",
+            "follow_up": ""
+        }
+
+    def parse_meeting_summary_fields(self, text_response):
+        """
+        The summary fields found in a reply, possibly only some of them, or
+        None when the reply holds no JSON object at all.
+        """
+        parsed = extract_json(text_response)
+        if not isinstance(parsed, dict):
+            return None
+        return self.meeting_summary_fields(parsed)
+
+    def parse_meeting_summary(self, text_response):
+        """Turn the model's reply into the summary dict, tolerating non-JSON replies"""
+        fields = self.parse_meeting_summary_fields(text_response)
+        if fields is not None:
+            return self._meeting_summary_result(fields)
+
+        # If there is no JSON in the reply, return the text as summary
+        logger.warning(f"Failed to parse JSON response, processing as text: {text_response[:100]}...")
+        return {
+            "summary": text_response,
+            "action_items": "Unable to extract structured action items from response",
+            "sentiment": "neutral",
+            "risks": "Unable to extract structured risks from response",
+            "follow_up": "Unable to extract structured follow-up actions from response"
+        }
+
+    def _missing_summary_fields(self, fields):
+        if not fields:
+            # Nothing usable to repair: the whole summary would have to be asked for again
+            return []
+        missing = [field for field in MEETING_SUMMARY_FIELDS if field not in fields]
+        if missing:
+            logger.info(f"Meeting summary reply lacked {', '.join(missing)}; requesting only those")
+        return missing
+
+    def _merge_repair(self, fields, missing, text_response):
+        repaired = self.parse_meeting_summary_fields(text_response) or {}
+        fields.update({field: repaired[field] for field in missing if field in repaired})
+        return self._meeting_summary_result(fields)
+
+    def request_meeting_summary(self, meeting_notes, stakeholder_info, use_cache=True):
+        """
+        Summary with a repair request for any missing fields. Unlike
+        summarize_meeting this raises on errors, for callers that retry.
+        """
+        reply = self.generate_content(
+            self.meeting_summary_prompt(meeting_notes, stakeholder_info),
+            use_cache=use_cache, response_schema=meeting_summary_schema(),
+        )
+        fields = self.parse_meeting_summary_fields(reply)
+        missing = self._missing_summary_fields(fields)
+        if not missing:
+            return self.parse_meeting_summary(reply)
         try:
-            response = self.model.generate_content(prompt)
-            # Try to parse as JSON, with better fallback handling
-            try:
-                parsed_response = json.loads(response.text)
-                # Ensure all required keys exist and normalize sentiment
-                result = {
-                    "summary": parsed_response.get("summary", ""),
-                    "action_items": parsed_response.get("action_items", ""),
-                    "sentiment": parsed_response.get("sentiment", "neutral").lower(),
-                    "risks": parsed_response.get("risks", ""),
-                    "follow_up": parsed_response.get("follow_up", "")
-                }
-                return result
-            except json.JSONDecodeError:
-                # If JSON parsing fails, try to extract information from text
-                text_response = response.text
-                logger.warning(f"Failed to parse JSON response, processing as text: {text_response[:100]}...")
-                
-                # Try to extract JSON from the text if it's wrapped in markdown or other formatting
-                import re
-                json_match = re.search(r'\{.*\}', text_response, re.DOTALL)
-                if json_match:
-                    try:
-                        parsed_response = json.loads(json_match.group())
-                        result = {
-                            "summary": parsed_response.get("summary", ""),
-                            "action_items": parsed_response.get("action_items", ""),
-                            "sentiment": parsed_response.get("sentiment", "neutral").lower(),
-                            "risks": parsed_response.get("risks", ""),
-                            "follow_up": parsed_response.get("follow_up", "")
-                        }
-                        return result
-                    except json.JSONDecodeError:
-                        pass
-                
-                # If all JSON parsing attempts fail, return the text as summary
-                return {
-                    "summary": text_response,
-                    "action_items": "Unable to extract structured action items from response",
-                    "sentiment": "neutral",
-                    "risks": "Unable to extract structured risks from response",
-                    "follow_up": "Unable to extract structured follow-up actions from response"
-                }
+            repair = self.generate_content(
+                self.meeting_summary_repair_prompt(meeting_notes, stakeholder_info, missing),
+                use_cache=use_cache, response_schema=meeting_summary_schema(missing),
+            )
+        except Exception as e:
+            logger.warning(f"Could not fill in missing summary fields: {e}")
+            repair = ''
+        return self._merge_repair(fields, missing, repair)
+
+    async def _asummarize_meeting(self, meeting_notes, stakeholder_info, use_cache):
+        reply = await self.agenerate_content(
+            self.meeting_summary_prompt(meeting_notes, stakeholder_info),
+            use_cache=use_cache, response_schema=meeting_summary_schema(),
+        )
+        fields = self.parse_meeting_summary_fields(reply)
+        missing = self._missing_summary_fields(fields)
+        if not missing:
+            return self.parse_meeting_summary(reply)
+        try:
+            repair = await self.agenerate_content(
+                self.meeting_summary_repair_prompt(meeting_notes, stakeholder_info, missing),
+                use_cache=use_cache, response_schema=meeting_summary_schema(missing),
+            )
+        except Exception as e:
+            logger.warning(f"Could not fill in missing summary fields: {e}")
+            repair = ''
+        return self._merge_repair(fields, missing, repair)
+    
+    def summarize_meeting(self, meeting_notes, stakeholder_info, use_cache=True):
+        """
+        Generate meeting summary and extract action items. If the reply
+        leaves fields out, only those fields are requested again.
+        """
+        if not self.is_available():
+            return {"summary": "AI service not available", "action_items": "", "sentiment": "neutral", "risks": "", "follow_up": ""}
+        
+        try:
+            return self.request_meeting_summary(meeting_notes, stakeholder_info, use_cache)
+        except Exception as e:
+            logger.error(f"Error summarizing meeting: {e}")
+            return self._meeting_summary_error(f"Error summarizing meeting: {str(e)}")
+
+    async def asummarize_meeting(self, meeting_notes, stakeholder_info, use_cache=True):
+        """
+        Async version of summarize_meeting
+        """
+        if not self.is_available():
+            return {"summary": "AI service not available", "action_items": "", "sentiment": "neutral", "risks": "", "follow_up": ""}
+
+        try:
+            return await self._asummarize_meeting(meeting_notes, stakeholder_info, use_cache)
+        except asyncio.TimeoutError:
+            logger.warning("Timed out summarizing meeting")
+            return self._meeting_summary_error("Error summarizing meeting: the AI service timed out")
         except Exception as e:
             logger.error(f"Error summarizing meeting: {e}")
-            return {
-                "summary": f"Error summarizing meeting: {str(e)}",
-                "action_items": "",
-                "sentiment": "neutral",
-                "risks": "",
-                "follow_up": ""
-            }
+            return self._meeting_summary_error(f"Error summarizing meeting: {str(e)}")
     
-    def analyze_stakeholder_sentiment(self, text_content):
+    def meeting_batch_entry(self, item):
+        """One meeting's section of a batch prompt"""
+        stakeholder_info = item.get('stakeholder_info') or {}
+        return (
+            f"Meeting id: {item['id']}\n"
+            f"Stakeholder: {stakeholder_info.get('name', 'N/A')} - {stakeholder_info.get('title', 'N/A')} "
+            f"({stakeholder_info.get('organization', 'N/A')})\n"
+            f"Meeting Notes:\n{item['meeting_notes'].strip()}\n"
+        )
+
+    def meeting_batch_prompt(self, items):
+        meetings = "\n---\n".join(self.meeting_batch_entry(item) for item in items)
+        return f"""
+        Analyze each of the following {len(items)} meetings separately. Meetings are separated by "---".
+        
+        {meetings}
+        
+        Return a JSON array ONLY, with exactly one object per meeting in this format:
+        
+        [
+            {{
+                "id": "the meeting id exactly as given",
+                "summary": "A concise summary of key discussion points",
+                "action_items": "List of action items with responsible parties and deadlines",
+                "sentiment": "positive, neutral, or negative (lowercase only)",
+                "risks": "Any risks or concerns identified",
+                "follow_up": "Suggested follow-up actions"
+            }}
+        ]
+        
+        Requirements:
+        1. Use only "positive", "neutral", or "negative" (lowercase) for sentiment
+        2. If no specific information is available for a field, use an empty string ""
+        3. Do not include any markdown formatting or code blocks
+        4. Return only valid JSON
+        """
+
+    def pack_meeting_batches(self, items, max_tokens_per_batch):
+        """
+        Group items greedily, in order, so each batch's estimated prompt plus
+        reply stays under the token budget. An item too large for any batch
+        gets one to itself.
+        """
+        overhead = estimate_tokens(self.meeting_batch_prompt([]))
+        batches, batch, used = [], [], overhead
+        for item in items:
+            cost = estimate_tokens(self.meeting_batch_entry(item)) + EXPECTED_RESPONSE_TOKENS
+            if batch and used + cost > max_tokens_per_batch:
+                batches.append(batch)
+                batch, used = [], overhead
+            batch.append(item)
+            used += cost
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def parse_meeting_batch(self, text_response, items):
+        """Map a batch reply back to item ids, skipping entries that are missing or malformed"""
+        array_at, object_at = text_response.find('['), text_response.find('{')
+        if array_at != -1 and (object_at == -1 or array_at < object_at):
+            parsed = extract_json(text_response, '[')
+        else:
+            parsed = extract_json(text_response)
+        if isinstance(parsed, dict):
+            parsed = [parsed]
+        if not isinstance(parsed, list):
+            return {}
+
+        ids = {str(item['id']): item['id'] for item in items}
+        results = {}
+        for entry in parsed:
+            if not isinstance(entry, dict) or not isinstance(entry.get('summary'), str):
+                continue
+            item_id = ids.get(str(entry.get('id')).strip())
+            if item_id is not None and item_id not in results:
+                results[item_id] = self._meeting_summary_result(self.meeting_summary_fields(entry))
+        return results
+
+    def summarize_meetings_batch(self, items, max_tokens_per_batch=8000, use_cache=True):
+        """
+        Summarize many meetings with as few requests as possible.
+
+        ``items`` are dicts with ``id`` (e.g. the engagement id),
+        ``meeting_notes`` and optional ``stakeholder_info``. They are packed
+        into prompts under ``max_tokens_per_batch`` estimated tokens (prompt
+        plus reply), and any meeting the model drops or mangles is re-sent in
+        a smaller batch, down to a single-meeting request.
+
+        Returns {id: summary dict} in the shape summarize_meeting returns.
+        Meetings that still fail on their own are left out so the caller can
+        retry them later.
+        """
+        if not self.is_available():
+            return {}
+
+        results = {}
+        for batch in self.pack_meeting_batches(items, max_tokens_per_batch):
+            results.update(self._summarize_batch(batch, use_cache))
+        return results
+
+    def _summarize_batch(self, batch, use_cache):
+        if len(batch) == 1:
+            item = batch[0]
+            try:
+                return {item['id']: self.request_meeting_summary(
+                    item['meeting_notes'], item.get('stakeholder_info') or {}, use_cache
+                )}
+            except Exception as e:
+                logger.error(f"Error summarizing meeting {item['id']}: {e}")
+                return {}
+
+        try:
+            results = self.parse_meeting_batch(
+                self.generate_content(
+                    self.meeting_batch_prompt(batch), use_cache=use_cache, response_schema=meeting_batch_schema()
+                ),
+                batch,
+            )
+        except Exception as e:
+            logger.error(f"Error summarizing batch of {len(batch)} meetings: {e}")
+            results = {}
+
+        missing = [item for item in batch if item['id'] not in results]
+        if missing:
+            logger.warning(f"Batch reply covered {len(results)}/{len(batch)} meetings; re-sending the rest")
+            middle = (len(missing) + 1) // 2
+            for part in (missing[:middle], missing[middle:]):
+                if part:
+                    results.update(self._summarize_batch(part, use_cache))
+        return results
+    
+    def analyze_stakeholder_sentiment(self, text_content, use_cache=True):
         """
         Analyze sentiment from stakeholder communications
         """
@@ -186,8 +583,7 @@ class GeminiService:
         """
         
         try:
-            response = self.model.generate_content(prompt)
-            sentiment_text = response.text.lower()
+            sentiment_text = self.generate_content(prompt, use_cache=use_cache).lower()
             
             if 'positive' in sentiment_text:
                 return 'positive'
@@ -199,7 +595,7 @@ class GeminiService:
             logger.error(f"Error analyzing sentiment: {e}")
             return 'neutral'
     
-    def suggest_engagement_strategy(self, stakeholder_data, engagement_history=None):
+    def suggest_engagement_strategy(self, stakeholder_data, engagement_history=None, use_cache=True):
         """
         Suggest optimal engagement strategy for stakeholder
         """
@@ -229,13 +625,12 @@ class GeminiService:
         """
         
         try:
-            response = self.model.generate_content(prompt)
-            return response.text
+            return self.generate_content(prompt, use_cache=use_cache)
         except Exception as e:
             logger.error(f"Error generating engagement strategy: {e}")
             return f"Error generating strategy: {str(e)}"
     
-    def extract_action_items(self, text_content):
+    def extract_action_items(self, text_content, use_cache=True):
         """
         Extract action items from meeting notes or communications
         """
@@ -257,8 +652,29 @@ class GeminiService:
         """
         
         try:
-            response = self.model.generate_content(prompt)
-            return response.text
+            return self.generate_content(prompt, use_cache=use_cache)
         except Exception as e:
             logger.error(f"Error extracting action items: {e}")
             return f"Error extracting action items: {str(e)}"
+
+
+_default_service = None
+_default_service_lock = threading.Lock()
+
+
+def get_gemini_service():
+    """Shared GeminiService using the process-wide model, prompt cache and settings"""
+    global _default_service
+    service = _default_service
+    if service is None:
+        with _default_service_lock:
+            if _default_service is None:
+                _default_service = GeminiService()
+            service = _default_service
+    return service
+
+
+def reset_default_service():
+    global _default_service
+    with _default_service_lock:
+        _default_service = None
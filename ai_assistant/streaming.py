@@ -0,0 +1,52 @@
+"""
+Server-sent events for streamed AI responses.
+
+The streaming endpoints relay model output as it is generated::
+
+    event: chunk
+    data: {"text": "Dear Ms. Smith, "}
+
+    event: done
+    data: {"draft": "Dear Ms. Smith, ..."}
+
+An ``error`` event replaces ``done`` if generation fails part-way.
+"""
+import asyncio
+import json
+import logging
+
+from django.http import StreamingHttpResponse
+
+logger = logging.getLogger(__name__)
+
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def sse_stream(chunks, finish):
+    """
+    Relay text chunks as ``chunk`` events, then send ``finish(full_text)``
+    as the ``done`` event. If the client disconnects, the task is cancelled
+    and the model stream is closed with it.
+    """
+    parts = []
+    try:
+        async for text in chunks:
+            parts.append(text)
+            yield sse_event('chunk', {'text': text})
+        yield sse_event('done', finish(''.join(parts)))
+    except asyncio.TimeoutError:
+        logger.warning("Timed out streaming AI response")
+        yield sse_event('error', {'error': 'The AI service timed out'})
+    except Exception as e:
+        logger.error(f"Error streaming AI response: {e}")
+        yield sse_event('error', {'error': str(e)})
+
+
+def sse_response(events):
+    response = StreamingHttpResponse(events, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx and similar proxies from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,142 @@
+"""
+Structured (JSON) replies from the model.
+
+With GEMINI_STRUCTURED_OUTPUT on, prompts that expect JSON are sent with a
+response schema, so Gemini returns schema-conforming JSON instead of
+free text that merely asks for JSON. Replies are still parsed defensively
+because older models, the prompt cache and fakes may return fenced or
+chatty JSON.
+
+JSONScanner reads a reply in one left-to-right pass, character by
+character (no regular expressions, so no backtracking), and can be fed a
+streamed reply chunk by chunk. It skips any text before the first ``{`` (or
+``[``), ignores everything after the matching close, and salvages every
+complete top-level member when the JSON as a whole is invalid or cut off.
+"""
+import json
+
+MEETING_SUMMARY_FIELDS = ('summary', 'action_items', 'sentiment', 'risks', 'follow_up')
+
+SENTIMENTS = ('positive', 'neutral', 'negative')
+
+
+def meeting_summary_schema(fields=MEETING_SUMMARY_FIELDS):
+    """Response schema for a meeting summary, optionally limited to some fields"""
+    properties = {field: {'type': 'string'} for field in fields}
+    if 'sentiment' in properties:
+        properties['sentiment'] = {'type': 'string', 'format': 'enum', 'enum': list(SENTIMENTS)}
+    return {'type': 'object', 'properties': properties, 'required': list(fields)}
+
+
+def meeting_batch_schema():
+    item = meeting_summary_schema()
+    item['properties'] = dict({'id': {'type': 'string'}}, **item['properties'])
+    item['required'] = ['id'] + item['required']
+    return {'type': 'array', 'items': item}
+
+
+def generation_config(schema):
+    return {'response_mime_type': 'application/json', 'response_schema': schema}
+
+
+class JSONScanner:
+    """
+    Find the first complete JSON object (or array, with ``opening='['``) in
+    text fed to it piece by piece.
+
+    ``feed()`` returns True once the value is complete; ``result()`` returns
+    the parsed value. If the balanced span isn't valid JSON (a trailing
+    comma, a truncated reply), ``result()`` falls back to the top-level
+    members that did parse: a dict of the complete key/value pairs, or a list
+    of the complete array items. A span that yields nothing is skipped and
+    scanning continues after it.
+    """
+
+    def __init__(self, opening='{'):
+        self.opening = opening
+        self.closing = '}' if opening == '{' else ']'
+        self.text = ''
+        self.position = 0
+        self.value = None
+        self.done = False
+        self._reset_span()
+
+    def _reset_span(self):
+        self.start = None
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.member_start = None
+        self.members = {} if self.opening == '{' else []
+
+    def _salvage(self, end):
+        """Parse the top-level member ending just before ``end``"""
+        member = self.text[self.member_start:end].strip()
+        if not member:
+            return
+        try:
+            if self.opening == '{':
+                self.members.update(json.loads('{' + member + '}'))
+            else:
+                self.members.append(json.loads(member))
+        except ValueError:
+            pass
+
+    def feed(self, chunk):
+        self.text += chunk
+        if self.done:
+            return True
+
+        text = self.text
+        for index in range(self.position, len(text)):
+            char = text[index]
+            if self.start is None:
+                if char == self.opening:
+                    self.start = index
+                    self.depth = 1
+                    self.member_start = index + 1
+                continue
+
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == '\\':
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"':
+                self.in_string = True
+            elif char in '{[':
+                self.depth += 1
+            elif char in '}]':
+                self.depth -= 1
+                if self.depth == 0:
+                    self._salvage(index)
+                    try:
+                        self.value = json.loads(text[self.start:index + 1])
+                    except ValueError:
+                        self.value = self.members or None
+                    if self.value is not None:
+                        self.done = True
+                        self.position = index + 1
+                        return True
+                    self._reset_span()
+            elif char == ',' and self.depth == 1:
+                self._salvage(index)
+                self.member_start = index + 1
+
+        self.position = len(text)
+        return False
+
+    def result(self):
+        """The parsed value, the members salvaged so far from an unfinished one, or None"""
+        if self.done:
+            return self.value
+        return self.members or None
+
+
+def extract_json(text, opening='{'):
+    """The first JSON object (or array) in ``text``, tolerating fences and surrounding prose"""
+    scanner = JSONScanner(opening)
+    scanner.feed(text)
+    return scanner.result()
@@ -1,3 +1,679 @@
-from django.test import TestCase
+import asyncio
+import json
+import re
+import threading
+import time
+from unittest import mock
 
-# Create your tests here.
+from google.api_core import exceptions as api_exceptions
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from stakeholders.models import Stakeholder, Engagement
+from stakeholders.tasks import MEETING_SUMMARY_JOB, STAKEHOLDER_PROFILE_JOB
+from . import client
+from .cache import PromptCache, prompt_cache_key
+from .fakes import FakeGenerativeModel
+from .jobs import Worker, claim_next, enqueue, register, run_job
+from .models import Job, PromptCacheEntry
+from .streaming import sse_event, sse_stream
+from .structured import JSONScanner, extract_json
+from .throttling import RateLimiter, call_with_retries
+from .transport import CircuitBreaker, CircuitOpenError, Transport, TransportTimeout
+from .services import GeminiService, get_gemini_service
+
+MEETING_REPLY = json.dumps({
+    "summary": "Agreed on the rollout plan",
+    "action_items": "- Send the contract (Alice, Friday)",
+    "sentiment": "Positive",
+    "risks": "",
+    "follow_up": "Check in next week",
+})
+
+
+@override_settings(AI_CACHE_ENABLED=False)
+class AsyncGeminiServiceTests(SimpleTestCase):
+    def test_agenerate_content_returns_text(self):
+        service = GeminiService(model=FakeGenerativeModel('hello'))
+        self.assertEqual(asyncio.run(service.agenerate_content('prompt')), 'hello')
+
+    def test_agenerate_content_times_out(self):
+        service = GeminiService(model=FakeGenerativeModel(latency=1), timeout=0.01)
+        with self.assertRaises(asyncio.TimeoutError):
+            asyncio.run(service.agenerate_content('prompt'))
+
+    def test_cancellation_reaches_the_model_call(self):
+        model = FakeGenerativeModel(latency=1)
+        service = GeminiService(model=model)
+
+        async def cancel_midway():
+            task = asyncio.create_task(service.agenerate_content('prompt'))
+            await asyncio.sleep(0.01)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+            return model.in_flight
+
+        self.assertEqual(asyncio.run(cancel_midway()), 0)
+
+    def test_requests_run_concurrently(self):
+        model = FakeGenerativeModel('ok', latency=0.2)
+        service = GeminiService(model=model, transport=Transport(max_concurrency=0))
+
+        async def fan_out():
+            return await asyncio.gather(*(service.agenerate_content(f'prompt {i}') for i in range(200)))
+
+        started = time.monotonic()
+        results = asyncio.run(fan_out())
+        self.assertEqual(len(results), 200)
+        self.assertEqual(model.max_in_flight, 200)
+        self.assertLess(time.monotonic() - started, 2)
+
+    def test_asummarize_meeting_matches_sync_parsing(self):
+        service = GeminiService(model=FakeGenerativeModel(f'```json\n{MEETING_REPLY}\n```'))
+        summary = asyncio.run(service.asummarize_meeting('notes', {'name': 'Alice'}))
+        self.assertEqual(summary, service.summarize_meeting('notes', {'name': 'Alice'}))
+        self.assertEqual(summary['sentiment'], 'positive')
+        self.assertEqual(summary['follow_up'], 'Check in next week')
+
+    def test_timeout_is_reported_like_other_errors(self):
+        service = GeminiService(model=FakeGenerativeModel(latency=1), timeout=0.01)
+        summary = asyncio.run(service.asummarize_meeting('notes', {}))
+        self.assertIn('timed out', summary['summary'])
+        draft = asyncio.run(service.adraft_communication({}, 'email', 'intro'))
+        self.assertIn('timed out', draft)
+
+
+@override_settings(GEMINI_BACKEND='fake', GEMINI_FAKE_LATENCY=0, AI_CACHE_ENABLED=False)
+class AsyncAIViewTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('ai', password='pw')
+        self.client.force_login(self.user)
+        self.stakeholder = Stakeholder.objects.create(name='Alice', created_by=self.user)
+
+    def test_meeting_summary(self):
+        response = self.client.post(
+            reverse('meeting_summary'),
+            json.dumps({'stakeholder_id': self.stakeholder.pk, 'meeting_notes': 'We met.'}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['summary']['summary'], 'Fake summary of the meeting.')
+
+    def test_draft_communication(self):
+        response = self.client.post(
+            reverse('draft_communication'),
+            json.dumps({'stakeholder_id': self.stakeholder.pk, 'purpose': 'Introduce the project'}),
+            content_type='application/json',
+        )
+        self.assertTrue(response.json()['success'])
+
+    def test_generate_ai_summary_queues_a_job(self):
+        engagement = Engagement.objects.create(
+            stakeholder=self.stakeholder, title='Kickoff', type='meeting',
+            scheduled_date='2025-01-01T10:00:00Z', created_by=self.user,
+        )
+        response = self.client.post(
+            reverse('generate_ai_summary', args=[engagement.pk]),
+            json.dumps({'meeting_notes': 'We met.'}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 202)
+        job = Job.objects.get(pk=response.json()['job_id'])
+        self.assertEqual(job.kind, MEETING_SUMMARY_JOB)
+
+        run_job(claim_next('test'))
+        engagement.refresh_from_db()
+        self.assertEqual(engagement.ai_summary, 'Fake summary of the meeting.')
+
+        status = self.client.get(response.json()['status_url']).json()['job']
+        self.assertEqual(status['status'], 'succeeded')
+        self.assertEqual(status['progress'], 100)
+        self.assertEqual(status['result']['summary'], 'Fake summary of the meeting.')
+
+    def test_other_users_engagement_is_not_found(self):
+        other = User.objects.create_user('other')
+        engagement = Engagement.objects.create(
+            stakeholder=Stakeholder.objects.create(name='Bob', created_by=other), title='Private',
+            type='meeting', scheduled_date='2025-01-01T10:00:00Z', created_by=other,
+        )
+        response = self.client.post(
+            reverse('generate_ai_summary', args=[engagement.pk]),
+            json.dumps({'meeting_notes': 'We met.'}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_ai_health(self):
+        response = self.client.get(reverse('api_ai_health'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['status'], 'ok')
+
+
+@register('test_flaky')
+def flaky_handler(job):
+    raise RuntimeError('boom')
+
+
+class JobQueueTests(TestCase):
+    def test_job_is_claimed_once(self):
+        job = enqueue('test_flaky')
+        claimed = claim_next('worker-a')
+        self.assertEqual(claimed.pk, job.pk)
+        self.assertEqual(claimed.status, 'running')
+        self.assertEqual(claimed.attempts, 1)
+        self.assertIsNone(claim_next('worker-b'))
+
+    def test_failed_job_is_retried_then_marked_failed(self):
+        job = enqueue('test_flaky', max_attempts=2)
+        run_job(claim_next('worker'))
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'queued')
+        self.assertGreater(job.run_after, job.created_at)
+
+        Job.objects.filter(pk=job.pk).update(run_after=job.created_at)
+        run_job(claim_next('worker'))
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+        self.assertEqual(job.error, 'boom')
+
+    def test_unknown_kind_fails(self):
+        enqueue('no_such_kind')
+        job = run_job(claim_next('worker'))
+        self.assertEqual(job.status, 'failed')
+
+    def test_jobs_run_inline_without_a_worker(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            job = enqueue('test_flaky', max_attempts=2)
+            self.assertEqual(job.status, 'queued')
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('failed', 2))
+
+        with self.settings(JOB_WORKER_ENABLED=True), self.captureOnCommitCallbacks(execute=True):
+            job = enqueue('test_flaky')
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'queued')
+
+
+@override_settings(GEMINI_BACKEND='fake', GEMINI_FAKE_LATENCY=0, AI_CACHE_ENABLED=False)
+class ProfileJobViewTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('jobs', password='pw')
+        self.client.force_login(self.user)
+
+    def test_create_with_ai_insights_returns_before_generation(self):
+        response = self.client.post(reverse('stakeholder_create'), {
+            'name': 'Carol', 'influence': 'high', 'interest': 'medium', 'category': 'internal',
+            'generate_ai_insights': 'on',
+        })
+        stakeholder = Stakeholder.objects.get(name='Carol')
+        job = Job.objects.get(kind=STAKEHOLDER_PROFILE_JOB)
+        self.assertRedirects(response, f"{reverse('stakeholder_detail', args=[stakeholder.pk])}?job={job.pk}")
+        self.assertEqual(stakeholder.ai_generated_insights, '')
+
+        detail = self.client.get(response.url)
+        self.assertContains(detail, 'Generating AI insights')
+
+        run_job(claim_next('worker'))
+        stakeholder.refresh_from_db()
+        self.assertTrue(stakeholder.ai_generated_insights.startswith('Fake response'))
+
+    def test_ai_errors_fail_the_job_and_are_retried(self):
+        stakeholder = Stakeholder.objects.create(name='Dana', created_by=self.user)
+        engagement = Engagement.objects.create(
+            stakeholder=stakeholder, title='Sync', type='meeting',
+            scheduled_date='2025-01-01T10:00:00Z', created_by=self.user,
+        )
+        jobs = [
+            enqueue(STAKEHOLDER_PROFILE_JOB, {'stakeholder_id': stakeholder.pk}, user=self.user, max_attempts=2),
+            enqueue(MEETING_SUMMARY_JOB, {'engagement_id': engagement.pk, 'meeting_notes': 'We met.'},
+                    user=self.user, max_attempts=2),
+        ]
+        with client.override_model(FakeGenerativeModel(error=RuntimeError('model down'))):
+            for job in jobs:
+                run_job(claim_next('worker'))
+                job.refresh_from_db()
+                self.assertEqual((job.status, job.error), ('queued', 'model down'))
+
+                Job.objects.filter(pk=job.pk).update(run_after=job.created_at)
+                run_job(claim_next('worker'))
+                job.refresh_from_db()
+                self.assertEqual((job.status, job.error), ('failed', 'model down'))
+
+        stakeholder.refresh_from_db()
+        engagement.refresh_from_db()
+        self.assertEqual((stakeholder.ai_generated_insights, engagement.ai_summary), ('', ''))
+
+    def test_job_status_is_private(self):
+        job = enqueue(STAKEHOLDER_PROFILE_JOB, user=User.objects.create_user('someone_else'))
+        response = self.client.get(reverse('api_job_status', args=[job.pk]))
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(GEMINI_BACKEND='fake', GEMINI_FAKE_LATENCY=0.05, AI_CACHE_ENABLED=False, JOB_WORKER_ENABLED=True)
+class WorkerTests(TransactionTestCase):
+    def test_worker_pool_drains_queue(self):
+        user = User.objects.create_user('worker')
+        stakeholders = [Stakeholder.objects.create(name=f'S{i}', created_by=user) for i in range(8)]
+        for stakeholder in stakeholders:
+            enqueue(STAKEHOLDER_PROFILE_JOB, {'stakeholder_id': stakeholder.pk}, user=user)
+
+        processed = Worker(concurrency=4, poll_interval=0, burst=True).run()
+
+        self.assertEqual(processed, 8)
+        self.assertEqual(Job.objects.filter(status='succeeded').count(), 8)
+        self.assertFalse(Stakeholder.objects.filter(ai_generated_insights='').exists())
+
+
+class PromptCacheTests(TestCase):
+    def setUp(self):
+        self.cache = PromptCache(ttl=60, max_entries=100, memory_entries=10)
+        self.model = FakeGenerativeModel(['first', 'second', 'third'])
+        self.service = GeminiService(model=self.model, cache=self.cache)
+
+    def test_repeated_prompt_is_served_from_cache(self):
+        info = {'name': 'Alice', 'title': 'CTO'}
+        self.assertEqual(self.service.generate_stakeholder_profile(info), 'first')
+        self.assertEqual(self.service.generate_stakeholder_profile(info), 'first')
+        self.assertEqual(len(self.model.prompts), 1)
+        self.assertEqual(self.cache.stats(), {'hits': 1, 'memory_hits': 1, 'misses': 1, 'hit_rate': 0.5})
+
+    def test_key_ignores_whitespace_but_not_model(self):
+        self.assertEqual(prompt_cache_key('m', 'a  b\n c'), prompt_cache_key('m', ' a b c '))
+        self.assertNotEqual(prompt_cache_key('m', 'a b'), prompt_cache_key('other', 'a b'))
+
+    def test_entries_persist_across_processes(self):
+        self.service.extract_action_items('notes')
+        fresh_cache = PromptCache(ttl=60, max_entries=100, memory_entries=10)
+        other = GeminiService(model=FakeGenerativeModel('unused'), cache=fresh_cache)
+        other.model_name = self.service.model_name
+        self.assertEqual(other.extract_action_items('notes'), 'first')
+        self.assertEqual(fresh_cache.stats()['memory_hits'], 0)
+        self.assertEqual(PromptCacheEntry.objects.get().hits, 1)
+
+    def test_bypass_refreshes_entry(self):
+        self.service.extract_action_items('notes')
+        self.assertEqual(self.service.extract_action_items('notes', use_cache=False), 'second')
+        self.assertEqual(self.service.extract_action_items('notes'), 'second')
+
+    def test_expired_entries_are_ignored(self):
+        self.service.extract_action_items('notes')
+        self.cache._memory.clear()
+        PromptCacheEntry.objects.update(expires_at=PromptCacheEntry.objects.get().created_at)
+        self.assertEqual(self.service.extract_action_items('notes'), 'second')
+
+    def test_least_recently_used_entries_are_culled(self):
+        self.cache.max_entries = 2
+        for text in ('one', 'two', 'three'):
+            self.service.extract_action_items(text)
+        self.assertEqual(PromptCacheEntry.objects.count(), 2)
+        self.cache._memory.clear()
+        self.assertEqual(self.service.extract_action_items('one'), 'first')
+        self.assertEqual(len(self.model.prompts), 4)
+
+    def test_async_methods_share_the_cache(self):
+        summary = self.service.summarize_meeting('notes', {'name': 'Alice'})
+        self.assertEqual(asyncio.run(self.service.asummarize_meeting('notes', {'name': 'Alice'})), summary)
+        self.assertEqual(len(self.model.prompts), 1)
+
+
+class ThrottlingTests(SimpleTestCase):
+    def test_request_limit_spaces_out_calls(self):
+        now = [0.0]
+        limiter = RateLimiter(requests_per_minute=60, clock=lambda: now[0])
+        waits = [limiter.reserve() for _ in range(62)]
+        self.assertEqual(waits[:60], [0.0] * 60)
+        self.assertEqual(waits[60:], [1.0, 2.0])
+        now[0] = 10.0
+        self.assertEqual(limiter.reserve(), 0.0)
+
+    def test_token_limit(self):
+        limiter = RateLimiter(tokens_per_minute=6000, clock=lambda: 0.0)
+        self.assertEqual(limiter.reserve(6000), 0.0)
+        self.assertEqual(limiter.reserve(1000), 10.0)
+
+    def test_retries_back_off_exponentially(self):
+        calls, delays = [], []
+
+        def flaky():
+            calls.append(1)
+            if len(calls) < 3:
+                raise RuntimeError('rate limited')
+            return 'ok'
+
+        self.assertEqual(call_with_retries(flaky, retries=3, base_delay=1, sleep=delays.append), 'ok')
+        self.assertEqual(len(delays), 2)
+        self.assertTrue(0.5 <= delays[0] <= 1 and 1 <= delays[1] <= 2)
+
+    def test_retries_give_up(self):
+        def failing():
+            raise RuntimeError('down')
+
+        with self.assertRaises(RuntimeError):
+            call_with_retries(failing, retries=2, sleep=lambda delay: None)
+
+
+@override_settings(AI_CACHE_ENABLED=False)
+class MeetingBatchTests(SimpleTestCase):
+    def items(self, count, notes='Discussed the roadmap.'):
+        return [{'id': i, 'meeting_notes': notes, 'stakeholder_info': {'name': f'S{i}'}} for i in range(count)]
+
+    def test_items_are_packed_under_the_token_budget(self):
+        service = GeminiService(model=FakeGenerativeModel())
+        batches = service.pack_meeting_batches(self.items(20), 2000)
+        self.assertEqual(sum(len(batch) for batch in batches), 20)
+        self.assertGreater(len(batches), 1)
+        for batch in batches:
+            self.assertLessEqual(len(service.meeting_batch_prompt(batch)) // 4 + 400 * len(batch), 2000)
+        self.assertEqual(len(service.pack_meeting_batches(self.items(1, notes='x' * 40000), 2000)), 1)
+
+    def test_batch_maps_results_to_ids_in_one_request(self):
+        model = FakeGenerativeModel()
+        results = GeminiService(model=model).summarize_meetings_batch(self.items(10), 100000)
+        self.assertEqual(sorted(results), list(range(10)))
+        self.assertEqual(results[3]['summary'], 'Fake summary of the meeting.')
+        self.assertEqual(len(model.prompts), 1)
+
+    def test_dropped_and_mangled_items_are_resent(self):
+        def reply(prompt):
+            ids = [int(i) for i in re.findall(r'Meeting id: (\d+)', prompt)]
+            if not ids:
+                return MEETING_REPLY
+            entries = [{'id': str(i), 'summary': f'Meeting {i}', 'sentiment': 'neutral'} for i in ids]
+            if len(ids) > 2:
+                entries = entries[:-2] + [{'id': ids[-1], 'summary': None}]
+            return f'```json\n{json.dumps(entries)}\n```'
+
+        model = FakeGenerativeModel(reply)
+        results = GeminiService(model=model).summarize_meetings_batch(self.items(6), 100000)
+        self.assertEqual(sorted(results), list(range(6)))
+        self.assertEqual(results[0]['summary'], 'Meeting 0')
+        self.assertGreater(len(model.prompts), 1)
+        self.assertLess(len(model.prompts), 6)
+
+    def test_items_failing_alone_are_omitted(self):
+        model = FakeGenerativeModel(error=RuntimeError('down'))
+        self.assertEqual(GeminiService(model=model).summarize_meetings_batch(self.items(3), 100000), {})
+
+
+@override_settings(AI_CACHE_ENABLED=False)
+class StreamingServiceTests(SimpleTestCase):
+    def collect(self, service, prompt='prompt', **kwargs):
+        async def run():
+            return [chunk async for chunk in service.astream_content(prompt, **kwargs)]
+        return asyncio.run(run())
+
+    def test_chunks_arrive_progressively(self):
+        service = GeminiService(model=FakeGenerativeModel('one two three four five six seven'))
+        chunks = self.collect(service)
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(''.join(chunks), 'one two three four five six seven')
+
+    def test_stalled_stream_times_out(self):
+        service = GeminiService(model=FakeGenerativeModel('a b c d e f g', chunk_delay=1), timeout=0.05)
+        with self.assertRaises(asyncio.TimeoutError):
+            self.collect(service)
+
+    def test_sse_stream_reports_errors(self):
+        async def failing_chunks():
+            yield 'partial '
+            raise RuntimeError('upstream closed')
+
+        async def run():
+            return [event async for event in sse_stream(failing_chunks(), lambda text: {'text': text})]
+
+        events = asyncio.run(run())
+        self.assertEqual(events[0], sse_event('chunk', {'text': 'partial '}))
+        self.assertEqual(events[-1], sse_event('error', {'error': 'upstream closed'}))
+
+
+@override_settings(GEMINI_BACKEND='fake', GEMINI_FAKE_LATENCY=0, AI_CACHE_ENABLED=False)
+class StreamingViewTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('stream', password='pw')
+        self.stakeholder = Stakeholder.objects.create(name='Dana', created_by=self.user)
+
+    async def post_stream(self, name, payload):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.post(reverse(name), json.dumps(payload), content_type='application/json')
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        events = []
+        async for chunk in response.streaming_content:
+            for message in chunk.decode().strip().split('\n\n'):
+                event, data = message.split('\n')
+                events.append((event[len('event: '):], json.loads(data[len('data: '):])))
+        return events
+
+    async def test_draft_is_streamed_in_chunks(self):
+        events = await self.post_stream('draft_communication_stream', {
+            'stakeholder_id': self.stakeholder.pk, 'purpose': 'Project kickoff',
+        })
+        chunks = [data['text'] for event, data in events if event == 'chunk']
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(events[-1], ('done', {'draft': ''.join(chunks)}))
+
+    async def test_summary_is_parsed_when_complete(self):
+        events = await self.post_stream('meeting_summary_stream', {
+            'stakeholder_id': self.stakeholder.pk, 'meeting_notes': 'We met.',
+        })
+        event, data = events[-1]
+        self.assertEqual(event, 'done')
+        self.assertEqual(data['summary']['summary'], 'Fake summary of the meeting.')
+
+    def test_unknown_stakeholder_is_a_json_error(self):
+        self.client.force_login(self.user)
+        response = self.client.post(
+            reverse('meeting_summary_stream'), json.dumps({'stakeholder_id': 0, 'meeting_notes': 'x'}),
+            content_type='application/json',
+        )
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertIn('error', response.json())
+
+
+@override_settings(GEMINI_BACKEND='fake', GEMINI_FAKE_LATENCY=0, AI_CACHE_ENABLED=False)
+class SharedClientTests(SimpleTestCase):
+    def setUp(self):
+        client.reset_client()
+        self.addCleanup(client.reset_client)
+
+    def test_model_is_built_once_across_threads(self):
+        models = []
+        with mock.patch.object(client, 'build_model', wraps=client.build_model) as build:
+            threads = [threading.Thread(target=lambda: models.append(client.get_model())) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(build.call_count, 1)
+        self.assertTrue(all(model is models[0] for model in models))
+
+    def test_services_share_the_model(self):
+        self.assertIs(GeminiService().model, get_gemini_service().model)
+        self.assertIs(get_gemini_service(), get_gemini_service())
+
+    def test_override_model_routes_the_default_service(self):
+        fake = FakeGenerativeModel('overridden')
+        with client.override_model(fake):
+            self.assertEqual(get_gemini_service().generate_content('hi'), 'overridden')
+        self.assertIsNot(get_gemini_service().model, fake)
+
+    def test_changing_settings_resets_the_client(self):
+        model = client.get_model()
+        with override_settings(GEMINI_FAKE_LATENCY=0.01):
+            self.assertIsNot(client.get_model(), model)
+            self.assertEqual(client.get_model().latency, 0.01)
+
+    def test_health_check(self):
+        self.assertEqual(client.health_check()['status'], 'ok')
+        with client.override_model(FakeGenerativeModel(error=RuntimeError('down'))):
+            self.assertEqual(client.health_check(), {'status': 'error', 'model': 'fake', 'error': 'down'})
+        with override_settings(GEMINI_BACKEND='gemini', GEMINI_API_KEY=''):
+            self.assertEqual(client.health_check()['status'], 'unavailable')
+
+
+class CircuitBreakerTests(SimpleTestCase):
+    def test_opens_after_threshold_then_lets_one_trial_through(self):
+        now = [0.0]
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=lambda: now[0])
+        breaker.record_failure()
+        self.assertTrue(breaker.allow())
+        breaker.record_failure()
+        self.assertEqual(breaker.state, 'open')
+        self.assertFalse(breaker.allow())
+
+        now[0] = 10
+        self.assertEqual(breaker.state, 'half_open')
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())
+        breaker.record_failure()
+        self.assertEqual(breaker.state, 'open')
+
+        now[0] = 20
+        self.assertTrue(breaker.allow())
+        breaker.record_success()
+        self.assertEqual(breaker.state, 'closed')
+        self.assertEqual(breaker.times_opened, 2)
+
+
+@override_settings(AI_CACHE_ENABLED=False)
+class TransportTests(SimpleTestCase):
+    def service(self, model, **options):
+        options.setdefault('base_delay', 0)
+        return GeminiService(model=model, timeout=1, transport=Transport(**options))
+
+    def test_transient_errors_are_retried(self):
+        model = FakeGenerativeModel('ok', failures=[api_exceptions.ServiceUnavailable('down')] * 2)
+        service = self.service(model, retries=2)
+        self.assertEqual(service.generate_content('hi'), 'ok')
+        stats = service.transport.stats()
+        self.assertEqual((stats['retries'], stats['failed'], stats['succeeded']), (2, 2, 1))
+        self.assertEqual(stats['breaker_state'], 'closed')
+
+    def test_bad_requests_are_not_retried_and_do_not_trip_the_breaker(self):
+        model = FakeGenerativeModel(error=api_exceptions.InvalidArgument('bad prompt'))
+        service = self.service(model, retries=2, breaker=CircuitBreaker(failure_threshold=1))
+        for _ in range(3):
+            with self.assertRaises(api_exceptions.InvalidArgument):
+                service.generate_content('hi')
+        self.assertEqual(len(model.prompts), 3)
+        self.assertEqual(service.transport.stats()['breaker_state'], 'closed')
+
+    def test_open_breaker_fails_fast(self):
+        model = FakeGenerativeModel(error=api_exceptions.ServiceUnavailable('down'))
+        service = self.service(model, retries=0, breaker=CircuitBreaker(failure_threshold=3))
+        for _ in range(3):
+            with self.assertRaises(api_exceptions.ServiceUnavailable):
+                service.generate_content('hi')
+        with self.assertRaises(CircuitOpenError):
+            service.generate_content('hi')
+        self.assertEqual(len(model.prompts), 3)
+        self.assertIn('temporarily unavailable', service.draft_communication({}, 'email', 'x'))
+        stats = service.transport.stats()
+        self.assertEqual((stats['breaker_state'], stats['rejected']), ('open', 2))
+
+    def test_concurrent_calls_are_capped(self):
+        model = FakeGenerativeModel('ok', latency=0.02)
+        service = self.service(model, max_concurrency=2)
+
+        async def run():
+            return await asyncio.gather(*(service.agenerate_content(f'p{i}') for i in range(6)))
+
+        self.assertEqual(asyncio.run(run()), ['ok'] * 6)
+        self.assertEqual(model.max_in_flight, 2)
+        self.assertEqual(service.transport.stats()['max_in_flight'], 2)
+
+    def test_callers_without_a_slot_by_their_deadline_are_shed(self):
+        service = self.service(FakeGenerativeModel('ok', latency=0.2), max_concurrency=1)
+
+        async def run():
+            slow = asyncio.ensure_future(service.agenerate_content('first'))
+            await asyncio.sleep(0.01)
+            with self.assertRaises(TransportTimeout):
+                await service.agenerate_content('second', timeout=0.05)
+            return await slow
+
+        self.assertEqual(asyncio.run(run()), 'ok')
+        self.assertEqual(service.transport.stats()['shed'], 1)
+
+    def test_blocking_calls_share_the_cap(self):
+        model = FakeGenerativeModel('ok', latency=0.02)
+        service = self.service(model, max_concurrency=3)
+        threads = [threading.Thread(target=service.generate_content, args=(f'p{i}',)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        stats = service.transport.stats()
+        self.assertEqual(stats['succeeded'], 8)
+        self.assertLessEqual(stats['max_in_flight'], 3)
+        self.assertGreater(stats['latency_ms']['p95'], 0)
+
+    def test_stream_timeout_counts_against_the_breaker(self):
+        model = FakeGenerativeModel('one two three four', chunk_delay=0.2)
+        service = self.service(model, retries=0, breaker=CircuitBreaker(failure_threshold=1))
+
+        async def run():
+            return [chunk async for chunk in service.astream_content('hi', timeout=0.05)]
+
+        with self.assertRaises(asyncio.TimeoutError):
+            asyncio.run(run())
+        self.assertEqual(service.transport.stats()['breaker_state'], 'open')
+
+
+@override_settings(AI_CACHE_ENABLED=False)
+class StructuredOutputTests(SimpleTestCase):
+    def test_scanner_skips_fences_prose_and_trailing_text(self):
+        reply = 'Sure {here} it is:\n```json\n{"summary": "a } b", "risks": "say \\"hi\\""}\n```\nAnything else? {x}'
+        self.assertEqual(extract_json(reply), {'summary': 'a } b', 'risks': 'say "hi"'})
+        self.assertIsNone(extract_json('No JSON here'))
+
+    def test_scanner_accepts_chunks_and_salvages_truncated_replies(self):
+        scanner = JSONScanner()
+        self.assertFalse(scanner.feed('```json\n{"summary": "S", "action_'))
+        self.assertFalse(scanner.feed('items": ["a", "b"], "sentiment": "pos'))
+        self.assertEqual(scanner.result(), {'summary': 'S', 'action_items': ['a', 'b']})
+        self.assertEqual(extract_json('[{"id": "1"}, {"id": "2"},]', '['), [{'id': '1'}, {'id': '2'}])
+
+    def test_summaries_request_schema_constrained_json(self):
+        model = FakeGenerativeModel(MEETING_REPLY)
+        GeminiService(model=model).summarize_meeting('notes', {'name': 'Alice'})
+        config = model.generation_configs[0]
+        self.assertEqual(config['response_mime_type'], 'application/json')
+        self.assertEqual(config['response_schema']['required'],
+                         ['summary', 'action_items', 'sentiment', 'risks', 'follow_up'])
+
+        model = FakeGenerativeModel(MEETING_REPLY)
+        GeminiService(model=model, structured_output=False).summarize_meeting('notes', {'name': 'Alice'})
+        self.assertEqual(model.generation_configs, [None])
+
+    def test_missing_fields_are_requested_on_their_own(self):
+        model = FakeGenerativeModel([
+            '{"summary": "Agreed on pricing", "sentiment": "Positive", "action_items": ["Send quote"]}',
+            '```json\n{"risks": "Budget freeze", "follow_up": "Call in May"}\n```',
+        ])
+        summary = GeminiService(model=model).summarize_meeting('notes', {'name': 'Alice'})
+        self.assertEqual(summary, {
+            'summary': 'Agreed on pricing',
+            'action_items': '- Send quote',
+            'sentiment': 'positive',
+            'risks': 'Budget freeze',
+            'follow_up': 'Call in May',
+        })
+        self.assertEqual(len(model.prompts), 2)
+        self.assertEqual(model.generation_configs[1]['response_schema']['required'], ['risks', 'follow_up'])
+        self.assertNotIn('"summary"', model.prompts[1])
+
+    def test_prose_replies_are_not_repaired(self):
+        model = FakeGenerativeModel('The meeting went well.')
+        summary = asyncio.run(GeminiService(model=model).asummarize_meeting('notes', {'name': 'Alice'}))
+        self.assertEqual(summary['summary'], 'The meeting went well.')
+        self.assertEqual(len(model.prompts), 1)
+
+    def test_batch_reply_with_fences_and_trailing_text(self):
+        service = GeminiService(model=FakeGenerativeModel())
+        items = [{'id': 1, 'meeting_notes': 'a'}, {'id': 2, 'meeting_notes': 'b'}]
+        reply = '```json\n[{"id": "1", "summary": "One"}, {"id": "2", "summary": "Two"}]\n```\nDone!'
+        results = service.parse_meeting_batch(reply, items)
+        self.assertEqual({key: value['summary'] for key, value in results.items()}, {1: 'One', 2: 'Two'})
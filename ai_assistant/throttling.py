@@ -0,0 +1,90 @@
+"""
+Client-side rate limiting and retries for Gemini calls.
+
+RateLimiter keeps one token bucket for requests per minute and one for
+tokens per minute, matching how the Gemini quotas are expressed. Callers
+reserve capacity before each request and sleep for however long the
+reservation says, so many threads or tasks can share one limiter without
+overshooting the quota.
+"""
+import asyncio
+import logging
+import random
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Rough size of a model reply, charged up front against the tokens-per-minute budget
+EXPECTED_RESPONSE_TOKENS = 400
+
+
+def estimate_tokens(text):
+    """Approximate token count (Gemini averages about four characters per token)"""
+    return max(1, len(text) // 4)
+
+
+class TokenBucket:
+    def __init__(self, per_minute, clock):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.level = float(per_minute)
+        self.clock = clock
+        self.updated = clock()
+
+    def reserve(self, cost):
+        """Take ``cost`` from the bucket and return the seconds to wait before using it"""
+        now = self.clock()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+        self.level -= cost
+        return 0.0 if self.level >= 0 else -self.level / self.rate
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute limits; a falsy limit is unlimited"""
+
+    def __init__(self, requests_per_minute=None, tokens_per_minute=None, clock=time.monotonic):
+        self.requests = TokenBucket(requests_per_minute, clock) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute, clock) if tokens_per_minute else None
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens=0):
+        with self._lock:
+            wait = 0.0
+            if self.requests:
+                wait = max(wait, self.requests.reserve(1))
+            if self.tokens:
+                wait = max(wait, self.tokens.reserve(tokens))
+            return wait
+
+    def acquire(self, tokens=0):
+        wait = self.reserve(tokens)
+        if wait:
+            time.sleep(wait)
+        return wait
+
+    async def aacquire(self, tokens=0):
+        wait = self.reserve(tokens)
+        if wait:
+            await asyncio.sleep(wait)
+        return wait
+
+
+def call_with_retries(func, retries=3, base_delay=1.0, max_delay=30.0, sleep=time.sleep):
+    """
+    Call ``func()``, retrying failures with exponential backoff
+    (base_delay, 2 * base_delay, ... capped at max_delay, with jitter).
+    The last error is re-raised once ``retries`` retries are used up.
+    """
+    attempt = 0
+    while True:
+        try:
+            return func()
+        except Exception as e:
+            if attempt >= retries:
+                raise
+            delay = min(max_delay, base_delay * 2 ** attempt) * random.uniform(0.5, 1.0)
+            logger.warning(f"AI request failed ({e}); retrying in {delay:.1f}s")
+            sleep(delay)
+            attempt += 1
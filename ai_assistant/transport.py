@@ -0,0 +1,398 @@
+"""
+Guarded calls to the Gemini model.
+
+Every request that reaches the model goes through a Transport, which:
+
+- gives the call a deadline (GEMINI_TIMEOUT) covering the wait for a slot,
+  every attempt and the backoff between them;
+- caps the number of calls in flight across the whole process
+  (GEMINI_MAX_CONCURRENCY), so a slow upstream can't tie up every worker
+  thread; callers that can't get a slot before their deadline fail with
+  TransportTimeout instead of queueing;
+- retries transient failures (timeouts, 429s, 5xx, dropped connections) with
+  jittered exponential backoff;
+- stops calling the model for GEMINI_BREAKER_RESET seconds once
+  GEMINI_BREAKER_THRESHOLD transient failures happen in a row, failing fast
+  with CircuitOpenError, then lets a single trial call through to decide
+  whether to close again;
+- records call counts, errors, latency and breaker state, reported by
+  ``transport_stats()`` and the AI health endpoint.
+
+Errors the model raises for bad requests (e.g. an invalid argument) are
+passed straight through: they are not retried and don't trip the breaker.
+"""
+from collections import deque
+import asyncio
+import logging
+import random
+import threading
+import time
+
+from django.conf import settings
+from google.api_core import exceptions as api_exceptions
+
+logger = logging.getLogger(__name__)
+
+# Failures worth another attempt, and counted against the upstream's health
+TRANSIENT_ERRORS = (
+    api_exceptions.TooManyRequests,
+    api_exceptions.InternalServerError,
+    api_exceptions.BadGateway,
+    api_exceptions.ServiceUnavailable,
+    api_exceptions.GatewayTimeout,
+    api_exceptions.DeadlineExceeded,
+    ConnectionError,
+    TimeoutError,
+)
+
+# How long async callers sleep between attempts to take a busy slot
+SLOT_POLL_INTERVAL = 0.01
+
+
+class TransportError(Exception):
+    """Raised when a call is refused or abandoned before the model answered"""
+
+
+class CircuitOpenError(TransportError):
+    """The circuit breaker is open: recent calls failed, so this one was not attempted"""
+
+
+class TransportTimeout(TransportError, TimeoutError):
+    """The deadline passed while waiting for a slot or for the model"""
+
+
+def is_transient(error):
+    return isinstance(error, TRANSIENT_ERRORS)
+
+
+class CircuitBreaker:
+    """
+    Closed: calls go through. Open: calls are refused until ``reset_timeout``
+    seconds have passed. Half-open: one trial call is let through; success
+    closes the breaker, failure opens it again.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self.opened_at = None
+        self.times_opened = 0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return self.CLOSED
+        if self.clock() - self.opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow(self):
+        """True if a call may be attempted now"""
+        with self._lock:
+            state = self.state
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self.opened_at is not None:
+                logger.info("Gemini circuit breaker closed")
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            trial_failed = self._trial_in_flight
+            self._trial_in_flight = False
+            if trial_failed or (self.opened_at is None and self.failures >= self.failure_threshold):
+                self.opened_at = self.clock()
+                self.times_opened += 1
+                logger.warning(
+                    f"Gemini circuit breaker opened after {self.failures} consecutive failures; "
+                    f"failing fast for {self.reset_timeout:.0f}s"
+                )
+
+    def release_trial(self):
+        """Give up a trial call that ended without telling us anything (e.g. a bad request)"""
+        with self._lock:
+            self._trial_in_flight = False
+
+
+class TransportMetrics:
+    """Thread-safe counters plus a window of recent call latencies"""
+
+    COUNTERS = ('calls', 'succeeded', 'failed', 'retries', 'timeouts', 'rejected', 'shed')
+
+    def __init__(self, window=1000):
+        self._lock = threading.Lock()
+        self.latencies = deque(maxlen=window)
+        self.counts = dict.fromkeys(self.COUNTERS, 0)
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def increment(self, counter):
+        with self._lock:
+            self.counts[counter] += 1
+
+    def started(self):
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def finished(self, seconds, succeeded):
+        with self._lock:
+            self.in_flight -= 1
+            self.latencies.append(seconds)
+            self.counts['succeeded' if succeeded else 'failed'] += 1
+
+    def snapshot(self):
+        with self._lock:
+            latencies = sorted(self.latencies)
+            stats = dict(self.counts, in_flight=self.in_flight, max_in_flight=self.max_in_flight)
+
+        def percentile(fraction):
+            return round(latencies[min(len(latencies) - 1, int(len(latencies) * fraction))] * 1000, 1)
+
+        stats['latency_ms'] = {
+            'avg': round(sum(latencies) / len(latencies) * 1000, 1),
+            'p50': percentile(0.5),
+            'p95': percentile(0.95),
+            'max': round(latencies[-1] * 1000, 1),
+        } if latencies else None
+        return stats
+
+
+class Transport:
+    """
+    Deadlines, bounded concurrency, retries and a circuit breaker around
+    model calls. One instance is shared per process (``get_transport()``)
+    so the concurrency cap and breaker apply to every caller.
+    """
+
+    def __init__(self, max_concurrency=8, retries=2, base_delay=0.5, max_delay=5.0,
+                 breaker=None, clock=time.monotonic):
+        self.max_concurrency = max_concurrency
+        self.retries = retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.breaker = breaker if breaker is not None else CircuitBreaker(clock=clock)
+        self.clock = clock
+        self.metrics = TransportMetrics()
+        self._slots = threading.BoundedSemaphore(max_concurrency) if max_concurrency else None
+
+    def stats(self):
+        return dict(
+            self.metrics.snapshot(),
+            breaker_state=self.breaker.state,
+            breaker_opened=self.breaker.times_opened,
+            max_concurrency=self.max_concurrency,
+        )
+
+    def _backoff(self, attempt):
+        return min(self.max_delay, self.base_delay * 2 ** attempt) * random.uniform(0.5, 1.0)
+
+    def _check_breaker(self):
+        if not self.breaker.allow():
+            self.metrics.increment('rejected')
+            raise CircuitOpenError("AI service temporarily unavailable after repeated errors")
+
+    def _record(self, error):
+        """Update the breaker and counters for a failed attempt; True if it may be retried"""
+        if isinstance(error, (TimeoutError, api_exceptions.DeadlineExceeded)):
+            self.metrics.increment('timeouts')
+        if is_transient(error):
+            self.breaker.record_failure()
+            return True
+        self.breaker.release_trial()
+        return False
+
+    def _shed(self):
+        self.metrics.increment('shed')
+        self.breaker.release_trial()
+        return TransportTimeout(
+            f"All {self.max_concurrency} AI request slots stayed busy until the deadline"
+        )
+
+    # Blocking calls
+
+    def _acquire_slot(self, deadline):
+        if self._slots is not None and not self._slots.acquire(timeout=max(0.0, deadline - self.clock())):
+            raise self._shed()
+
+    def _release_slot(self):
+        if self._slots is not None:
+            self._slots.release()
+
+    def generate(self, model, prompt, timeout, **options):
+        """Blocking ``model.generate_content(prompt, **options)`` under the transport's guards"""
+        deadline = self.clock() + timeout
+        self.metrics.increment('calls')
+        self._check_breaker()
+        self._acquire_slot(deadline)
+        try:
+            attempt = 0
+            while True:
+                remaining = deadline - self.clock()
+                if remaining <= 0:
+                    self.metrics.increment('timeouts')
+                    raise TransportTimeout(f"AI request exceeded its {timeout:.0f}s deadline")
+                started = self.clock()
+                self.metrics.started()
+                try:
+                    response = model.generate_content(prompt, request_options={'timeout': remaining}, **options)
+                except Exception as e:
+                    self.metrics.finished(self.clock() - started, succeeded=False)
+                    delay = self._backoff(attempt)
+                    if not self._record(e) or attempt >= self.retries or self.clock() + delay >= deadline:
+                        raise
+                    logger.warning(f"AI request failed ({e}); retrying in {delay:.1f}s")
+                    self.metrics.increment('retries')
+                    time.sleep(delay)
+                    attempt += 1
+                    self._check_breaker()
+                    continue
+                self.metrics.finished(self.clock() - started, succeeded=True)
+                self.breaker.record_success()
+                return response
+        finally:
+            self._release_slot()
+
+    # Async calls
+
+    async def _aacquire_slot(self, deadline):
+        if self._slots is None:
+            return
+        # The slots are shared with threads, so poll rather than block the event loop
+        while not self._slots.acquire(blocking=False):
+            if self.clock() >= deadline:
+                raise self._shed()
+            await asyncio.sleep(min(SLOT_POLL_INTERVAL, max(0.0, deadline - self.clock())))
+
+    async def _attempt(self, open_call, deadline, timeout):
+        attempt = 0
+        while True:
+            remaining = deadline - self.clock()
+            if remaining <= 0:
+                self.metrics.increment('timeouts')
+                raise TransportTimeout(f"AI request exceeded its {timeout:.0f}s deadline")
+            started = self.clock()
+            self.metrics.started()
+            try:
+                result = await asyncio.wait_for(open_call(remaining), remaining)
+            except asyncio.CancelledError:
+                self.metrics.finished(self.clock() - started, succeeded=False)
+                self.breaker.release_trial()
+                raise
+            except Exception as e:
+                self.metrics.finished(self.clock() - started, succeeded=False)
+                delay = self._backoff(attempt)
+                if not self._record(e) or attempt >= self.retries or self.clock() + delay >= deadline:
+                    raise
+                logger.warning(f"AI request failed ({e}); retrying in {delay:.1f}s")
+                self.metrics.increment('retries')
+                await asyncio.sleep(delay)
+                attempt += 1
+                self._check_breaker()
+                continue
+            self.metrics.finished(self.clock() - started, succeeded=True)
+            return result
+
+    async def agenerate(self, model, prompt, timeout, **options):
+        """Await ``model.generate_content_async(prompt, **options)`` under the transport's guards"""
+        deadline = self.clock() + timeout
+        self.metrics.increment('calls')
+        self._check_breaker()
+        await self._aacquire_slot(deadline)
+        try:
+            response = await self._attempt(
+                lambda remaining: model.generate_content_async(
+                    prompt, request_options={'timeout': remaining}, **options
+                ),
+                deadline, timeout,
+            )
+        finally:
+            self._release_slot()
+        self.breaker.record_success()
+        return response
+
+    async def astream(self, model, prompt, timeout, **options):
+        """
+        Yield response chunks from a streamed call. Opening the stream is
+        retried like any call; each chunk must then arrive within ``timeout``
+        seconds. The slot is held until the stream ends.
+        """
+        deadline = self.clock() + timeout
+        self.metrics.increment('calls')
+        self._check_breaker()
+        await self._aacquire_slot(deadline)
+        try:
+            response = await self._attempt(
+                lambda remaining: model.generate_content_async(
+                    prompt, stream=True, request_options={'timeout': remaining}, **options
+                ),
+                deadline, timeout,
+            )
+            chunks = response.__aiter__()
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(chunks.__anext__(), timeout)
+                except StopAsyncIteration:
+                    break
+                except Exception as e:
+                    self._record(e)
+                    raise
+                yield chunk
+            self.breaker.record_success()
+        finally:
+            # A stream abandoned part way tells us nothing about the upstream
+            self.breaker.release_trial()
+            self._release_slot()
+
+
+_default_transport = None
+_lock = threading.Lock()
+
+
+def build_transport():
+    return Transport(
+        max_concurrency=settings.GEMINI_MAX_CONCURRENCY,
+        retries=settings.GEMINI_RETRIES,
+        breaker=CircuitBreaker(
+            failure_threshold=settings.GEMINI_BREAKER_THRESHOLD,
+            reset_timeout=settings.GEMINI_BREAKER_RESET,
+        ),
+    )
+
+
+def get_transport():
+    """The process-wide transport, created on first use"""
+    global _default_transport
+    if _default_transport is None:
+        with _lock:
+            if _default_transport is None:
+                _default_transport = build_transport()
+    return _default_transport
+
+
+def reset_transport():
+    global _default_transport
+    with _lock:
+        _default_transport = None
+
+
+def transport_stats():
+    return get_transport().stats()
@@ -75,6 +75,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'stakeholder_management.wsgi.application'
+ASGI_APPLICATION = 'stakeholder_management.asgi.application'
 
 
 # Database
@@ -87,6 +88,47 @@ DATABASES = {
     }
 }
 
+# Runs SQLite test databases from a temporary file (see test_runner.py)
+TEST_RUNNER = 'stakeholder_management.test_runner.FileDatabaseTestRunner'
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# In-process memory by default; use 'file' or 'redis' so all workers share one cache
+
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'locmem')
+
+if CACHE_BACKEND == 'redis':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('CACHE_LOCATION', 'redis://127.0.0.1:6379/1'),
+        }
+    }
+elif CACHE_BACKEND == 'file':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.getenv('CACHE_LOCATION', str(BASE_DIR / '.cache')),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'stakeholder-management',
+        }
+    }
+
+# Seconds a dashboard snapshot may be served before it is rebuilt even without data changes
+# (upcoming/overdue counts drift with the clock)
+DASHBOARD_CACHE_TIMEOUT = int(os.getenv('DASHBOARD_CACHE_TIMEOUT', '300'))
+
+
+# List pagination: 'page' (numbered pages) or 'cursor' (keyset pagination for large accounts).
+# Either mode can also be chosen per request with ?paginate=page|cursor
+LIST_PAGINATION_MODE = os.getenv('LIST_PAGINATION_MODE', 'page')
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -140,6 +182,47 @@ LOGIN_REDIRECT_URL = '/dashboard/'
 # Gemini AI Configuration
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
 
+# Transport for the shared Gemini client: '' for the library default (gRPC) or 'rest'.
+# Either way one channel/session per process is kept open and reused across requests.
+GEMINI_TRANSPORT = os.getenv('GEMINI_TRANSPORT', '')
+
+# Seconds an AI request may take before it is abandoned
+GEMINI_TIMEOUT = float(os.getenv('GEMINI_TIMEOUT', '30'))
+
+# Guards on calls to Gemini (see ai_assistant/transport.py): at most
+# GEMINI_MAX_CONCURRENCY calls in flight per process (0 = no cap), GEMINI_RETRIES
+# retries of transient errors, and after GEMINI_BREAKER_THRESHOLD failures in a
+# row calls fail fast for GEMINI_BREAKER_RESET seconds
+GEMINI_MAX_CONCURRENCY = int(os.getenv('GEMINI_MAX_CONCURRENCY', '8'))
+GEMINI_RETRIES = int(os.getenv('GEMINI_RETRIES', '2'))
+GEMINI_BREAKER_THRESHOLD = int(os.getenv('GEMINI_BREAKER_THRESHOLD', '5'))
+GEMINI_BREAKER_RESET = float(os.getenv('GEMINI_BREAKER_RESET', '30'))
+
+# Ask Gemini for schema-constrained JSON where a prompt expects JSON (meeting summaries)
+GEMINI_STRUCTURED_OUTPUT = os.getenv('GEMINI_STRUCTURED_OUTPUT', 'True') == 'True'
+
+# 'gemini' calls the real API; 'fake' answers locally with canned text after
+# GEMINI_FAKE_LATENCY seconds (for tests and load testing without a key)
+GEMINI_BACKEND = os.getenv('GEMINI_BACKEND', 'gemini')
+GEMINI_FAKE_LATENCY = float(os.getenv('GEMINI_FAKE_LATENCY', '0'))
+
+# Client-side Gemini quota for bulk jobs such as generate_ai_insights (0 = unlimited)
+GEMINI_REQUESTS_PER_MINUTE = int(os.getenv('GEMINI_REQUESTS_PER_MINUTE', '0'))
+GEMINI_TOKENS_PER_MINUTE = int(os.getenv('GEMINI_TOKENS_PER_MINUTE', '0'))
+
+# Cache of Gemini responses keyed by prompt (see ai_assistant/cache.py)
+AI_CACHE_ENABLED = os.getenv('AI_CACHE_ENABLED', 'True') == 'True'
+AI_CACHE_TTL = int(os.getenv('AI_CACHE_TTL', str(7 * 24 * 3600)))
+AI_CACHE_MAX_ENTRIES = int(os.getenv('AI_CACHE_MAX_ENTRIES', '5000'))
+AI_CACHE_MEMORY_ENTRIES = int(os.getenv('AI_CACHE_MEMORY_ENTRIES', '256'))
+
+# Set when `manage.py run_worker` processes are deployed; otherwise background
+# jobs run inline in the process that enqueued them
+JOB_WORKER_ENABLED = os.getenv('JOB_WORKER_ENABLED', 'False') == 'True'
+
+# Threads per `manage.py run_worker` process (each runs one background job at a time)
+JOB_WORKER_CONCURRENCY = int(os.getenv('JOB_WORKER_CONCURRENCY', '4'))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
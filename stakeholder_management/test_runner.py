@@ -0,0 +1,24 @@
+"""
+Test runner for the project (TEST_RUNNER in settings.py).
+
+SQLite test databases default to shared-cache memory, where tests that run
+worker threads fail with "table is locked" instead of waiting on SQLite's
+busy timeout. Unless a test database name is configured, this runner puts
+SQLite test databases in a file in the system temp directory.
+"""
+import os
+import tempfile
+
+from django.db import connections
+from django.test.runner import DiscoverRunner
+
+
+class FileDatabaseTestRunner(DiscoverRunner):
+    def setup_databases(self, **kwargs):
+        for alias in connections:
+            settings_dict = connections[alias].settings_dict
+            if settings_dict['ENGINE'] == 'django.db.backends.sqlite3' and not settings_dict['TEST'].get('NAME'):
+                settings_dict['TEST']['NAME'] = os.path.join(
+                    tempfile.gettempdir(), f'stakeholder_management_test_{alias}.sqlite3'
+                )
+        return super().setup_databases(**kwargs)
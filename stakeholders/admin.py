@@ -3,7 +3,7 @@ from .models import Stakeholder, Engagement, StakeholderRelationship
 
 @admin.register(Stakeholder)
 class StakeholderAdmin(admin.ModelAdmin):
-    list_display = ['name', 'organization', 'title', 'influence', 'interest', 'category', 'created_at']
+    list_display = ['name', 'organization', 'title', 'influence', 'interest', 'priority_score', 'category', 'created_at']
     list_filter = ['influence', 'interest', 'category', 'created_at']
     search_fields = ['name', 'organization', 'title', 'email']
     readonly_fields = ['created_at', 'updated_at', 'ai_generated_insights']
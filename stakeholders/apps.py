@@ -1,6 +1,11 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class StakeholdersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'stakeholders'
+
+    def ready(self):
+        from . import signals, tasks  # tasks registers the background job handlers
+        post_migrate.connect(signals.repair_search_index_after_migrate, sender=self)
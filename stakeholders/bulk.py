@@ -0,0 +1,90 @@
+"""
+Bulk loading for the commands that generate data (demo scenarios, sample
+data, load-test volumes).
+
+Rows are described as plain field dicts. Engagements name their stakeholder
+by position in the stakeholder list and relationships name both ends the
+same way, so nothing has to be saved before the rows that point at it are
+built. Everything is written with batched bulk_create inside one
+transaction: a failed load leaves nothing behind, and thousands of rows cost
+a handful of INSERTs instead of one round trip each.
+
+bulk_create doesn't send post_save, so the engagement stats are computed
+here and the user's dashboard and relationship graph caches are bumped once
+the load (or the caller's enclosing transaction) commits.
+"""
+from django.db import transaction
+
+from .cache import bump_versions_on_commit
+from .models import Stakeholder, Engagement, StakeholderRelationship
+from .stats import create_engagement_stats
+
+BATCH_SIZE = 1000
+
+
+def scaled_stakeholders(rows, scale):
+    """
+    ``scale`` copies of each stakeholder row. Copies after the first get a
+    numbered name and email so they stay distinguishable; copy ``k`` of the
+    row at index ``i`` lands at index ``k * len(rows) + i``.
+    """
+    copies = []
+    for copy in range(scale):
+        for row in rows:
+            if copy:
+                row = dict(row, name=f"{row['name']} ({copy + 1})")
+                if row.get('email'):
+                    local, _, domain = row['email'].partition('@')
+                    row['email'] = f'{local}+{copy + 1}@{domain}'
+            copies.append(row)
+    return copies
+
+
+def scaled_relationships(relationships, base_count, scale):
+    """Repeat (from_index, to_index, fields) links inside every copy made by scaled_stakeholders"""
+    return [
+        (from_index + copy * base_count, to_index + copy * base_count, fields)
+        for copy in range(scale)
+        for from_index, to_index, fields in relationships
+    ]
+
+
+def bulk_load(user, stakeholders, engagements=(), relationships=(), batch_size=BATCH_SIZE):
+    """
+    Insert rows for ``user`` in one transaction.
+
+    ``stakeholders`` are field dicts; ``engagements`` are field dicts whose
+    ``stakeholder`` key is an index into ``stakeholders``; ``relationships``
+    are (from_index, to_index, fields) tuples. Relationships that already
+    exist are skipped.
+
+    Returns the created stakeholders, with primary keys set.
+    """
+    with transaction.atomic():
+        created = Stakeholder.objects.bulk_create(
+            [Stakeholder(created_by=user, **fields) for fields in stakeholders],
+            batch_size=batch_size,
+        )
+        created_engagements = Engagement.objects.bulk_create(
+            [
+                Engagement(created_by=user, **dict(fields, stakeholder=created[fields['stakeholder']]))
+                for fields in engagements
+            ],
+            batch_size=batch_size,
+        )
+        StakeholderRelationship.objects.bulk_create(
+            [
+                StakeholderRelationship(
+                    from_stakeholder=created[from_index],
+                    to_stakeholder=created[to_index],
+                    created_by=user,
+                    **fields
+                )
+                for from_index, to_index, fields in relationships
+            ],
+            batch_size=batch_size,
+            ignore_conflicts=True,
+        )
+        create_engagement_stats(created_engagements, batch_size=batch_size)
+        bump_versions_on_commit(user.pk)
+    return created
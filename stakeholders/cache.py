@@ -0,0 +1,109 @@
+"""
+Per-user dashboard snapshot cache.
+
+Each user has a version counter in the cache. Snapshots are stored under a key
+that includes the current version, so bumping the counter (done by the model
+signals in signals.py) makes every older snapshot unreachable without having
+to know which keys exist. Bulk writes that bypass model signals
+(QuerySet.update, bulk_create, raw SQL) must call bump_dashboard_version()
+themselves.
+
+The relationship graph (graph.py) has its own version counter, bumped only
+when stakeholders are added or removed or relationships change, so editing
+engagements doesn't throw away a graph that took a while to build.
+
+Bulk writers that may run inside a caller's transaction bump with
+bump_versions_on_commit(): a bump before the commit would let a concurrent
+request cache the pre-commit data under the new version until the next bump.
+"""
+import random
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+VERSION_KEY = 'dashboard:version:{user_id}'
+SNAPSHOT_KEY = 'dashboard:snapshot:{user_id}:{version}'
+GRAPH_VERSION_KEY = 'graph:version:{user_id}'
+HITS_KEY = 'dashboard:stats:hits'
+MISSES_KEY = 'dashboard:stats:misses'
+
+
+def _increment(key):
+    """Atomically increment a counter, creating it if needed"""
+    if cache.add(key, 1, timeout=None):
+        return 1
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # Evicted between add() and incr()
+        cache.set(key, 1, timeout=None)
+        return 1
+
+
+def get_dashboard_version(user_id):
+    version = cache.get(VERSION_KEY.format(user_id=user_id))
+    if version is None:
+        cache.add(VERSION_KEY.format(user_id=user_id), 1, timeout=None)
+        version = cache.get(VERSION_KEY.format(user_id=user_id), 1)
+    return version
+
+
+def bump_dashboard_version(user_id):
+    """Invalidate every cached dashboard snapshot for a user"""
+    return _increment(VERSION_KEY.format(user_id=user_id))
+
+
+def get_graph_version(user_id):
+    version = cache.get(GRAPH_VERSION_KEY.format(user_id=user_id))
+    if version is None:
+        # Start at a random version so graphs built before a cache flush or
+        # eviction can't match the restarted counter
+        cache.add(GRAPH_VERSION_KEY.format(user_id=user_id), random.getrandbits(40), timeout=None)
+        version = cache.get(GRAPH_VERSION_KEY.format(user_id=user_id), 0)
+    return version
+
+
+def bump_graph_version(user_id):
+    """Invalidate the cached relationship graph for a user"""
+    try:
+        return cache.incr(GRAPH_VERSION_KEY.format(user_id=user_id))
+    except ValueError:
+        return get_graph_version(user_id)
+
+
+def bump_versions_on_commit(user_id):
+    """Bump the user's dashboard and graph versions once the current transaction commits"""
+    def bump():
+        bump_dashboard_version(user_id)
+        bump_graph_version(user_id)
+    transaction.on_commit(bump)
+
+
+def get_dashboard_snapshot(user_id, builder):
+    """
+    Return the cached dashboard snapshot for a user, calling builder() to
+    rebuild and store it on a miss.
+    """
+    key = SNAPSHOT_KEY.format(user_id=user_id, version=get_dashboard_version(user_id))
+    snapshot = cache.get(key)
+    if snapshot is not None:
+        _increment(HITS_KEY)
+        return snapshot
+
+    _increment(MISSES_KEY)
+    snapshot = builder()
+    cache.set(key, snapshot, timeout=settings.DASHBOARD_CACHE_TIMEOUT)
+    return snapshot
+
+
+def dashboard_cache_stats():
+    """Hit/miss counters for the dashboard snapshot cache"""
+    hits = cache.get(HITS_KEY, 0)
+    misses = cache.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hits / total, 4) if total else 0.0,
+    }
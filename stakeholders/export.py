@@ -0,0 +1,156 @@
+"""
+Streaming exports of stakeholders and engagements as CSV or JSON Lines.
+
+Rows are read with ``values_list(...).iterator(chunk_size=...)`` and
+serialized a batch at a time, so an export holds one chunk of rows in memory
+however many there are. The stream can be gzipped on the fly. The same
+generators back the /export/ views (StreamingHttpResponse) and the
+export_data management command.
+"""
+import csv
+import io
+import zlib
+
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .filters import filter_engagements, filter_stakeholders
+from .models import Stakeholder, Engagement
+
+FORMATS = ('csv', 'jsonl')
+
+# Rows fetched from the database per round trip
+CHUNK_SIZE = 2000
+
+# Rows serialized into each piece of the stream
+ROWS_PER_PIECE = 500
+
+# Export column name -> ORM field path
+STAKEHOLDER_COLUMNS = {
+    'id': 'id',
+    'name': 'name',
+    'title': 'title',
+    'organization': 'organization',
+    'department': 'department',
+    'email': 'email',
+    'phone': 'phone',
+    'influence': 'influence',
+    'interest': 'interest',
+    'category': 'category',
+    'priority_score': 'priority_score',
+    'network_influence': 'network_influence',
+    'description': 'description',
+    'notes': 'notes',
+    'ai_generated_insights': 'ai_generated_insights',
+    'created_at': 'created_at',
+    'updated_at': 'updated_at',
+}
+
+ENGAGEMENT_COLUMNS = {
+    'id': 'id',
+    'stakeholder_id': 'stakeholder_id',
+    'stakeholder_name': 'stakeholder__name',
+    'stakeholder_email': 'stakeholder__email',
+    'title': 'title',
+    'type': 'type',
+    'status': 'status',
+    'scheduled_date': 'scheduled_date',
+    'duration_minutes': 'duration_minutes',
+    'description': 'description',
+    'objectives': 'objectives',
+    'outcomes': 'outcomes',
+    'action_items': 'action_items',
+    'sentiment': 'sentiment',
+    'effectiveness_rating': 'effectiveness_rating',
+    'ai_summary': 'ai_summary',
+    'created_at': 'created_at',
+    'updated_at': 'updated_at',
+}
+
+EXPORTS = {
+    'stakeholders': (Stakeholder, STAKEHOLDER_COLUMNS, filter_stakeholders),
+    'engagements': (Engagement, ENGAGEMENT_COLUMNS, filter_engagements),
+}
+
+
+def export_queryset(kind, user, params):
+    """The user's rows of ``kind`` ('stakeholders' or 'engagements') with the list filters applied, in id order"""
+    model, _columns, apply_filters = EXPORTS[kind]
+    if kind == 'stakeholders':
+        queryset = apply_filters(model.objects.for_user(user), params, ranked=False)
+    else:
+        queryset = apply_filters(model.objects.for_user(user), params)
+    return queryset.order_by('id')
+
+
+def select_columns(kind, names=None):
+    """Validated column names for ``kind``; every column when ``names`` is empty"""
+    available = EXPORTS[kind][1]
+    if not names:
+        return list(available)
+    unknown = [name for name in names if name not in available]
+    if unknown:
+        raise ValueError(f'Unknown {kind} columns: {", ".join(unknown)}')
+    return list(names)
+
+
+def _batches(rows, size=ROWS_PER_PIECE):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def csv_pieces(columns, rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    yield buffer.getvalue()
+    for batch in _batches(rows):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(batch)
+        yield buffer.getvalue()
+
+
+def jsonl_pieces(columns, rows):
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for batch in _batches(rows):
+        yield ''.join(encoder.encode(dict(zip(columns, row))) + '\n' for row in batch)
+
+
+def gzip_pieces(pieces):
+    """Compress a stream of text pieces into gzip bytes as it is produced"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for piece in pieces:
+        data = compressor.compress(piece.encode())
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_stream(queryset, kind, columns, fmt, compress=False, chunk_size=CHUNK_SIZE):
+    """The serialized export, as text pieces (bytes when ``compress``)"""
+    fields = [EXPORTS[kind][1][name] for name in columns]
+    rows = queryset.values_list(*fields).iterator(chunk_size=chunk_size)
+    pieces = csv_pieces(columns, rows) if fmt == 'csv' else jsonl_pieces(columns, rows)
+    return gzip_pieces(pieces) if compress else pieces
+
+
+async def aiterate(iterator):
+    """
+    Drive a synchronous, database-reading iterator from async code one piece
+    at a time. Under ASGI, StreamingHttpResponse would otherwise read a
+    synchronous iterator to the end before sending anything.
+    """
+    iterator = iter(iterator)
+    done = object()
+    while True:
+        piece = await sync_to_async(next, thread_sensitive=True)(iterator, done)
+        if piece is done:
+            return
+        yield piece
@@ -0,0 +1,104 @@
+"""
+The filters offered by the stakeholder and engagement lists, shared with the
+exports so an export contains exactly the rows the list shows, and the list
+orderings, shared with explain_queries so it checks the plans the views run.
+
+``params`` is a mapping of query parameters (request.GET, or a dict built by
+a management command).
+"""
+from django.db.models import Case, IntegerField, Value, When
+from django.utils import timezone
+
+from .search import search_stakeholders
+
+
+def filter_stakeholders(stakeholders, params, ranked=True):
+    """Apply the stakeholder_list filters: search, influence, category and priority=high"""
+    search_query = params.get('search', '')
+    if search_query:
+        # Ranked full-text search where available, icontains otherwise
+        stakeholders = search_stakeholders(stakeholders, search_query, ranked=ranked)
+
+    influence_filter = params.get('influence', '')
+    if influence_filter:
+        stakeholders = stakeholders.filter(influence=influence_filter)
+
+    category_filter = params.get('category', '')
+    if category_filter:
+        stakeholders = stakeholders.filter(category=category_filter)
+
+    # High priority = priority score >= 12
+    if params.get('priority', '') == 'high':
+        stakeholders = stakeholders.high_priority()
+    return stakeholders
+
+
+def filter_engagements(engagements, params):
+    """Apply the engagement_list filters: status, stakeholder, type, upcoming and overdue"""
+    status_filter = params.get('status', '')
+    if status_filter:
+        engagements = engagements.filter(status=status_filter)
+
+    stakeholder_filter = params.get('stakeholder', '')
+    if stakeholder_filter:
+        engagements = engagements.filter(stakeholder_id=stakeholder_filter)
+
+    type_filter = params.get('type', '')
+    if type_filter:
+        engagements = engagements.filter(type=type_filter)
+
+    if params.get('upcoming', '') == 'true':
+        engagements = engagements.filter(scheduled_date__gte=timezone.now(), status='planned')
+
+    if params.get('overdue', '') == 'true':
+        engagements = engagements.filter(scheduled_date__lt=timezone.now(), status='planned')
+    return engagements
+
+
+# Keyset orderings for cursor pagination of stakeholder_list, by sort option
+STAKEHOLDER_CURSOR_KEYS = {
+    '': ['-updated_at', '-id'],
+    'priority': ['-priority_score', '-updated_at', '-id'],
+    'influence': ['-network_influence', '-id'],
+    'last_contact': ['contact_order', 'id'],
+    'sentiment': ['trend_order', 'id'],
+    'name': ['name', 'id'],
+}
+
+# Keyset ordering of each engagement_list segment (see engagement_segments)
+ENGAGEMENT_CURSOR_KEYS = ['scheduled_date', 'id']
+
+
+def sort_stakeholders(stakeholders, sort_order):
+    """Apply a stakeholder_list sort option; unknown options keep the most recently updated first"""
+    if sort_order == 'priority':
+        return stakeholders.by_priority()
+    if sort_order == 'influence':
+        return stakeholders.by_network_influence()
+    if sort_order == 'last_contact':
+        return stakeholders.by_last_contact()
+    if sort_order == 'sentiment':
+        return stakeholders.by_sentiment_trend()
+    if sort_order == 'name':
+        return stakeholders.order_by('name')
+    return stakeholders
+
+
+def upcoming_first(engagements, now=None):
+    """Upcoming engagements first, then past ones, each in date order"""
+    return engagements.annotate(
+        is_future=Case(
+            When(scheduled_date__gte=now or timezone.now(), then=Value(0)),  # Future = 0 (first)
+            default=Value(1),  # Past = 1 (second)
+            output_field=IntegerField()
+        )
+    ).order_by('is_future', 'scheduled_date')
+
+
+def engagement_segments(engagements, now=None):
+    """
+    The upcoming_first ordering as cursor pagination segments (upcoming, then
+    past), so the index serves each without a computed sort column
+    """
+    now = now or timezone.now()
+    return [engagements.filter(scheduled_date__gte=now), engagements.filter(scheduled_date__lt=now)]
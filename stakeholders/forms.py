@@ -57,7 +57,9 @@ class EngagementForm(forms.ModelForm):
         
         if user:
             # Only show stakeholders created by the current user
-            self.fields['stakeholder'].queryset = Stakeholder.objects.filter(created_by=user)
+            self.fields['stakeholder'].queryset = Stakeholder.objects.for_user(user).only(
+                'id', 'name', 'organization'
+            )
 
 class StakeholderRelationshipForm(forms.ModelForm):
     class Meta:
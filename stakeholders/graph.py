@@ -0,0 +1,313 @@
+"""
+In-process graph of a user's stakeholder relationships.
+
+A RelationshipGraph is built from two queries (the user's stakeholder ids and
+their relationship rows) into compact CSR arrays: stakeholders are numbered
+0..n-1 in id order, and the outgoing edges of node ``i`` are positions
+``offsets[i]:offsets[i + 1]`` of parallel ``targets``/``types``/``strengths``
+arrays. A second CSR holds the incoming edges, so traversals can follow
+relationships in either direction without scanning every edge.
+
+Graphs are immutable. get_graph() keeps the most recently used ones per
+process and rebuilds a user's graph when their graph version (cache.py)
+changes; signals bump it when stakeholders are created or deleted and when
+relationships change, and bulk writers bump it themselves. Derived results
+(PageRank, components) are memoized on the graph, so they are computed once
+per version.
+
+PageRank runs as whole-array passes (``map``/``accumulate`` over the edge
+arrays) instead of a Python loop per edge, which keeps tenants with 100k
+relationships to well under a second.
+"""
+from array import array
+from collections import OrderedDict, deque
+from heapq import nlargest
+from itertools import accumulate, compress, islice
+from operator import add, mul, sub
+import threading
+
+from .cache import get_graph_version
+from .models import Stakeholder, StakeholderRelationship
+
+RELATIONSHIP_TYPES = [code for code, _label in StakeholderRelationship.RELATIONSHIP_TYPES]
+
+# Edge weights by relationship strength, indexed by strength code
+STRENGTHS = ['weak', 'moderate', 'strong']
+STRENGTH_WEIGHTS = [1, 2, 3]
+
+DIRECTIONS = ('out', 'in', 'both')
+
+# Graphs kept per process (least recently used are dropped first)
+GRAPH_CACHE_SIZE = 16
+
+
+def type_codes(types):
+    """Relationship type names to the codes stored on edges; None means every type"""
+    if not types:
+        return None
+    unknown = [name for name in types if name not in RELATIONSHIP_TYPES]
+    if unknown:
+        raise ValueError(f'Unknown relationship types: {", ".join(unknown)}')
+    return frozenset(RELATIONSHIP_TYPES.index(name) for name in types)
+
+
+class Adjacency:
+    """The edges of one direction of a graph, grouped by source node (CSR)"""
+
+    __slots__ = ('offsets', 'targets', 'types', 'strengths')
+
+    def __init__(self, node_count, sources, targets, types, strengths):
+        counts = [0] * (node_count + 1)
+        for source in sources:
+            counts[source + 1] += 1
+        self.offsets = array('l', accumulate(counts))
+
+        # Counting sort: place each edge in its source's slot
+        edge_count = len(sources)
+        self.targets = array('l', bytes(edge_count * array('l').itemsize))
+        self.types = array('b', bytes(edge_count))
+        self.strengths = array('b', bytes(edge_count))
+        position = list(self.offsets)
+        for edge, source in enumerate(sources):
+            slot = position[source]
+            position[source] = slot + 1
+            self.targets[slot] = targets[edge]
+            self.types[slot] = types[edge]
+            self.strengths[slot] = strengths[edge]
+
+    def neighbors(self, node, codes=None):
+        start, end = self.offsets[node], self.offsets[node + 1]
+        if codes is None:
+            return self.targets[start:end]
+        return compress(self.targets[start:end], (code in codes for code in self.types[start:end]))
+
+
+class RelationshipGraph:
+    def __init__(self, ids, edges):
+        """``ids`` are stakeholder ids in ascending order; ``edges`` are (from_id, to_id, type, strength) rows"""
+        self.ids = array('q', ids)
+        self.index = {pk: node for node, pk in enumerate(self.ids)}
+
+        sources, targets = array('l'), array('l')
+        types, strengths = array('b'), array('b')
+        for from_id, to_id, relationship_type, strength in edges:
+            source, target = self.index.get(from_id), self.index.get(to_id)
+            if source is None or target is None or relationship_type not in RELATIONSHIP_TYPES:
+                continue
+            sources.append(source)
+            targets.append(target)
+            types.append(RELATIONSHIP_TYPES.index(relationship_type))
+            strengths.append(STRENGTHS.index(strength) if strength in STRENGTHS else 1)
+
+        self.outgoing = Adjacency(len(self.ids), sources, targets, types, strengths)
+        self.incoming = Adjacency(len(self.ids), targets, sources, types, strengths)
+        self._memo = {}
+
+    @classmethod
+    def build(cls, user_id):
+        ids = Stakeholder.objects.filter(created_by_id=user_id).order_by('id').values_list('id', flat=True)
+        edges = StakeholderRelationship.objects.filter(created_by_id=user_id).values_list(
+            'from_stakeholder_id', 'to_stakeholder_id', 'relationship_type', 'strength'
+        )
+        return cls(list(ids), edges.iterator(chunk_size=5000))
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def edge_count(self):
+        return len(self.outgoing.targets)
+
+    def node(self, stakeholder_id):
+        """Node number of a stakeholder; KeyError if it isn't in this graph"""
+        return self.index[stakeholder_id]
+
+    def type_counts(self):
+        counts = [0] * len(RELATIONSHIP_TYPES)
+        for code in self.outgoing.types:
+            counts[code] += 1
+        return {name: counts[code] for code, name in enumerate(RELATIONSHIP_TYPES) if counts[code]}
+
+    def _neighbors(self, node, direction, codes):
+        if direction != 'in':
+            yield from self.outgoing.neighbors(node, codes)
+        if direction != 'out':
+            yield from self.incoming.neighbors(node, codes)
+
+    def reach(self, stakeholder_id, max_depth=None, direction='out', types=None):
+        """
+        Stakeholders reachable from ``stakeholder_id`` within ``max_depth``
+        hops, as (stakeholder_id, distance) pairs in breadth-first order.
+        ``direction='in'`` follows relationships backwards: who can reach it.
+        """
+        codes = type_codes(types)
+        start = self.node(stakeholder_id)
+        distance = {start: 0}
+        queue = deque([start])
+        found = []
+        while queue:
+            node = queue.popleft()
+            depth = distance[node]
+            if max_depth is not None and depth >= max_depth:
+                continue
+            for neighbor in self._neighbors(node, direction, codes):
+                if neighbor not in distance:
+                    distance[neighbor] = depth + 1
+                    found.append((self.ids[neighbor], depth + 1))
+                    queue.append(neighbor)
+        return found
+
+    def shortest_path(self, source_id, target_id, direction='both', types=None):
+        """Stakeholder ids on a shortest path from source to target (both included), or None"""
+        codes = type_codes(types)
+        source, target = self.node(source_id), self.node(target_id)
+        parent = {source: None}
+        queue = deque([source])
+        while queue and target not in parent:
+            node = queue.popleft()
+            for neighbor in self._neighbors(node, direction, codes):
+                if neighbor not in parent:
+                    parent[neighbor] = node
+                    queue.append(neighbor)
+        if target not in parent:
+            return None
+        path = []
+        node = target
+        while node is not None:
+            path.append(self.ids[node])
+            node = parent[node]
+        return path[::-1]
+
+    def degree(self, direction='both', types=None):
+        """Relationship count per node, in node order"""
+        codes = type_codes(types)
+        degrees = [0] * len(self.ids)
+        for adjacency, wanted in ((self.outgoing, direction != 'in'), (self.incoming, direction != 'out')):
+            if not wanted:
+                continue
+            spans = zip(adjacency.offsets, islice(adjacency.offsets, 1, None))
+            if codes is None:
+                counts = (end - start for start, end in spans)
+            else:
+                counts = (
+                    sum(1 for code in adjacency.types[start:end] if code in codes)
+                    for start, end in spans
+                )
+            degrees = list(map(add, degrees, counts))
+        return degrees
+
+    def degree_centrality(self, direction='both', types=None):
+        """Degree divided by the number of other stakeholders (0-1, or up to 2 for 'both')"""
+        scale = 1 / (len(self.ids) - 1) if len(self.ids) > 1 else 0.0
+        return [degree * scale for degree in self.degree(direction, types)]
+
+    def pagerank(self, types=None, damping=0.85, weighted=True, tolerance=1e-6, max_iterations=100):
+        """
+        PageRank over relationship direction (a stakeholder others report to,
+        depend on or support ranks highly), with edges weighted by strength
+        unless ``weighted`` is false. Scores are in node order and sum to 1.
+        """
+        key = ('pagerank', type_codes(types), damping, weighted, tolerance, max_iterations)
+        if key in self._memo:
+            return self._memo[key]
+
+        codes = key[1]
+        node_count = len(self.ids)
+        if not node_count:
+            return []
+        incoming = self.incoming
+        sources = incoming.targets
+        if weighted:
+            weights = list(map(STRENGTH_WEIGHTS.__getitem__, incoming.strengths))
+        else:
+            weights = [1] * len(sources)
+        if codes is not None:
+            weights = list(map(mul, weights, (code in codes for code in incoming.types)))
+
+        # Each edge passes on its share of the source's rank
+        out_weight = [0] * node_count
+        for source, weight in zip(sources, weights):
+            out_weight[source] += weight
+        shares = [weight / out_weight[source] if weight else 0.0 for source, weight in zip(sources, weights)]
+        dangling = [node for node in range(node_count) if not out_weight[node]]
+        spans = list(zip(incoming.offsets, islice(incoming.offsets, 1, None)))
+
+        rank = [1 / node_count] * node_count
+        for _ in range(max_iterations):
+            # Prefix sums of every edge's contribution; a node's inflow is its span's difference
+            inflow = list(accumulate(map(mul, map(rank.__getitem__, sources), shares), initial=0.0))
+            # Stakeholders with no outgoing relationships spread their rank evenly
+            base = (1 - damping + damping * sum(map(rank.__getitem__, dangling))) / node_count
+            updated = [base + damping * (inflow[end] - inflow[start]) for start, end in spans]
+            change = sum(map(abs, map(sub, updated, rank)))
+            rank = updated
+            if change < tolerance * node_count:
+                break
+
+        self._memo[key] = rank
+        return rank
+
+    def components(self, types=None):
+        """
+        Groups of stakeholders connected by relationships in either
+        direction, as lists of stakeholder ids, largest first. Stakeholders
+        with no matching relationships form groups of one.
+        """
+        key = ('components', type_codes(types))
+        if key in self._memo:
+            return self._memo[key]
+
+        codes = key[1]
+        seen = bytearray(len(self.ids))
+        groups = []
+        for start in range(len(self.ids)):
+            if seen[start]:
+                continue
+            seen[start] = 1
+            group = [start]
+            queue = deque(group)
+            while queue:
+                node = queue.popleft()
+                for neighbor in self._neighbors(node, 'both', codes):
+                    if not seen[neighbor]:
+                        seen[neighbor] = 1
+                        group.append(neighbor)
+                        queue.append(neighbor)
+            groups.append(sorted(self.ids[node] for node in group))
+        groups.sort(key=len, reverse=True)
+
+        self._memo[key] = groups
+        return groups
+
+    def top(self, scores, limit):
+        """The ``limit`` highest (stakeholder_id, score) pairs of a per-node score list"""
+        best = nlargest(limit, range(len(scores)), key=scores.__getitem__)
+        return [(self.ids[node], scores[node]) for node in best]
+
+
+_graphs = OrderedDict()
+_graphs_lock = threading.Lock()
+
+
+def get_graph(user_id):
+    """The user's relationship graph, rebuilt only when their graph version has changed"""
+    version = get_graph_version(user_id)
+    with _graphs_lock:
+        cached = _graphs.get(user_id)
+        if cached is not None and cached[0] == version:
+            _graphs.move_to_end(user_id)
+            return cached[1]
+
+    # Built outside the lock; a version bump during the build just means a rebuild next time
+    graph = RelationshipGraph.build(user_id)
+    with _graphs_lock:
+        _graphs[user_id] = (version, graph)
+        _graphs.move_to_end(user_id)
+        while len(_graphs) > GRAPH_CACHE_SIZE:
+            _graphs.popitem(last=False)
+    return graph
+
+
+def clear_graph_cache():
+    with _graphs_lock:
+        _graphs.clear()
@@ -0,0 +1,409 @@
+"""
+Bulk import of stakeholders and engagements from CSV or JSON Lines, the
+formats export.py writes (an export can be edited and imported back).
+
+Files are read a row at a time and handled in batches: each row is checked
+with the fields of StakeholderForm/EngagementForm plus the model's
+validators (the same rules as the edit forms), then the batch's valid rows
+are written with one ``bulk_create(update_conflicts=True)`` in their own
+transaction. A row updates an existing stakeholder when its ``id`` is one of
+the user's stakeholders, or else when its email (or, without an email, its
+name) matches one; other rows are added. Engagements name their stakeholder
+by ``stakeholder_id``, ``stakeholder_email`` or ``stakeholder_name`` (or
+``stakeholder``, an email or a name) and update an existing engagement with
+the same ``id``, or the same stakeholder, title and scheduled date.
+
+A row that updates an existing record only changes the columns the file
+has: the others keep their stored values (read back in one query per
+batch), so a file of just names and phone numbers updates phone numbers.
+Rows that add records get the form's initial values for missing columns.
+
+Matching uses in-memory indexes of the user's existing rows, loaded once per
+import, so there are no per-row queries. Invalid rows are skipped and
+reported with their row number (1 for the first row after any header).
+
+bulk_create doesn't send post_save, so the user's dashboard and relationship
+graph caches are bumped here after the import, and the engagement stats of
+the stakeholders a batch touched are recomputed after it. Imported and
+updated stakeholders are marked for a network influence refresh.
+"""
+import csv
+import gzip
+import io
+import json
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from .cache import bump_dashboard_version, bump_graph_version
+from .forms import EngagementForm, StakeholderForm
+from .models import Stakeholder, Engagement
+from .stats import refresh_engagement_stats
+
+FORMATS = ('csv', 'jsonl')
+
+# Rows validated and written per transaction
+BATCH_SIZE = 1000
+
+# Errors kept in an import's result; the rest are only counted
+MAX_REPORTED_ERRORS = 1000
+
+
+def read_rows(stream, fmt):
+    """
+    (row_number, fields, error) for each record of a binary file object.
+    ``fields`` is a dict of column values, or None when the record couldn't
+    be parsed and ``error`` says why. Gzipped files are detected and
+    decompressed on the fly.
+    """
+    stream = io.BufferedReader(stream) if not hasattr(stream, 'peek') else stream
+    if stream.peek(2)[:2] == b'\x1f\x8b':
+        stream = gzip.GzipFile(fileobj=stream)
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='' if fmt == 'csv' else None)
+
+    if fmt == 'csv':
+        for number, row in enumerate(csv.DictReader(text), start=1):
+            if None in row:
+                yield number, None, 'More values than columns'
+            else:
+                yield number, row, None
+        return
+
+    number = 0
+    for line in text:
+        if not line.strip():
+            continue
+        number += 1
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield number, None, f'Invalid JSON: {e}'
+            continue
+        if isinstance(row, dict):
+            yield number, row, None
+        else:
+            yield number, None, 'Each line must be a JSON object'
+
+
+class RowValidator:
+    """
+    Cleans import rows with a form's fields and the model's validators. The
+    form is built once and its fields reused for every row, which is much
+    cheaper than a bound form per row.
+    """
+
+    def __init__(self, form_class, exclude=()):
+        self.fields = {name: field for name, field in form_class().fields.items() if name not in exclude}
+        model = form_class._meta.model
+        self.validators = {name: model._meta.get_field(name).run_validators for name in self.fields}
+
+    def clean(self, row):
+        """(cleaned_data, errors); errors maps field names to lists of messages"""
+        cleaned, errors = {}, {}
+        for name, field in self.fields.items():
+            # A missing column gets the value the form would start with
+            value = row[name] if name in row else field.initial
+            if value is None:
+                value = ''
+            try:
+                value = field.clean(value)
+                if value not in field.empty_values:
+                    self.validators[name](value)
+            except ValidationError as e:
+                errors[name] = e.messages
+            else:
+                cleaned[name] = value
+        return cleaned, errors
+
+    def missing(self, row):
+        """The fields the row has no column for"""
+        return [name for name in self.fields if name not in row]
+
+
+class StakeholderIndex:
+    """The user's stakeholder ids, and ids by email and by name (lowercased)"""
+
+    AMBIGUOUS = object()
+
+    def __init__(self, user):
+        self.ids = set()
+        self.by_email = {}
+        self.by_name = {}
+        rows = Stakeholder.objects.filter(created_by=user).values_list('id', 'email', 'name')
+        for pk, email, name in rows.iterator(chunk_size=5000):
+            self.add(pk, email, name)
+
+    def add(self, pk, email, name):
+        self.ids.add(pk)
+        if email:
+            self.by_email[email.lower()] = pk
+        name = name.strip().lower()
+        if self.by_name.get(name, pk) != pk:
+            pk = self.AMBIGUOUS
+        self.by_name[name] = pk
+
+    def find(self, pk=None, email='', name=''):
+        """
+        The id of the stakeholder a reference points at: ``pk`` if it is the
+        user's, else the one with ``email``, else the one named ``name``.
+        None when nothing matches; ValueError for an unknown id or a name
+        several stakeholders share.
+        """
+        if pk:
+            try:
+                pk = int(pk)
+            except (TypeError, ValueError):
+                raise ValueError(f'{pk!r} is not a stakeholder id')
+            if pk not in self.ids:
+                raise ValueError(f'No stakeholder has id {pk}')
+            return pk
+        if email:
+            return self.by_email.get(email.strip().lower())
+        if name:
+            found = self.by_name.get(name.strip().lower())
+            if found is self.AMBIGUOUS:
+                raise ValueError(f'Several stakeholders are named {name!r}; give their email or id')
+            return found
+        return None
+
+
+class Importer:
+    """Validation, matching and writing for one kind of row; see StakeholderImporter and EngagementImporter"""
+
+    model = None
+    form_class = None
+    exclude = ()
+
+    def __init__(self, user):
+        self.user = user
+        self.validator = RowValidator(self.form_class, self.exclude)
+        self.update_fields = list(self.validator.fields) + ['updated_at']
+
+    def build(self, row):
+        """
+        (instance, keys) for a valid row, ``keys`` being what later rows can
+        match it by; raises ValidationError with a dict of messages
+        """
+        raise NotImplementedError
+
+    def written(self, instances):
+        """Record the rows just written in the indexes"""
+        raise NotImplementedError
+
+    def partial(self, cleaned, errors, missing):
+        """
+        For a row matching an existing record: the cleaned data without the
+        columns the row leaves out, which keep their stored values, and with
+        their errors (e.g. a required column) dropped
+        """
+        for name in missing:
+            cleaned.pop(name, None)
+            errors.pop(name, None)
+        return cleaned
+
+    def fill_missing(self, instances):
+        """Give updated rows the stored values of the columns their file left out"""
+        partial = [instance for instance in instances if instance._import_missing]
+        if not partial:
+            return
+        names = set().union(*(instance._import_missing for instance in partial))
+        stored = self.model.objects.only(*names).in_bulk([instance.pk for instance in partial])
+        for instance in partial:
+            current = stored.get(instance.pk)
+            if current is not None:
+                for name in instance._import_missing:
+                    setattr(instance, name, getattr(current, name))
+
+    def write(self, instances):
+        with transaction.atomic():
+            self.fill_missing(instances)
+            self.model.objects.bulk_create(
+                instances,
+                update_conflicts=True,
+                unique_fields=['id'],
+                update_fields=self.update_fields,
+            )
+        self.written(instances)
+
+
+class StakeholderImporter(Importer):
+    model = Stakeholder
+    form_class = StakeholderForm
+
+    def __init__(self, user):
+        super().__init__(user)
+        self.index = StakeholderIndex(user)
+        self.update_fields += ['priority_score', 'network_influence_stale']
+
+    def build(self, row):
+        cleaned, errors = self.validator.clean(row)
+        email = cleaned.get('email', '')
+        try:
+            if row.get('id'):
+                pk = self.index.find(pk=row['id'])
+            else:
+                pk = self.index.find(email=email, name='' if email else cleaned.get('name', ''))
+        except ValueError as e:
+            errors['id' if row.get('id') else 'name'] = [str(e)]
+            pk = None
+        missing = self.validator.missing(row) if pk is not None else []
+        cleaned = self.partial(cleaned, errors, missing)
+        if errors:
+            raise ValidationError(errors)
+
+        keys = [('id', pk)] if pk is not None else []
+        if 'name' in cleaned:
+            keys.append(('name', cleaned['name'].strip().lower()))
+        if cleaned.get('email'):
+            keys.append(('email', cleaned['email'].lower()))
+        stakeholder = Stakeholder(pk=pk, created_by=self.user, network_influence_stale=True, **cleaned)
+        stakeholder._import_missing = missing
+        return stakeholder, keys
+
+    def written(self, instances):
+        for stakeholder in instances:
+            self.index.add(stakeholder.pk, stakeholder.email, stakeholder.name)
+
+
+class EngagementImporter(Importer):
+    model = Engagement
+    form_class = EngagementForm
+    exclude = ('stakeholder',)
+
+    STAKEHOLDER_COLUMNS = ('stakeholder_id', 'stakeholder_email', 'stakeholder_name', 'stakeholder')
+
+    def __init__(self, user):
+        super().__init__(user)
+        self.update_fields.append('stakeholder')
+        self.stakeholders = StakeholderIndex(user)
+        # Engagement id -> stakeholder id, and id by (stakeholder, title, date)
+        self.stakeholder_of = {}
+        self.by_key = {}
+        rows = Engagement.objects.filter(created_by=user).values_list('id', 'stakeholder_id', 'title', 'scheduled_date')
+        for pk, stakeholder_id, title, scheduled_date in rows.iterator(chunk_size=5000):
+            self.stakeholder_of[pk] = stakeholder_id
+            self.by_key[(stakeholder_id, title, scheduled_date)] = pk
+
+    def resolve_stakeholder(self, row):
+        reference = str(row.get('stakeholder') or '').strip()
+        email = row.get('stakeholder_email') or (reference if '@' in reference else '')
+        name = row.get('stakeholder_name') or ('' if '@' in reference else reference)
+        try:
+            stakeholder_id = self.stakeholders.find(pk=row.get('stakeholder_id'), email=email or '', name=name or '')
+        except ValueError as e:
+            raise ValidationError({'stakeholder': [str(e)]})
+        if stakeholder_id is None:
+            if not (email or name):
+                raise ValidationError({'stakeholder': ['Give stakeholder_id, stakeholder_email or stakeholder_name']})
+            raise ValidationError({'stakeholder': [f'No stakeholder matches {email or name!r}']})
+        return stakeholder_id
+
+    def build(self, row):
+        cleaned, errors = self.validator.clean(row)
+        pk = row.get('id')
+        if pk:
+            try:
+                pk = int(pk)
+            except (TypeError, ValueError):
+                pk = None
+            if pk not in self.stakeholder_of:
+                raise ValidationError({'id': [f'No engagement has id {row["id"]}']})
+
+        if pk is not None and not any(row.get(column) for column in self.STAKEHOLDER_COLUMNS):
+            # Updated by id without naming a stakeholder: it stays with its own
+            stakeholder_id = self.stakeholder_of[pk]
+        else:
+            try:
+                stakeholder_id = self.resolve_stakeholder(row)
+            except ValidationError as e:
+                errors.update(e.message_dict)
+                stakeholder_id = None
+
+        key = (stakeholder_id, cleaned.get('title'), cleaned.get('scheduled_date'))
+        if pk is None and stakeholder_id is not None:
+            pk = self.by_key.get(key)
+        missing = self.validator.missing(row) if pk is not None else []
+        cleaned = self.partial(cleaned, errors, missing)
+        if errors:
+            raise ValidationError(errors)
+
+        keys = [('id', pk)] if pk is not None else []
+        if 'title' in cleaned and 'scheduled_date' in cleaned:
+            keys.append(key)
+        engagement = Engagement(pk=pk, stakeholder_id=stakeholder_id, created_by=self.user, **cleaned)
+        engagement._import_missing = missing
+        return engagement, keys
+
+    def written(self, instances):
+        # Engagements moved to another stakeholder change the stats of both
+        touched = set()
+        for engagement in instances:
+            touched.add(self.stakeholder_of.get(engagement.pk))
+            touched.add(engagement.stakeholder_id)
+            self.stakeholder_of[engagement.pk] = engagement.stakeholder_id
+            self.by_key[(engagement.stakeholder_id, engagement.title, engagement.scheduled_date)] = engagement.pk
+        refresh_engagement_stats(touched)
+
+
+IMPORTERS = {
+    'stakeholders': StakeholderImporter,
+    'engagements': EngagementImporter,
+}
+
+
+def import_rows(user, kind, rows, batch_size=BATCH_SIZE, on_error=None, progress=None):
+    """
+    Validate and upsert ``rows`` (as produced by read_rows) as the user's
+    ``kind`` ('stakeholders' or 'engagements').
+
+    ``on_error(row_number, errors)`` is called for each rejected row; by
+    default the first MAX_REPORTED_ERRORS are kept in the result.
+    ``progress(rows_done)`` is called after each batch. Returns
+    ``{'created', 'updated', 'failed', 'errors'}``.
+    """
+    importer = IMPORTERS[kind](user)
+    result = {'created': 0, 'updated': 0, 'failed': 0, 'errors': []}
+    if on_error is None:
+        def on_error(number, errors):
+            if len(result['errors']) < MAX_REPORTED_ERRORS:
+                result['errors'].append({'row': number, 'errors': errors})
+
+    batch, keys = [], set()
+    done = 0
+
+    def flush():
+        importer.write(batch)
+        batch.clear()
+        keys.clear()
+
+    for number, row, error in rows:
+        done += 1
+        if error:
+            result['failed'] += 1
+            on_error(number, {'__all__': [error]})
+            continue
+        try:
+            instance, row_keys = importer.build(row)
+        except ValidationError as e:
+            result['failed'] += 1
+            on_error(number, e.message_dict)
+            continue
+        if keys.intersection(row_keys):
+            # The row may be for a stakeholder or engagement added earlier in this
+            # batch, so write the batch first and match the row again
+            flush()
+            instance, row_keys = importer.build(row)
+        keys.update(row_keys)
+        result['created' if instance.pk is None else 'updated'] += 1
+        batch.append(instance)
+        if len(batch) >= batch_size:
+            flush()
+            if progress:
+                progress(done)
+    if batch:
+        flush()
+
+    if result['created'] or result['updated']:
+        bump_dashboard_version(user.pk)
+        bump_graph_version(user.pk)
+    return result
@@ -1,7 +1,8 @@
 from django.core.management.base import BaseCommand
 from django.contrib.auth.models import User
 
-from stakeholders.models import Stakeholder, Engagement, StakeholderRelationship, DemoSession
+from stakeholders.models import DemoSession
+from stakeholders.purge import CHUNK_SIZE, purge_user_data
 
 
 class Command(BaseCommand):
@@ -18,6 +19,12 @@ class Command(BaseCommand):
             action='store_true',
             help='Confirm deletion without prompting'
         )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=CHUNK_SIZE,
+            help=f'Rows deleted per transaction (default: {CHUNK_SIZE})'
+        )
 
     def handle(self, *args, **options):
         username = options.get('user')
@@ -58,35 +65,17 @@ class Command(BaseCommand):
         }
 
         for user in users:
-            # Count before deletion
-            stakeholder_count = Stakeholder.objects.filter(created_by=user).count()
-            engagement_count = Engagement.objects.filter(created_by=user).count()
-            relationship_count = StakeholderRelationship.objects.filter(created_by=user).count()
-            
-            # Delete data
-            Stakeholder.objects.filter(created_by=user).delete()
-            Engagement.objects.filter(created_by=user).delete()
-            StakeholderRelationship.objects.filter(created_by=user).delete()
-            
-            # Update demo session
-            try:
-                demo_session = user.demo_session
-                demo_session.is_demo_mode = False
-                demo_session.save()
-                total_deleted['demo_sessions'] += 1
-            except DemoSession.DoesNotExist:
-                pass
+            cleared = purge_user_data(user.pk, chunk_size=options['chunk_size'])
+            total_deleted['demo_sessions'] += DemoSession.objects.filter(user=user).update(is_demo_mode=False)
 
-            # Update totals
-            total_deleted['stakeholders'] += stakeholder_count
-            total_deleted['engagements'] += engagement_count
-            total_deleted['relationships'] += relationship_count
+            for key, count in cleared.items():
+                total_deleted[key] += count
 
             self.stdout.write(
                 f'Cleared data for user {user.username}: '
-                f'{stakeholder_count} stakeholders, '
-                f'{engagement_count} engagements, '
-                f'{relationship_count} relationships'
+                f'{cleared["stakeholders"]} stakeholders, '
+                f'{cleared["engagements"]} engagements, '
+                f'{cleared["relationships"]} relationships'
             )
 
         self.stdout.write(
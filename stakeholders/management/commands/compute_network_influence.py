@@ -0,0 +1,117 @@
+import random
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from stakeholders import influence
+from stakeholders.graph import RELATIONSHIP_TYPES, STRENGTHS, RelationshipGraph
+from stakeholders.influence import influence_edges, propagate, refresh_network_influence
+from stakeholders.models import LEVEL_SCORES
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute stored network influence scores (only stale networks unless --full), '
+        'or time the propagation on a synthetic graph with --benchmark'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            type=str,
+            help='Username to recompute (default: every user with stakeholders)'
+        )
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Recompute every score, not just the stale ones'
+        )
+        parser.add_argument(
+            '--benchmark',
+            type=int,
+            metavar='NODES',
+            help='Instead, time both engines on a synthetic graph with this many stakeholders (e.g. 50000)'
+        )
+        parser.add_argument(
+            '--edges',
+            type=float,
+            default=3,
+            help='Average relationships per stakeholder in the synthetic graph (default: 3)'
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Random seed for the synthetic graph (default: 0)'
+        )
+
+    def handle(self, *args, **options):
+        if options['benchmark']:
+            self.benchmark(options['benchmark'], options['edges'], options['seed'])
+            return
+
+        if options['user']:
+            try:
+                users = [User.objects.get(username=options['user'])]
+            except User.DoesNotExist:
+                raise CommandError(f"User {options['user']} does not exist")
+        else:
+            users = User.objects.filter(stakeholders__isnull=False).distinct()
+
+        total = 0
+        for user in users:
+            started = time.perf_counter()
+            updated = refresh_network_influence(user.pk, full=options['full'])
+            total += updated
+            self.stdout.write(
+                f'{user.username}: {updated} scores updated in {time.perf_counter() - started:.2f}s'
+            )
+        self.stdout.write(self.style.SUCCESS(f'Updated {total} network influence scores'))
+
+    def benchmark(self, size, edges_per_node, seed):
+        rng = random.Random(seed)
+        levels = list(LEVEL_SCORES)
+        # Relationship targets are skewed towards low ids, so a few stakeholders become hubs
+        edges = [
+            (
+                rng.randrange(size),
+                int(size * rng.random() ** 2),
+                rng.choice(RELATIONSHIP_TYPES),
+                rng.choice(STRENGTHS),
+            )
+            for _ in range(int(size * edges_per_node))
+        ]
+
+        started = time.perf_counter()
+        graph = RelationshipGraph(range(size), edges)
+        sources, targets, weights = influence_edges(graph)
+        base = [LEVEL_SCORES[rng.choice(levels)] for _ in range(size)]
+        self.stdout.write(
+            f'Graph: {size} stakeholders, {graph.edge_count} relationships, '
+            f'{len(sources)} influence edges, built in {time.perf_counter() - started:.3f}s'
+        )
+
+        engines = [('python', False)]
+        if influence.numpy is not None:
+            engines.insert(0, ('numpy', True))
+        else:
+            self.stdout.write(self.style.WARNING('NumPy is not installed; timing the pure Python engine only'))
+
+        results = {}
+        for name, use_numpy in engines:
+            started = time.perf_counter()
+            results[name] = propagate(base, sources, targets, weights, use_numpy=use_numpy)
+            cold = time.perf_counter() - started
+
+            # A warm start from the converged scores is what an incremental refresh sees
+            changed = list(weights)
+            changed[0] += 1
+            started = time.perf_counter()
+            propagate(base, sources, targets, changed, initial=results[name], use_numpy=use_numpy)
+            warm = time.perf_counter() - started
+            self.stdout.write(f'  {name}: {cold * 1000:.1f} ms from scratch, {warm * 1000:.1f} ms warm-started')
+
+        if len(results) == 2:
+            difference = max(abs(a - b) for a, b in zip(results['numpy'], results['python']))
+            self.stdout.write(f'  largest difference between engines: {difference:.2e}')
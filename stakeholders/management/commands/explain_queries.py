@@ -0,0 +1,216 @@
+from datetime import timedelta
+import random
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from stakeholders.cache import bump_dashboard_version, bump_graph_version
+from stakeholders.filters import (
+    ENGAGEMENT_CURSOR_KEYS, STAKEHOLDER_CURSOR_KEYS, engagement_segments, filter_engagements,
+    filter_stakeholders, sort_stakeholders, upcoming_first,
+)
+from stakeholders.models import Stakeholder, Engagement, StakeholderRelationship
+from stakeholders.pagination import CursorPaginator
+from stakeholders.search import search_stakeholders
+from stakeholders.stats import refresh_engagement_stats
+from stakeholders.views import (
+    API_STAKEHOLDER_DEFAULT_FIELDS, API_STAKEHOLDER_SEARCH_LIMIT, ENGAGEMENT_PAGE_SIZE,
+    STAKEHOLDER_PAGE_SIZE, STAKEHOLDER_SORT_CHOICES,
+)
+
+
+class Command(BaseCommand):
+    help = 'Show the database query plan for each view queryset to confirm indexes are used'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            type=str,
+            default='explain_benchmark',
+            help='Username whose querysets are explained (default: explain_benchmark)'
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Insert this many synthetic stakeholders and engagements for the user first (e.g. 100000)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Rows per bulk insert when seeding (default: 5000)'
+        )
+
+    def handle(self, *args, **options):
+        username = options['user']
+        seed = options['seed']
+
+        if seed:
+            user, _ = User.objects.get_or_create(username=username)
+            self.seed_data(user, seed, options['batch_size'])
+        else:
+            try:
+                user = User.objects.get(username=username)
+            except User.DoesNotExist:
+                self.stdout.write(
+                    self.style.ERROR(f'User {username} does not exist (use --seed to create it)')
+                )
+                return
+
+        # Refresh planner statistics so the plans reflect the seeded volumes
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+        full_scans = 0
+        for label, queryset in self.view_querysets(user):
+            plan = queryset.explain()
+            self.stdout.write(self.style.MIGRATE_HEADING(label))
+            self.stdout.write(plan)
+            self.stdout.write('')
+            if self.is_full_scan(plan):
+                full_scans += 1
+                self.stdout.write(self.style.WARNING(f'  ^ {label} scans a table without an index'))
+
+        if full_scans:
+            self.stdout.write(self.style.WARNING(f'{full_scans} queryset(s) use a full table scan'))
+        else:
+            self.stdout.write(self.style.SUCCESS('All view querysets are served by an index'))
+
+    @staticmethod
+    def is_full_scan(plan):
+        """True when a plan line scans a table without an index (SQLite or PostgreSQL)"""
+        for line in plan.splitlines():
+            if 'Seq Scan' in line:
+                return True
+            words = line.split()
+            if 'SCAN' not in words:
+                continue
+            rest = words[words.index('SCAN'):]
+            # A virtual table scan with an index (the full-text MATCH) is served by that index
+            if 'USING' not in rest and 'VIRTUAL' not in rest:
+                return True
+        return False
+
+    def view_querysets(self, user):
+        """
+        The querysets issued by stakeholders.views, built with the same filters,
+        orderings and paginators the views use
+        """
+        now = timezone.now()
+        stakeholders = Stakeholder.objects.for_user(user)
+        engagements = Engagement.objects.for_user(user)
+        stakeholder_list = stakeholders.for_list().with_engagement_stats()
+        engagement_list = engagements.for_list()
+        stakeholder = stakeholders.first()
+
+        querysets = [
+            ('dashboard: stakeholder aggregates', stakeholders),
+            ('dashboard: engagement aggregates', engagements),
+            ('dashboard: recent stakeholders', stakeholders.for_list()[:5]),
+            ('dashboard: upcoming engagements',
+             filter_engagements(engagement_list, {'upcoming': 'true'})[:5]),
+        ]
+        for sort_order, label in STAKEHOLDER_SORT_CHOICES:
+            querysets.append((
+                f'stakeholder_list: {label.lower()} sort',
+                sort_stakeholders(stakeholder_list, sort_order)[:STAKEHOLDER_PAGE_SIZE]
+            ))
+        for params in ({'influence': 'high'}, {'category': 'customer'}, {'priority': 'high'}):
+            name, value = next(iter(params.items()))
+            querysets.append((
+                f'stakeholder_list: {name}={value}',
+                filter_stakeholders(stakeholder_list, params)[:STAKEHOLDER_PAGE_SIZE]
+            ))
+        for sort_order, label in STAKEHOLDER_SORT_CHOICES:
+            paginator = CursorPaginator(
+                [sort_stakeholders(stakeholder_list, sort_order)],
+                STAKEHOLDER_CURSOR_KEYS[sort_order],
+                STAKEHOLDER_PAGE_SIZE,
+            )
+            querysets += self.cursor_querysets(f'stakeholder_list (cursor, {label.lower()} sort)', paginator)
+
+        querysets.append((
+            'engagement_list', upcoming_first(engagement_list, now)[:ENGAGEMENT_PAGE_SIZE]
+        ))
+        for params in ({'status': 'completed'}, {'type': 'meeting'}, {'overdue': 'true'}):
+            name, value = next(iter(params.items()))
+            querysets.append((
+                f'engagement_list: {name}={value}',
+                upcoming_first(filter_engagements(engagement_list, params), now)[:ENGAGEMENT_PAGE_SIZE]
+            ))
+        paginator = CursorPaginator(
+            engagement_segments(engagement_list, now), ENGAGEMENT_CURSOR_KEYS, ENGAGEMENT_PAGE_SIZE
+        )
+        querysets += self.cursor_querysets('engagement_list (cursor)', paginator)
+
+        fields = API_STAKEHOLDER_DEFAULT_FIELDS
+        querysets.append(('api_stakeholders', stakeholders.order_by('name', 'id').values(*fields)))
+        if stakeholder:
+            querysets += [
+                ('api_stakeholders: search', search_stakeholders(stakeholders, stakeholder.name).values(*fields)
+                 [:API_STAKEHOLDER_SEARCH_LIMIT + 1]),
+                ('stakeholder_list: search',
+                 filter_stakeholders(stakeholder_list, {'search': stakeholder.name})[:STAKEHOLDER_PAGE_SIZE]),
+                ('stakeholder_detail: engagements', upcoming_first(stakeholder.engagements.all(), now)[:10]),
+                ('stakeholder_detail: relationships', StakeholderRelationship.objects.involving(stakeholder)),
+                ('engagement_list: stakeholder filter', upcoming_first(
+                    filter_engagements(engagement_list, {'stakeholder': stakeholder.pk}), now
+                )[:ENGAGEMENT_PAGE_SIZE]),
+            ]
+        return querysets
+
+    @staticmethod
+    def cursor_querysets(label, paginator):
+        """The first page of each segment, and the next page after a cursor taken from the first row"""
+        querysets = []
+        for segment in range(len(paginator.segments)):
+            first_page = paginator.segment_queryset(segment)
+            querysets.append((f'{label}: segment {segment}', first_page[:paginator.per_page + 1]))
+            row = first_page.first()
+            if row is not None:
+                after = paginator.segment_queryset(segment, paginator.key_values(row))
+                querysets.append((f'{label}: segment {segment}, next page', after[:paginator.per_page + 1]))
+        return querysets
+
+    def seed_data(self, user, count, batch_size):
+        """Bulk insert synthetic stakeholders with one engagement each"""
+        self.stdout.write(f'Seeding {count} stakeholders and engagements for {user.username}...')
+        rng = random.Random(42)
+        levels = [choice[0] for choice in Stakeholder.INFLUENCE_CHOICES]
+        categories = [choice[0] for choice in Stakeholder.CATEGORY_CHOICES]
+        statuses = [choice[0] for choice in Engagement.STATUS_CHOICES]
+        types = [choice[0] for choice in Engagement.TYPE_CHOICES]
+        now = timezone.now()
+
+        for start in range(0, count, batch_size):
+            size = min(batch_size, count - start)
+            with transaction.atomic():
+                stakeholders = Stakeholder.objects.bulk_create([
+                    Stakeholder(
+                        name=f'Benchmark Stakeholder {start + i}',
+                        organization=f'Organization {rng.randint(1, 500)}',
+                        influence=rng.choice(levels),
+                        interest=rng.choice(levels),
+                        category=rng.choice(categories),
+                        created_by=user,
+                    )
+                    for i in range(size)
+                ])
+                Engagement.objects.bulk_create([
+                    Engagement(
+                        stakeholder=stakeholder,
+                        title=f'Benchmark Engagement {stakeholder.pk}',
+                        type=rng.choice(types),
+                        status=rng.choice(statuses),
+                        scheduled_date=now + timedelta(days=rng.randint(-730, 90)),
+                        created_by=user,
+                    )
+                    for stakeholder in stakeholders
+                ])
+                refresh_engagement_stats([stakeholder.pk for stakeholder in stakeholders])
+
+        bump_dashboard_version(user.pk)
+        bump_graph_version(user.pk)
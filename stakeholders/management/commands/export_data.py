@@ -0,0 +1,90 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from stakeholders.export import CHUNK_SIZE, EXPORTS, FORMATS, export_queryset, export_stream, select_columns
+
+
+class Command(BaseCommand):
+    help = 'Stream a user\'s stakeholders or engagements as CSV or JSON Lines, optionally gzipped'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'kind',
+            choices=list(EXPORTS),
+            help='What to export'
+        )
+        parser.add_argument(
+            '--user',
+            type=str,
+            required=True,
+            help='Username whose data to export'
+        )
+        parser.add_argument(
+            '--format',
+            choices=FORMATS,
+            default='csv',
+            help='Output format (default: csv)'
+        )
+        parser.add_argument(
+            '--columns',
+            type=str,
+            help='Comma-separated columns to include (default: all)'
+        )
+        parser.add_argument(
+            '--filter',
+            action='append',
+            default=[],
+            metavar='KEY=VALUE',
+            help='A list view filter, e.g. --filter category=external --filter priority=high (repeatable)'
+        )
+        parser.add_argument(
+            '--output',
+            type=str,
+            help='File to write (default: standard output)'
+        )
+        parser.add_argument(
+            '--gzip',
+            action='store_true',
+            help='Gzip the output (requires --output)'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=CHUNK_SIZE,
+            help=f'Rows fetched from the database at a time (default: {CHUNK_SIZE})'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f"User {options['user']} does not exist")
+        if options['gzip'] and not options['output']:
+            raise CommandError('--gzip needs --output')
+
+        params = {}
+        for item in options['filter']:
+            key, separator, value = item.partition('=')
+            if not separator:
+                raise CommandError(f'Filters are KEY=VALUE, got {item!r}')
+            params[key] = value
+        names = [name for name in (options['columns'] or '').split(',') if name]
+        try:
+            columns = select_columns(options['kind'], names)
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        queryset = export_queryset(options['kind'], user, params)
+        stream = export_stream(
+            queryset, options['kind'], columns, options['format'],
+            compress=options['gzip'], chunk_size=options['chunk_size'],
+        )
+        if options['output']:
+            mode, encoding = ('wb', None) if options['gzip'] else ('w', 'utf-8')
+            with open(options['output'], mode, encoding=encoding, newline='' if encoding else None) as output:
+                for piece in stream:
+                    output.write(piece)
+            self.stderr.write(self.style.SUCCESS(f"Exported {options['kind']} to {options['output']}"))
+        else:
+            for piece in stream:
+                self.stdout.write(piece, ending='')
@@ -1,12 +1,25 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import partial
+
+from django.conf import settings
 from django.core.management.base import BaseCommand
 from django.contrib.auth.models import User
+from django.utils import timezone
+from stakeholders.cache import bump_dashboard_version
 from stakeholders.models import Stakeholder, Engagement
 from ai_assistant.services import GeminiService
+from ai_assistant.cache import prompt_cache_stats
+from ai_assistant.structured import meeting_summary_schema
+from ai_assistant.throttling import RateLimiter, call_with_retries
+from ai_assistant.transport import CircuitBreaker, Transport
 import random
 
 
 class Command(BaseCommand):
-    help = 'Generate AI insights for existing stakeholder data'
+    help = (
+        'Generate AI insights for existing stakeholder data. Rows that already have insights or '
+        'summaries are skipped, so an interrupted run picks up where it stopped.'
+    )
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -21,6 +34,43 @@ class Command(BaseCommand):
             default=None,
             help='Limit number of stakeholders to process',
         )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=1,
+            help='Number of AI requests in flight at once (default: 1)',
+        )
+        parser.add_argument(
+            '--requests-per-minute',
+            type=int,
+            default=settings.GEMINI_REQUESTS_PER_MINUTE,
+            help='Maximum AI requests per minute, 0 for no limit (default: GEMINI_REQUESTS_PER_MINUTE)',
+        )
+        parser.add_argument(
+            '--tokens-per-minute',
+            type=int,
+            default=settings.GEMINI_TOKENS_PER_MINUTE,
+            help='Maximum estimated tokens per minute, 0 for no limit (default: GEMINI_TOKENS_PER_MINUTE)',
+        )
+        parser.add_argument(
+            '--max-retries',
+            type=int,
+            default=3,
+            help='Retries per failed request, with exponential backoff (default: 3)',
+        )
+        parser.add_argument(
+            '--batch-tokens',
+            type=int,
+            default=0,
+            help='Summarize several engagements per request, up to this many estimated tokens '
+                 '(e.g. 8000; default: one request per engagement)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=50,
+            help='Results saved per bulk update; each save is a resume checkpoint (default: 50)',
+        )
 
     def handle(self, *args, **options):
         username = options['user']
@@ -34,7 +84,14 @@ class Command(BaseCommand):
             )
             return
 
-        gemini_service = GeminiService()
+        rate_limiter = RateLimiter(options['requests_per_minute'], options['tokens_per_minute'])
+        # Retries happen per task in run_tasks, so the transport only adds the breaker and metrics
+        transport = Transport(
+            max_concurrency=options['concurrency'],
+            retries=0,
+            breaker=CircuitBreaker(settings.GEMINI_BREAKER_THRESHOLD, settings.GEMINI_BREAKER_RESET),
+        )
+        gemini_service = GeminiService(rate_limiter=rate_limiter, transport=transport)
         
         if not gemini_service.is_available():
             self.stdout.write(
@@ -46,16 +103,58 @@ class Command(BaseCommand):
             self.generate_mock_insights(user, limit)
             return
 
-        stakeholders = Stakeholder.objects.filter(created_by=user)
+        tasks = self.build_tasks(gemini_service, user, limit, options['batch_tokens'])
+        profiles = sum(1 for kind, _obj, _call in tasks if kind == 'profile')
+        summaries = sum(len(obj) if kind == 'summaries' else 1 for kind, obj, _call in tasks) - profiles
+        self.stdout.write(
+            f"Generating {profiles} stakeholder profiles and {summaries} engagement summaries "
+            f"in {len(tasks)} requests with {options['concurrency']} concurrent request(s)..."
+        )
+
+        saved, failed, interrupted = self.run_tasks(
+            gemini_service, user, tasks,
+            concurrency=options['concurrency'],
+            max_retries=options['max_retries'],
+            batch_size=options['batch_size'],
+        )
+
+        stats = prompt_cache_stats()
+        self.stdout.write(
+            f"Prompt cache: {stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.0%} hit rate)"
+        )
+        stats = transport.stats()
+        latency = stats['latency_ms'] or {'avg': 0, 'p95': 0}
+        self.stdout.write(
+            f"Model calls: {stats['succeeded']} succeeded, {stats['failed']} failed, "
+            f"{stats['rejected']} refused by the circuit breaker; "
+            f"latency avg {latency['avg']} ms, p95 {latency['p95']} ms"
+        )
+        if interrupted:
+            self.stdout.write(self.style.WARNING(
+                f'Interrupted after saving {saved} results; run the command again to resume'
+            ))
+        elif failed:
+            self.stdout.write(self.style.WARNING(
+                f'Saved {saved} results; {failed} requests failed and will be retried on the next run'
+            ))
+        else:
+            self.stdout.write(
+                self.style.SUCCESS('Successfully generated AI insights for all stakeholders')
+            )
+
+    def build_tasks(self, gemini_service, user, limit, batch_tokens=0):
+        """
+        (kind, object, call) for every profile and summary still missing. With
+        batch_tokens, summaries are packed into 'summaries' tasks whose object
+        maps engagement ids to engagements.
+        """
+        stakeholders = Stakeholder.objects.filter(created_by=user).order_by('id')
         if limit:
             stakeholders = stakeholders[:limit]
+        stakeholders = list(stakeholders)
 
-        self.stdout.write(f"Generating AI insights for {stakeholders.count()} stakeholders...")
-
+        tasks = []
         for stakeholder in stakeholders:
-            self.stdout.write(f"Processing: {stakeholder.name}")
-            
-            # Generate stakeholder insights
             if not stakeholder.ai_generated_insights:
                 basic_info = {
                     'name': stakeholder.name,
@@ -67,40 +166,121 @@ class Command(BaseCommand):
                     'interest': stakeholder.interest,
                     'description': stakeholder.description,
                 }
-                
-                insights = gemini_service.generate_stakeholder_profile(basic_info)
-                stakeholder.ai_generated_insights = insights
-                stakeholder.save()
-                self.stdout.write(f"  Generated stakeholder insights")
-
-            # Generate AI summaries for completed engagements
-            completed_engagements = stakeholder.engagements.filter(
-                status='completed',
-                ai_summary=''
-            )
-            
-            for engagement in completed_engagements:
-                # Create mock meeting notes for AI analysis
-                mock_notes = self.generate_mock_meeting_notes(engagement, stakeholder)
-                
-                stakeholder_info = {
-                    'name': stakeholder.name,
-                    'title': stakeholder.title,
-                    'organization': stakeholder.organization,
-                }
-                
-                summary_data = gemini_service.summarize_meeting(mock_notes, stakeholder_info)
-                
-                if isinstance(summary_data, dict):
-                    engagement.ai_summary = summary_data.get('summary', '')
-                    engagement.ai_action_items = summary_data.get('action_items', '')
-                    engagement.ai_sentiment_analysis = summary_data.get('sentiment', '')
-                    engagement.save()
-                    self.stdout.write(f"  Generated AI summary for: {engagement.title}")
+                prompt = gemini_service.stakeholder_profile_prompt(basic_info)
+                tasks.append(('profile', stakeholder, partial(gemini_service.generate_content, prompt)))
 
-        self.stdout.write(
-            self.style.SUCCESS('Successfully generated AI insights for all stakeholders')
-        )
+        # AI summaries for completed engagements, from mock meeting notes
+        engagements = Engagement.objects.filter(
+            stakeholder__created_by=user,
+            status='completed',
+            ai_summary=''
+        ).select_related('stakeholder').order_by('id')
+        if limit:
+            engagements = engagements.filter(stakeholder_id__in=[stakeholder.pk for stakeholder in stakeholders])
+
+        summary_items = []
+        for engagement in engagements:
+            stakeholder = engagement.stakeholder
+            mock_notes = self.generate_mock_meeting_notes(engagement, stakeholder)
+            stakeholder_info = {
+                'name': stakeholder.name,
+                'title': stakeholder.title,
+                'organization': stakeholder.organization,
+            }
+            if batch_tokens:
+                summary_items.append((engagement, {
+                    'id': engagement.pk, 'meeting_notes': mock_notes, 'stakeholder_info': stakeholder_info,
+                }))
+            else:
+                prompt = gemini_service.meeting_summary_prompt(mock_notes, stakeholder_info)
+                tasks.append(('summary', engagement, partial(
+                    gemini_service.generate_content, prompt, response_schema=meeting_summary_schema()
+                )))
+
+        if summary_items:
+            by_id = {item['id']: engagement for engagement, item in summary_items}
+            for batch in gemini_service.pack_meeting_batches([item for _e, item in summary_items], batch_tokens):
+                tasks.append((
+                    'summaries',
+                    {item['id']: by_id[item['id']] for item in batch},
+                    partial(gemini_service.summarize_meetings_batch, batch, batch_tokens),
+                ))
+        return tasks
+
+    def run_tasks(self, gemini_service, user, tasks, concurrency, max_retries, batch_size):
+        """
+        Send the prompts over a thread pool and save results in bulk as they arrive.
+
+        Returns (saved, failed, interrupted).
+        """
+        pending = {'profile': [], 'summary': []}
+        saved = failed = 0
+        interrupted = False
+
+        pool = ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix='ai-insights')
+        futures = {
+            pool.submit(call_with_retries, call, retries=max_retries): (kind, obj)
+            for kind, obj, call in tasks
+        }
+        try:
+            for future in as_completed(futures):
+                kind, obj = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    failed += len(obj) if kind == 'summaries' else 1
+                    self.stdout.write(self.style.ERROR(f"  Failed {kind} request: {e}"))
+                    continue
+
+                if kind == 'profile':
+                    obj.ai_generated_insights = result
+                    pending['profile'].append(obj)
+                elif kind == 'summary':
+                    self.apply_summary(obj, gemini_service.parse_meeting_summary(result))
+                    pending['summary'].append(obj)
+                else:
+                    for engagement_id, engagement in obj.items():
+                        if engagement_id in result:
+                            self.apply_summary(engagement, result[engagement_id])
+                            pending['summary'].append(engagement)
+                        else:
+                            failed += 1
+
+                if len(pending['profile']) + len(pending['summary']) >= batch_size:
+                    saved += self.save_results(user, pending)
+                    self.stdout.write(f"  Saved {saved} results")
+        except KeyboardInterrupt:
+            interrupted = True
+            pool.shutdown(wait=False, cancel_futures=True)
+        finally:
+            saved += self.save_results(user, pending)
+            pool.shutdown(wait=not interrupted)
+        return saved, failed, interrupted
+
+    @staticmethod
+    def apply_summary(engagement, summary_data):
+        engagement.ai_summary = summary_data.get('summary', '')
+        engagement.ai_action_items = summary_data.get('action_items', '')
+        engagement.ai_sentiment_analysis = summary_data.get('sentiment', '')
+
+    def save_results(self, user, pending):
+        """Bulk-write collected results and empty the buffers"""
+        now = timezone.now()
+        stakeholders, engagements = pending['profile'], pending['summary']
+        for obj in stakeholders + engagements:
+            obj.updated_at = now
+        if stakeholders:
+            Stakeholder.objects.bulk_update(stakeholders, ['ai_generated_insights', 'updated_at'])
+        if engagements:
+            Engagement.objects.bulk_update(
+                engagements, ['ai_summary', 'ai_action_items', 'ai_sentiment_analysis', 'updated_at']
+            )
+        count = len(stakeholders) + len(engagements)
+        if count:
+            # bulk_update skips the model signals that normally invalidate the dashboard
+            bump_dashboard_version(user.pk)
+        pending['profile'], pending['summary'] = [], []
+        return count
 
     def generate_mock_insights(self, user, limit):
         """Generate mock AI insights when Gemini service is not available"""
@@ -127,6 +307,7 @@ class Command(BaseCommand):
             ]
         }
 
+        mock_stakeholders = []
         for stakeholder in stakeholders:
             if not stakeholder.ai_generated_insights:
                 templates = mock_insights_templates.get(stakeholder.influence, mock_insights_templates['medium'])
@@ -144,9 +325,11 @@ class Command(BaseCommand):
                     insight += category_additions[stakeholder.category]
                 
                 stakeholder.ai_generated_insights = insight
-                stakeholder.save()
+                mock_stakeholders.append(stakeholder)
                 self.stdout.write(f"Generated mock insights for: {stakeholder.name}")
 
+        Stakeholder.objects.bulk_update(mock_stakeholders, ['ai_generated_insights'])
+
         # Generate mock AI summaries for completed engagements
         completed_engagements = Engagement.objects.filter(
             stakeholder__created_by=user,
@@ -173,13 +356,17 @@ class Command(BaseCommand):
             "• Research additional requirements\n• Prepare technical specifications document\n• Arrange training session for end users",
         ]
 
+        mock_engagements = []
         for engagement in completed_engagements:
             engagement.ai_summary = random.choice(mock_summaries)
             engagement.ai_action_items = random.choice(mock_action_items)
             engagement.ai_sentiment_analysis = engagement.sentiment or 'neutral'
-            engagement.save()
+            mock_engagements.append(engagement)
             self.stdout.write(f"Generated mock AI summary for: {engagement.title}")
 
+        Engagement.objects.bulk_update(mock_engagements, ['ai_summary', 'ai_action_items', 'ai_sentiment_analysis'])
+        bump_dashboard_version(user.pk)
+
         self.stdout.write(
             self.style.SUCCESS('Successfully generated mock AI insights (Gemini service not available)')
         )
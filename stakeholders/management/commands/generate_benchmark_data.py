@@ -0,0 +1,212 @@
+from datetime import timedelta
+import random
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from stakeholders.cache import bump_dashboard_version, bump_graph_version
+from stakeholders.models import Stakeholder, Engagement, StakeholderRelationship
+from stakeholders.stats import refresh_engagement_stats
+from stakeholders.purge import purge_user_data
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate large synthetic tenants for benchmarking. Tenant sizes, engagements per stakeholder '
+        'and relationship endpoints follow skewed (power-law) distributions, like real accounts where '
+        'a few customers and a few key stakeholders hold most of the data.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--users',
+            type=int,
+            default=1,
+            help='Number of tenants to create (default: 1)'
+        )
+        parser.add_argument(
+            '--stakeholders',
+            type=int,
+            default=10000,
+            help='Stakeholders in the largest tenant; tenant k gets roughly this / k**skew (default: 10000)'
+        )
+        parser.add_argument(
+            '--engagements',
+            type=float,
+            default=5,
+            help='Average engagements per stakeholder (default: 5)'
+        )
+        parser.add_argument(
+            '--relationships',
+            type=float,
+            default=2,
+            help='Average relationships per stakeholder (default: 2)'
+        )
+        parser.add_argument(
+            '--skew',
+            type=float,
+            default=1.2,
+            help='Power-law exponent for tenant sizes, engagement counts and relationship hubs; '
+                 'larger is more skewed, 0 is uniform (default: 1.2)'
+        )
+        parser.add_argument(
+            '--prefix',
+            type=str,
+            default='bench',
+            help='Tenant usernames are <prefix>_0, <prefix>_1, ... (default: bench)'
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Random seed, so the same options always produce the same data (default: 0)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Rows per bulk insert (default: 5000)'
+        )
+        parser.add_argument(
+            '--clear',
+            action='store_true',
+            help="Delete the tenants' existing data first"
+        )
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.skew = max(0.0, options['skew'])
+        self.batch_size = options['batch_size']
+        self.now = timezone.now()
+
+        self.levels = [choice[0] for choice in Stakeholder.INFLUENCE_CHOICES]
+        self.categories = [choice[0] for choice in Stakeholder.CATEGORY_CHOICES]
+        self.types = [choice[0] for choice in Engagement.TYPE_CHOICES]
+        self.relationship_types = [choice[0] for choice in StakeholderRelationship.RELATIONSHIP_TYPES]
+
+        totals = [0, 0, 0]
+        for index in range(options['users']):
+            user, created = User.objects.get_or_create(username=f"{options['prefix']}_{index}")
+            if created:
+                user.set_password('benchmark')
+                user.save()
+            elif Stakeholder.objects.filter(created_by=user).exists():
+                if not options['clear']:
+                    self.stdout.write(self.style.WARNING(
+                        f'Skipping {user.username}: it already has data (use --clear to regenerate)'
+                    ))
+                    continue
+                purge_user_data(user.pk)
+
+            size = max(1, int(options['stakeholders'] / (index + 1) ** self.skew))
+            counts = self.generate_tenant(user, size, options['engagements'], options['relationships'])
+            for position, count in enumerate(counts):
+                totals[position] += count
+            self.stdout.write(
+                f'{user.username}: {counts[0]} stakeholders, {counts[1]} engagements, {counts[2]} relationships'
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Generated {totals[0]} stakeholders, {totals[1]} engagements and {totals[2]} relationships'
+        ))
+
+    def skewed_count(self, mean):
+        """A power-law distributed count with the given mean (most rows get few, some get many)"""
+        if self.skew <= 0:
+            return self.rng.randint(0, int(2 * mean))
+        alpha = 1 + 1 / self.skew
+        # Pareto(alpha) has mean alpha / (alpha - 1); rescale to the requested mean
+        value = self.rng.paretovariate(alpha) * mean * (alpha - 1) / alpha
+        return min(int(value), int(50 * mean) + 1)
+
+    def hub_index(self, size):
+        """A stakeholder index biased towards low indexes, which become relationship hubs"""
+        return min(size - 1, int(size * self.rng.random() ** (1 + self.skew)))
+
+    def weighted_choice(self, options):
+        """Earlier options are more common"""
+        return options[min(len(options) - 1, int(len(options) * self.rng.random() ** (1 + self.skew / 2)))]
+
+    def generate_tenant(self, user, size, engagements_per_stakeholder, relationships_per_stakeholder):
+        with transaction.atomic():
+            ids = []
+            for start in range(0, size, self.batch_size):
+                ids.extend(stakeholder.pk for stakeholder in Stakeholder.objects.bulk_create([
+                    Stakeholder(
+                        name=f'Benchmark Stakeholder {position}',
+                        title=self.rng.choice(['Director', 'Manager', 'Engineer', 'VP', 'Analyst']),
+                        organization=f'Organization {self.hub_index(max(1, size // 20))}',
+                        department=self.rng.choice(['Finance', 'IT', 'Operations', 'Sales', 'Legal']),
+                        email=f'stakeholder{position}@example.com',
+                        influence=self.weighted_choice(self.levels),
+                        interest=self.rng.choice(self.levels),
+                        category=self.weighted_choice(self.categories),
+                        created_by=user,
+                    )
+                    for position in range(start, min(size, start + self.batch_size))
+                ]))
+
+            engagement_count = self.insert_batches(Engagement, (
+                self.engagement(user, stakeholder_id, position, number)
+                for position, stakeholder_id in enumerate(ids)
+                for number in range(self.skewed_count(engagements_per_stakeholder))
+            ))
+            self.insert_batches(StakeholderRelationship, (
+                StakeholderRelationship(
+                    from_stakeholder_id=from_id,
+                    to_stakeholder_id=to_id,
+                    relationship_type=self.rng.choice(self.relationship_types),
+                    strength=self.rng.choice(['weak', 'moderate', 'strong']),
+                    created_by=user,
+                )
+                for from_id, to_id in self.relationship_pairs(ids, int(size * relationships_per_stakeholder))
+            ), ignore_conflicts=True)
+            # Duplicate pairs were skipped on insert, so count what landed
+            relationship_count = StakeholderRelationship.objects.filter(created_by=user).count()
+            refresh_engagement_stats(ids)
+
+        bump_dashboard_version(user.pk)
+        bump_graph_version(user.pk)
+        return len(ids), engagement_count, relationship_count
+
+    def relationship_pairs(self, ids, count):
+        """(from, to) stakeholder ids; the targets cluster on a few hub stakeholders"""
+        if len(ids) < 2:
+            return
+        for _ in range(count):
+            from_id, to_id = ids[self.rng.randrange(len(ids))], ids[self.hub_index(len(ids))]
+            if from_id != to_id:
+                yield from_id, to_id
+
+    def engagement(self, user, stakeholder_id, position, number):
+        days = self.rng.randint(-730, 90)
+        if days >= 0:
+            status = 'planned'
+        else:
+            status = self.rng.choice(['completed', 'completed', 'completed', 'cancelled', 'planned'])
+        return Engagement(
+            stakeholder_id=stakeholder_id,
+            title=f'Benchmark Engagement {position}-{number}',
+            type=self.weighted_choice(self.types),
+            status=status,
+            scheduled_date=self.now + timedelta(days=days, minutes=self.rng.randint(0, 1439)),
+            sentiment=self.rng.choice(['positive', 'neutral', 'negative']) if status == 'completed' else '',
+            created_by=user,
+        )
+
+    def insert_batches(self, model, rows, **options):
+        """bulk_create an iterable of unsaved rows batch by batch; returns the number of rows sent"""
+        count = 0
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                model.objects.bulk_create(batch, **options)
+                count += len(batch)
+                batch = []
+        if batch:
+            model.objects.bulk_create(batch, **options)
+            count += len(batch)
+        return count
@@ -0,0 +1,104 @@
+import json
+import sys
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from stakeholders.imports import BATCH_SIZE, FORMATS, IMPORTERS, import_rows, read_rows
+
+
+class Command(BaseCommand):
+    help = 'Add or update a user\'s stakeholders or engagements from a CSV or JSON Lines file (optionally gzipped)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'kind',
+            choices=list(IMPORTERS),
+            help='What the file contains'
+        )
+        parser.add_argument(
+            'path',
+            help='File to import, or - for standard input'
+        )
+        parser.add_argument(
+            '--user',
+            type=str,
+            required=True,
+            help='Username to import for'
+        )
+        parser.add_argument(
+            '--format',
+            choices=FORMATS,
+            help='File format (default: from the file name, e.g. people.csv or people.jsonl.gz)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help=f'Rows validated and written per transaction (default: {BATCH_SIZE})'
+        )
+        parser.add_argument(
+            '--errors',
+            type=str,
+            help='Write every rejected row and its errors to this file as JSON Lines'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f"User {options['user']} does not exist")
+
+        path = options['path']
+        fmt = options['format']
+        if not fmt:
+            fmt = next((name for name in FORMATS if path.removesuffix('.gz').endswith(f'.{name}')), None)
+            if fmt is None:
+                raise CommandError('Cannot tell the format from the file name; pass --format')
+
+        errors_file = open(options['errors'], 'w', encoding='utf-8') if options['errors'] else None
+        shown = []
+
+        def on_error(number, errors):
+            if errors_file:
+                errors_file.write(json.dumps({'row': number, 'errors': errors}) + '\n')
+            elif len(shown) < 20:
+                shown.append(f'  row {number}: ' + '; '.join(
+                    f'{field}: {" ".join(messages)}' for field, messages in errors.items()
+                ))
+
+        def progress(done):
+            self.stdout.write(f'  {done} rows read')
+
+        started = time.perf_counter()
+        try:
+            try:
+                stream = sys.stdin.buffer if path == '-' else open(path, 'rb')
+            except OSError as e:
+                raise CommandError(str(e))
+            with stream:
+                result = import_rows(
+                    user, options['kind'], read_rows(stream, fmt),
+                    batch_size=options['batch_size'], on_error=on_error,
+                    progress=progress if options['verbosity'] > 1 else None,
+                )
+        finally:
+            if errors_file:
+                errors_file.close()
+        elapsed = time.perf_counter() - started
+
+        rows = result['created'] + result['updated'] + result['failed']
+        self.stdout.write(self.style.SUCCESS(
+            f"{options['kind'].capitalize()}: {result['created']} created, {result['updated']} updated, "
+            f"{result['failed']} rejected in {elapsed:.1f}s ({rows / elapsed * 60 if elapsed else 0:,.0f} rows/min)"
+        ))
+        if result['failed']:
+            if errors_file:
+                self.stdout.write(self.style.WARNING(f"Rejected rows written to {options['errors']}"))
+            else:
+                self.stdout.write(self.style.WARNING('Rejected rows:'))
+                for line in shown:
+                    self.stdout.write(line)
+                if result['failed'] > len(shown):
+                    self.stdout.write(f"  ... and {result['failed'] - len(shown)} more (use --errors to save them all)")
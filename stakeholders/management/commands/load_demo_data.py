@@ -1,10 +1,13 @@
 from django.core.management.base import BaseCommand
 from django.contrib.auth.models import User
+from django.db import transaction
 from django.utils import timezone
 from datetime import datetime, timedelta
 import random
 
-from stakeholders.models import Stakeholder, Engagement, StakeholderRelationship, DemoSession
+from stakeholders.bulk import bulk_load, scaled_relationships, scaled_stakeholders
+from stakeholders.purge import purge_user_data
+from stakeholders.models import DemoSession
 
 
 class Command(BaseCommand):
@@ -23,10 +26,25 @@ class Command(BaseCommand):
             type=str,
             help='Username to load demo data for (default: create demo user)'
         )
+        parser.add_argument(
+            '--scale',
+            type=int,
+            default=1,
+            help='Load N copies of the scenario (N times the stakeholders, engagements and relationships) '
+                 'for load testing (default: 1)'
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Random seed for assigning engagements, so loads are repeatable (default: 0)'
+        )
 
     def handle(self, *args, **options):
         scenario = options['scenario']
         username = options.get('user')
+        self.scale = max(1, options['scale'])
+        self.rng = random.Random(options['seed'])
 
         # Get or create demo user
         if username:
@@ -51,33 +69,34 @@ class Command(BaseCommand):
                 user.set_password('password')
                 user.save()
 
-        # Clear existing demo data for this user
-        self.stdout.write('Clearing existing data...')
-        Stakeholder.objects.filter(created_by=user).delete()
-        Engagement.objects.filter(created_by=user).delete()
-        
-        # Create or update demo session
-        demo_session, _ = DemoSession.objects.get_or_create(
-            user=user,
-            defaults={'demo_scenario': scenario}
-        )
-        demo_session.is_demo_mode = True
-        demo_session.demo_scenario = scenario
-        demo_session.save()
+        # Replace the user's data in one transaction, so a failed load keeps the old data
+        with transaction.atomic():
+            self.stdout.write('Clearing existing data...')
+            purge_user_data(user.pk)
 
-        # Load scenario-specific data
-        if scenario == 'tech_startup':
-            self.load_tech_startup_data(user)
-        elif scenario == 'enterprise_project':
-            self.load_enterprise_data(user)
-        elif scenario == 'product_launch':
-            self.load_product_launch_data(user)
-        else:
-            self.load_standard_data(user)
+            # Create or update demo session
+            demo_session, _ = DemoSession.objects.get_or_create(
+                user=user,
+                defaults={'demo_scenario': scenario}
+            )
+            demo_session.is_demo_mode = True
+            demo_session.demo_scenario = scenario
+            demo_session.save()
+
+            # Load scenario-specific data
+            if scenario == 'tech_startup':
+                counts = self.load_tech_startup_data(user)
+            elif scenario == 'enterprise_project':
+                counts = self.load_enterprise_data(user)
+            elif scenario == 'product_launch':
+                counts = self.load_product_launch_data(user)
+            else:
+                counts = self.load_standard_data(user)
 
         self.stdout.write(
             self.style.SUCCESS(
-                f'Successfully loaded {scenario} demo data for user {user.username}'
+                f'Successfully loaded {scenario} demo data for user {user.username} '
+                f'({counts[0]} stakeholders, {counts[1]} engagements, {counts[2]} relationships)'
             )
         )
 
@@ -220,35 +239,38 @@ class Command(BaseCommand):
             }
         ]
 
-        stakeholders = []
-        for data in stakeholders_data:
-            stakeholder = Stakeholder.objects.create(created_by=user, **data)
-            stakeholders.append(stakeholder)
+        return self.load_scaled(user, stakeholders_data)
 
-        # Create diverse engagements
-        self.create_sample_engagements(user, stakeholders)
-        self.create_sample_relationships(user, stakeholders)
+    def load_scaled(self, user, stakeholders_data):
+        """Bulk insert --scale copies of the stakeholders with their engagements and relationships"""
+        stakeholders = scaled_stakeholders(stakeholders_data, self.scale)
+        engagements = self.sample_engagements(len(stakeholders))
+        relationships = scaled_relationships(
+            self.sample_relationships(len(stakeholders_data)), len(stakeholders_data), self.scale
+        )
+        bulk_load(user, stakeholders, engagements, relationships)
+        return len(stakeholders), len(engagements), len(relationships)
 
     def load_tech_startup_data(self, user):
         """Load tech startup specific demo data"""
         # Implementation for tech startup scenario
-        self.load_standard_data(user)  # For now, use standard data
+        return self.load_standard_data(user)  # For now, use standard data
         # Could customize for startup-specific stakeholders
 
     def load_enterprise_data(self, user):
         """Load enterprise project specific demo data"""
         # Implementation for enterprise scenario
-        self.load_standard_data(user)  # For now, use standard data
+        return self.load_standard_data(user)  # For now, use standard data
         # Could customize for enterprise-specific stakeholders
 
     def load_product_launch_data(self, user):
         """Load product launch specific demo data"""
         # Implementation for product launch scenario
-        self.load_standard_data(user)  # For now, use standard data
+        return self.load_standard_data(user)  # For now, use standard data
         # Could customize for product launch-specific stakeholders
 
-    def create_sample_engagements(self, user, stakeholders):
-        """Create realistic sample engagements"""
+    def sample_engagements(self, stakeholder_count):
+        """Realistic sample engagements (--scale sets of them) for random stakeholders"""
         engagement_templates = [
             {
                 'title': 'Q4 Strategic Planning Session',
@@ -365,31 +387,32 @@ class Command(BaseCommand):
             }
         ]
 
-        for template in engagement_templates:
-            # Assign to random stakeholder
-            stakeholder = random.choice(stakeholders)
-            
-            # Calculate date
-            if 'days_ago' in template:
-                scheduled_date = timezone.now() - timedelta(days=template['days_ago'])
-            else:
-                scheduled_date = timezone.now() + timedelta(days=template['days_ahead'])
-            
-            engagement_data = template.copy()
-            engagement_data.pop('days_ago', None)
-            engagement_data.pop('days_ahead', None)
-            
-            Engagement.objects.create(
-                stakeholder=stakeholder,
-                created_by=user,
-                scheduled_date=scheduled_date,
-                **engagement_data
-            )
+        now = timezone.now()
+        engagements = []
+        for _ in range(self.scale):
+            for template in engagement_templates:
+                # Calculate date
+                if 'days_ago' in template:
+                    scheduled_date = now - timedelta(days=template['days_ago'])
+                else:
+                    scheduled_date = now + timedelta(days=template['days_ahead'])
 
-    def create_sample_relationships(self, user, stakeholders):
-        """Create sample stakeholder relationships"""
-        if len(stakeholders) < 4:
-            return
+                engagement_data = template.copy()
+                engagement_data.pop('days_ago', None)
+                engagement_data.pop('days_ahead', None)
+
+                # Assign to random stakeholder
+                engagements.append(dict(
+                    engagement_data,
+                    stakeholder=self.rng.randrange(stakeholder_count),
+                    scheduled_date=scheduled_date,
+                ))
+        return engagements
+
+    def sample_relationships(self, stakeholder_count):
+        """Sample relationships between one copy of the scenario's stakeholders, by index"""
+        if stakeholder_count < 4:
+            return []
 
         # Create some realistic relationships
         relationships = [
@@ -400,12 +423,8 @@ class Command(BaseCommand):
             (4, 2, 'influences'),    # Customer influences VP Product
         ]
 
-        for from_idx, to_idx, rel_type in relationships:
-            if from_idx < len(stakeholders) and to_idx < len(stakeholders):
-                StakeholderRelationship.objects.create(
-                    from_stakeholder=stakeholders[from_idx],
-                    to_stakeholder=stakeholders[to_idx],
-                    relationship_type=rel_type,
-                    strength='strong',
-                    created_by=user
-                )
+        return [
+            (from_idx, to_idx, {'relationship_type': rel_type, 'strength': 'strong'})
+            for from_idx, to_idx, rel_type in relationships
+            if from_idx < stakeholder_count and to_idx < stakeholder_count
+        ]
@@ -2,8 +2,10 @@ import random
 from datetime import datetime, timedelta
 from django.core.management.base import BaseCommand
 from django.contrib.auth.models import User
+from django.db import transaction
 from django.utils import timezone
-from stakeholders.models import Stakeholder, Engagement, StakeholderRelationship
+from stakeholders.bulk import bulk_load, scaled_relationships, scaled_stakeholders
+from stakeholders.purge import purge_user_data
 
 
 class Command(BaseCommand):
@@ -21,9 +23,23 @@ class Command(BaseCommand):
             default='admin',
             help='Username to assign data to (default: admin)',
         )
+        parser.add_argument(
+            '--scale',
+            type=int,
+            default=1,
+            help='Create N copies of the sample organization for load testing (default: 1)',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Random seed for engagements and relationships, so runs are repeatable (default: 0)',
+        )
 
     def handle(self, *args, **options):
         username = options['user']
+        self.scale = max(1, options['scale'])
+        self.rng = random.Random(options['seed'])
         
         # Get or create user
         try:
@@ -37,19 +53,24 @@ class Command(BaseCommand):
             )
             self.stdout.write(f"Created new user: {username}")
 
-        if options['clear']:
-            self.stdout.write("Clearing existing data...")
-            Stakeholder.objects.filter(created_by=user).delete()
-            self.stdout.write("Existing data cleared.")
+        base_stakeholders = self.stakeholder_rows()
+        stakeholders = scaled_stakeholders(base_stakeholders, self.scale)
+        engagements = self.engagement_rows(len(stakeholders))
+        relationships = scaled_relationships(
+            self.relationship_rows(base_stakeholders), len(base_stakeholders), self.scale
+        )
 
-        self.stdout.write("Creating sample stakeholders...")
-        stakeholders = self.create_stakeholders(user)
-        
-        self.stdout.write("Creating sample engagements...")
-        self.create_engagements(user, stakeholders)
-        
-        self.stdout.write("Creating stakeholder relationships...")
-        self.create_relationships(user, stakeholders)
+        with transaction.atomic():
+            if options['clear']:
+                self.stdout.write("Clearing existing data...")
+                purge_user_data(user.pk)
+                self.stdout.write("Existing data cleared.")
+
+            self.stdout.write(
+                f"Creating {len(stakeholders)} stakeholders, {len(engagements)} engagements "
+                f"and {len(relationships)} relationships..."
+            )
+            bulk_load(user, stakeholders, engagements, relationships)
         
         self.stdout.write(
             self.style.SUCCESS(
@@ -57,8 +78,8 @@ class Command(BaseCommand):
             )
         )
 
-    def create_stakeholders(self, user):
-        """Create sample stakeholders across different categories"""
+    def stakeholder_rows(self):
+        """Sample stakeholders across different categories"""
         stakeholder_data = [
             # Executive Leadership
             {
@@ -272,19 +293,10 @@ class Command(BaseCommand):
             }
         ]
         
-        stakeholders = []
-        for data in stakeholder_data:
-            stakeholder = Stakeholder.objects.create(
-                created_by=user,
-                **data
-            )
-            stakeholders.append(stakeholder)
-            self.stdout.write(f"Created stakeholder: {stakeholder.name}")
-        
-        return stakeholders
+        return stakeholder_data
 
-    def create_engagements(self, user, stakeholders):
-        """Create sample engagements for stakeholders"""
+    def engagement_rows(self, stakeholder_count):
+        """Sample engagements for each stakeholder, by stakeholder index"""
         engagement_templates = [
             {
                 'title': 'Quarterly Business Review',
@@ -345,28 +357,30 @@ class Command(BaseCommand):
         ]
         
         # Create engagements for each stakeholder
-        for stakeholder in stakeholders:
+        now = timezone.now()
+        engagements = []
+        for stakeholder in range(stakeholder_count):
             # Create 2-5 engagements per stakeholder
-            num_engagements = random.randint(2, 5)
+            num_engagements = self.rng.randint(2, 5)
             
             for _ in range(num_engagements):
-                template = random.choice(engagement_templates)
+                template = self.rng.choice(engagement_templates)
                 
                 # Random date within last 90 days or next 30 days
-                days_offset = random.randint(-90, 30)
-                scheduled_date = timezone.now() + timedelta(days=days_offset)
+                days_offset = self.rng.randint(-90, 30)
+                scheduled_date = now + timedelta(days=days_offset)
                 
                 # Determine status based on date
                 if days_offset < -7:
                     status = 'completed'
-                    sentiment = random.choice(['positive', 'neutral', 'negative'])
-                    effectiveness_rating = random.randint(2, 5)
+                    sentiment = self.rng.choice(['positive', 'neutral', 'negative'])
+                    effectiveness_rating = self.rng.randint(2, 5)
                     outcomes = self.generate_outcomes(sentiment)
                     action_items = self.generate_action_items()
                 elif days_offset < 0:
-                    status = random.choice(['completed', 'completed', 'completed', 'cancelled'])
-                    sentiment = random.choice(['positive', 'neutral', 'negative']) if status == 'completed' else ''
-                    effectiveness_rating = random.randint(2, 5) if status == 'completed' else None
+                    status = self.rng.choice(['completed', 'completed', 'completed', 'cancelled'])
+                    sentiment = self.rng.choice(['positive', 'neutral', 'negative']) if status == 'completed' else ''
+                    effectiveness_rating = self.rng.randint(2, 5) if status == 'completed' else None
                     outcomes = self.generate_outcomes(sentiment) if status == 'completed' else ''
                     action_items = self.generate_action_items() if status == 'completed' else ''
                 else:
@@ -376,26 +390,24 @@ class Command(BaseCommand):
                     outcomes = ''
                     action_items = ''
                 
-                engagement = Engagement.objects.create(
-                    stakeholder=stakeholder,
-                    title=template['title'],
-                    type=template['type'],
-                    status=status,
-                    scheduled_date=scheduled_date,
-                    duration_minutes=template['duration_minutes'],
-                    description=template['description'],
-                    objectives=template['objectives'],
-                    outcomes=outcomes,
-                    action_items=action_items,
-                    sentiment=sentiment,
-                    effectiveness_rating=effectiveness_rating,
-                    created_by=user
-                )
-                
-                self.stdout.write(f"Created engagement: {engagement.title} for {stakeholder.name}")
+                engagements.append({
+                    'stakeholder': stakeholder,
+                    'title': template['title'],
+                    'type': template['type'],
+                    'status': status,
+                    'scheduled_date': scheduled_date,
+                    'duration_minutes': template['duration_minutes'],
+                    'description': template['description'],
+                    'objectives': template['objectives'],
+                    'outcomes': outcomes,
+                    'action_items': action_items,
+                    'sentiment': sentiment,
+                    'effectiveness_rating': effectiveness_rating,
+                })
+        return engagements
 
-    def create_relationships(self, user, stakeholders):
-        """Create sample relationships between stakeholders"""
+    def relationship_rows(self, stakeholders):
+        """Sample relationships between the stakeholder rows, as (from_index, to_index, fields)"""
         # Create some realistic organizational relationships
         relationships_data = [
             # CEO relationships
@@ -426,34 +438,19 @@ class Command(BaseCommand):
             ('Thomas Brown', 'Michael Rodriguez', 'depends_on'),
         ]
         
-        # Convert names to stakeholder objects and create relationships
-        stakeholder_dict = {s.name: s for s in stakeholders}
-        
+        # Resolve names to stakeholder indexes; duplicates are skipped on insert
+        index_by_name = {data['name']: index for index, data in enumerate(stakeholders)}
+        relationships = []
+
         for from_name, to_name, rel_type in relationships_data:
-            if from_name in stakeholder_dict and to_name in stakeholder_dict:
-                from_stakeholder = stakeholder_dict[from_name]
-                to_stakeholder = stakeholder_dict[to_name]
-                
-                # Avoid duplicate relationships
-                existing = StakeholderRelationship.objects.filter(
-                    from_stakeholder=from_stakeholder,
-                    to_stakeholder=to_stakeholder,
-                    relationship_type=rel_type
-                ).exists()
-                
-                if not existing:
-                    strength = random.choice(['moderate', 'strong', 'strong'])  # Bias toward stronger relationships
-                    
-                    StakeholderRelationship.objects.create(
-                        from_stakeholder=from_stakeholder,
-                        to_stakeholder=to_stakeholder,
-                        relationship_type=rel_type,
-                        strength=strength,
-                        description=f"{rel_type.replace('_', ' ').title()} relationship in organizational context.",
-                        created_by=user
-                    )
-                    
-                    self.stdout.write(f"Created relationship: {from_name} {rel_type} {to_name}")
+            if from_name in index_by_name and to_name in index_by_name:
+                strength = self.rng.choice(['moderate', 'strong', 'strong'])  # Bias toward stronger relationships
+                relationships.append((index_by_name[from_name], index_by_name[to_name], {
+                    'relationship_type': rel_type,
+                    'strength': strength,
+                    'description': f"{rel_type.replace('_', ' ').title()} relationship in organizational context.",
+                }))
+        return relationships
 
     def generate_outcomes(self, sentiment):
         """Generate realistic outcomes based on sentiment"""
@@ -482,11 +479,11 @@ class Command(BaseCommand):
         ]
         
         if sentiment == 'positive':
-            return random.choice(positive_outcomes)
+            return self.rng.choice(positive_outcomes)
         elif sentiment == 'negative':
-            return random.choice(negative_outcomes)
+            return self.rng.choice(negative_outcomes)
         else:
-            return random.choice(neutral_outcomes)
+            return self.rng.choice(neutral_outcomes)
 
     def generate_action_items(self):
         """Generate realistic action items"""
@@ -504,6 +501,6 @@ class Command(BaseCommand):
         ]
         
         # Return 1-3 random action items
-        num_items = random.randint(1, 3)
-        selected_items = random.sample(action_items, num_items)
+        num_items = self.rng.randint(1, 3)
+        selected_items = self.rng.sample(action_items, num_items)
         return "\n".join([f"• {item}" for item in selected_items])
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+from django.db import connections, transaction
+
+from stakeholders.search import fts5_supported, rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the stakeholder full-text search index'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database',
+            type=str,
+            default='default',
+            help='Database alias to rebuild the index on (default: default)'
+        )
+        parser.add_argument(
+            '--optimize',
+            action='store_true',
+            help='Merge index segments after rebuilding for faster queries'
+        )
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+
+        if not fts5_supported(connection):
+            self.stdout.write(
+                self.style.WARNING(
+                    'Full-text search requires SQLite with FTS5; '
+                    'stakeholder search uses the standard database lookups instead'
+                )
+            )
+            return
+
+        with transaction.atomic(using=connection.alias):
+            indexed = rebuild_search_index(connection, optimize=options['optimize'])
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Rebuilt search index for {indexed} stakeholders')
+        )
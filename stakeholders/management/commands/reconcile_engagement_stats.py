@@ -0,0 +1,41 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from stakeholders.stats import CHUNK_SIZE, reconcile_engagement_stats
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute the stored per-stakeholder engagement stats and fix any that drifted '
+        '(e.g. after engagements were changed with raw SQL); safe to run periodically'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            type=str,
+            help='Username to reconcile (default: every user)'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=CHUNK_SIZE,
+            help=f'Stakeholders recomputed per transaction (default: {CHUNK_SIZE})'
+        )
+
+    def handle(self, *args, **options):
+        user_id = None
+        if options['user']:
+            try:
+                user_id = User.objects.get(username=options['user']).pk
+            except User.DoesNotExist:
+                raise CommandError(f"User {options['user']} does not exist")
+
+        started = time.perf_counter()
+        checked, fixed = reconcile_engagement_stats(user_id, chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Checked {checked} stakeholders in {time.perf_counter() - started:.2f}s; '
+            f'fixed {fixed} engagement stats rows'
+        ))
@@ -0,0 +1,220 @@
+import json
+import platform
+import statistics
+import subprocess
+import time
+import tracemalloc
+
+import django
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from django.urls import reverse
+from django.utils import timezone
+
+from stakeholders.cache import bump_dashboard_version
+from stakeholders.models import Stakeholder, Engagement, StakeholderRelationship
+
+VIEWS = ('dashboard', 'stakeholder_list', 'engagement_list', 'stakeholder_detail', 'api_stakeholders')
+
+
+class Command(BaseCommand):
+    help = (
+        'Time the main pages for one user through the Django test client and report p50/p95 latency, '
+        'query counts and peak memory as JSON, so runs can be compared between commits. '
+        'Use generate_benchmark_data to create the data first.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            type=str,
+            default='bench_0',
+            help='Username whose pages are requested (default: bench_0, the largest generated tenant)'
+        )
+        parser.add_argument(
+            '--views',
+            nargs='+',
+            choices=VIEWS,
+            default=list(VIEWS),
+            help='Views to benchmark (default: all)'
+        )
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=20,
+            help='Timed requests per view (default: 20)'
+        )
+        parser.add_argument(
+            '--warmup',
+            type=int,
+            default=2,
+            help='Untimed requests per view first, to fill caches (default: 2)'
+        )
+        parser.add_argument(
+            '--cold',
+            action='store_true',
+            help="Invalidate the user's dashboard cache before every request"
+        )
+        parser.add_argument(
+            '--output',
+            type=str,
+            help='Also write the JSON report to this file'
+        )
+        parser.add_argument(
+            '--compare',
+            type=str,
+            help='A report from an earlier run; print the change in latency and queries per view'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f"User {options['user']} does not exist (run generate_benchmark_data first)")
+        if options['iterations'] < 1:
+            raise CommandError('--iterations must be at least 1')
+
+        # The test client's host ('testserver') is only allowed inside a test environment
+        try:
+            setup_test_environment()
+            owns_environment = True
+        except RuntimeError:
+            owns_environment = False
+
+        try:
+            client = Client()
+            client.force_login(user)
+            results = {
+                name: self.measure(client, user, self.view_url(name, user), options)
+                for name in options['views']
+            }
+        finally:
+            if owns_environment:
+                teardown_test_environment()
+
+        report = {'meta': self.meta(user, options), 'results': results}
+        output = json.dumps(report, indent=2)
+        self.stdout.write(output)
+        if options['output']:
+            with open(options['output'], 'w') as handle:
+                handle.write(output + '\n')
+
+        if options['compare']:
+            with open(options['compare']) as handle:
+                baseline = json.load(handle)
+            self.print_comparison(baseline.get('results', {}), results)
+
+    @staticmethod
+    def view_url(name, user):
+        if name != 'stakeholder_detail':
+            return reverse(name)
+        # The busiest stakeholder is the worst case for the detail page
+        stakeholder = (
+            Stakeholder.objects.filter(created_by=user)
+            .annotate(engagement_count=Count('engagements'))
+            .order_by('-engagement_count', 'pk')
+            .first()
+        )
+        if stakeholder is None:
+            raise CommandError(f'User {user.username} has no stakeholders to benchmark')
+        return reverse(name, args=[stakeholder.pk])
+
+    @staticmethod
+    def request(client, user, url, cold):
+        if cold:
+            bump_dashboard_version(user.pk)
+        response = client.get(url)
+        if response.status_code != 200:
+            raise CommandError(f'GET {url} returned {response.status_code}')
+        # Consume streamed bodies so their cost is counted too
+        if response.streaming:
+            b''.join(response.streaming_content)
+        return response
+
+    def measure(self, client, user, url, options):
+        cold = options['cold']
+        for _ in range(options['warmup']):
+            self.request(client, user, url, cold)
+
+        timings = []
+        queries = []
+        for _ in range(options['iterations']):
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = self.request(client, user, url, cold)
+                timings.append((time.perf_counter() - started) * 1000)
+            queries.append(len(captured))
+
+        # Memory is measured in a separate request: tracing slows everything down
+        tracing = tracemalloc.is_tracing()
+        if not tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+        self.request(client, user, url, cold)
+        _, peak = tracemalloc.get_traced_memory()
+        if not tracing:
+            tracemalloc.stop()
+
+        timings.sort()
+        return {
+            'url': url,
+            'iterations': len(timings),
+            'p50_ms': round(statistics.median(timings), 2),
+            'p95_ms': round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 2),
+            'mean_ms': round(statistics.fmean(timings), 2),
+            'min_ms': round(timings[0], 2),
+            'max_ms': round(timings[-1], 2),
+            'queries': max(queries),
+            'peak_memory_kb': round((peak - baseline) / 1024, 1),
+            'response_bytes': len(response.content) if not response.streaming else None,
+        }
+
+    @staticmethod
+    def git_commit():
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'],
+                cwd=settings.BASE_DIR, capture_output=True, text=True, timeout=5, check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.SubprocessError):
+            return None
+
+    def meta(self, user, options):
+        return {
+            'commit': self.git_commit(),
+            'timestamp': timezone.now().isoformat(),
+            'user': user.username,
+            'stakeholders': Stakeholder.objects.filter(created_by=user).count(),
+            'engagements': Engagement.objects.filter(created_by=user).count(),
+            'relationships': StakeholderRelationship.objects.filter(created_by=user).count(),
+            'iterations': options['iterations'],
+            'warmup': options['warmup'],
+            'cold': options['cold'],
+            'database': connection.vendor,
+            'cache': settings.CACHES['default']['BACKEND'].rsplit('.', 1)[-1],
+            'python': platform.python_version(),
+            'django': django.get_version(),
+        }
+
+    def print_comparison(self, baseline, results):
+        self.stdout.write(self.style.MIGRATE_HEADING('Change from baseline'))
+        for name, result in results.items():
+            before = baseline.get(name)
+            if not before:
+                self.stdout.write(f'  {name}: not in baseline')
+                continue
+            changes = []
+            for key in ('p50_ms', 'p95_ms', 'queries'):
+                old, new = before.get(key), result[key]
+                if not old:
+                    changes.append(f'{key} {new}')
+                    continue
+                percent = (new - old) / old * 100
+                changes.append(f'{key} {old} -> {new} ({percent:+.0f}%)')
+            self.stdout.write(f'  {name}: ' + ', '.join(changes))
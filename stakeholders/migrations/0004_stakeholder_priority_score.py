@@ -0,0 +1,41 @@
+# Generated by Django 5.2.3 on 2026-10-17 03:22
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Case, When, Value
+
+
+def backfill_priority_score(apps, schema_editor):
+    """Populate priority_score for existing rows with a single UPDATE"""
+    Stakeholder = apps.get_model('stakeholders', 'Stakeholder')
+    scores = {'low': 1, 'medium': 2, 'high': 3, 'very_high': 4}
+
+    def score(field_name):
+        return Case(
+            *[When(**{field_name: level}, then=Value(value)) for level, value in scores.items()],
+            default=Value(2),
+            output_field=models.PositiveSmallIntegerField()
+        )
+
+    Stakeholder.objects.update(priority_score=score('influence') * score('interest'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stakeholders', '0003_demosession'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stakeholder',
+            name='priority_score',
+            field=models.PositiveSmallIntegerField(default=4, editable=False, help_text='Influence score multiplied by interest score (1-16)'),
+        ),
+        migrations.RunPython(backfill_priority_score, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='stakeholder',
+            index=models.Index(fields=['created_by', 'priority_score'], name='stakeholder_user_priority_idx'),
+        ),
+    ]
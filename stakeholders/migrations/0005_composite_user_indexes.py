@@ -0,0 +1,55 @@
+# Generated by Django 5.2.3 on 2026-10-17 03:26
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stakeholders', '0004_stakeholder_priority_score'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='stakeholder',
+            name='stakeholder_user_priority_idx',
+        ),
+        migrations.AddIndex(
+            model_name='engagement',
+            index=models.Index(fields=['created_by', 'status', 'scheduled_date'], name='engagement_user_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='engagement',
+            index=models.Index(fields=['created_by', 'scheduled_date'], name='engagement_user_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='engagement',
+            index=models.Index(fields=['created_by', 'type'], name='engagement_user_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='engagement',
+            index=models.Index(fields=['stakeholder', 'scheduled_date'], name='engagement_sh_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stakeholder',
+            index=models.Index(fields=['created_by', '-priority_score', '-updated_at'], name='stakeholder_user_prio_upd_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stakeholder',
+            index=models.Index(fields=['created_by', '-updated_at'], name='stakeholder_user_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stakeholder',
+            index=models.Index(fields=['created_by', 'influence', 'interest'], name='stakeholder_user_infl_int_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stakeholder',
+            index=models.Index(fields=['created_by', 'category'], name='stakeholder_user_category_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stakeholder',
+            index=models.Index(fields=['created_by', 'name'], name='stakeholder_user_name_idx'),
+        ),
+    ]
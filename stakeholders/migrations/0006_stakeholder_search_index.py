@@ -0,0 +1,25 @@
+from django.db import migrations
+
+
+def install_search_index(apps, schema_editor):
+    from stakeholders.search import install_search_index, rebuild_search_index
+
+    if install_search_index(schema_editor.connection):
+        rebuild_search_index(schema_editor.connection)
+
+
+def uninstall_search_index(apps, schema_editor):
+    from stakeholders.search import uninstall_search_index
+
+    uninstall_search_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stakeholders', '0005_composite_user_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_search_index, uninstall_search_index),
+    ]
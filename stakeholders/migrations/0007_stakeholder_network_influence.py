@@ -0,0 +1,33 @@
+# Generated by Django 5.2.3 on 2026-10-17 04:20
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stakeholders', '0006_stakeholder_search_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stakeholder',
+            name='network_influence',
+            field=models.FloatField(default=0, editable=False, help_text='Own influence score plus influence passed on by related stakeholders'),
+        ),
+        migrations.AddField(
+            model_name='stakeholder',
+            name='network_influence_stale',
+            field=models.BooleanField(default=True, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='stakeholder',
+            index=models.Index(fields=['created_by', '-network_influence', '-id'], name='stakeholder_user_network_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stakeholder',
+            index=models.Index(condition=models.Q(('network_influence_stale', True)), fields=['created_by'], name='stakeholder_user_stale_idx'),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.3 on 2026-10-17 04:33
+
+from itertools import groupby
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from stakeholders.stats import summarize
+
+
+def backfill_engagement_stats(apps, schema_editor):
+    """Compute stats for every stakeholder with engagements in one ordered pass over the engagements"""
+    Engagement = apps.get_model('stakeholders', 'Engagement')
+    StakeholderEngagementStats = apps.get_model('stakeholders', 'StakeholderEngagementStats')
+    rows = (
+        Engagement.objects.order_by('stakeholder_id', 'scheduled_date', 'id')
+        .values_list('stakeholder_id', 'status', 'scheduled_date', 'effectiveness_rating', 'sentiment')
+    )
+    batch = []
+    for stakeholder_id, group in groupby(rows.iterator(chunk_size=5000), key=lambda row: row[0]):
+        batch.append(StakeholderEngagementStats(
+            stakeholder_id=stakeholder_id, **summarize(row[1:] for row in group)
+        ))
+        if len(batch) >= 1000:
+            StakeholderEngagementStats.objects.bulk_create(batch)
+            batch = []
+    StakeholderEngagementStats.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stakeholders', '0007_stakeholder_network_influence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StakeholderEngagementStats',
+            fields=[
+                ('stakeholder', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='engagement_stats', serialize=False, to='stakeholders.stakeholder')),
+                ('total_count', models.PositiveIntegerField(default=0)),
+                ('planned_count', models.PositiveIntegerField(default=0)),
+                ('completed_count', models.PositiveIntegerField(default=0)),
+                ('cancelled_count', models.PositiveIntegerField(default=0)),
+                ('postponed_count', models.PositiveIntegerField(default=0)),
+                ('last_contact_at', models.DateTimeField(blank=True, null=True)),
+                ('next_planned_at', models.DateTimeField(blank=True, null=True)),
+                ('rating_count', models.PositiveIntegerField(default=0)),
+                ('rating_total', models.PositiveIntegerField(default=0)),
+                ('positive_count', models.PositiveIntegerField(default=0)),
+                ('neutral_count', models.PositiveIntegerField(default=0)),
+                ('negative_count', models.PositiveIntegerField(default=0)),
+                ('sentiment_trend', models.FloatField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'stakeholder engagement stats',
+            },
+        ),
+        migrations.RunPython(backfill_engagement_stats, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,135 @@
 from django.db import models
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator, MaxValueValidator
+from datetime import datetime, timezone as dt_timezone
+
+from django.db.models import Case, F, When, Value
+from django.db.models.functions import Coalesce
+from django.db.models.lookups import Exact
+from django.utils import timezone
+
+# Numeric scale shared by influence and interest levels
+LEVEL_SCORES = {'low': 1, 'medium': 2, 'high': 3, 'very_high': 4}
+
+# Stakeholders at or above this priority score (max 16: 4*4) count as high priority
+HIGH_PRIORITY_THRESHOLD = 12
+
+# Engagement sentiment on a -1..1 scale, for the sentiment trend
+SENTIMENT_SCORES = {'positive': 1, 'neutral': 0, 'negative': -1}
+
+# A sentiment trend at least this far from zero counts as improving or declining
+SENTIMENT_TREND_THRESHOLD = 0.25
+
+# Sort stand-ins for stakeholders without engagement stats: never contacted sorts as
+# the longest ago, and no sentiment trend after every real trend (which lie in -2..2)
+NEVER_CONTACTED = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+NO_SENTIMENT_TREND = 3.0
+
+
+def level_score_expression(level):
+    """
+    Database expression mapping an influence/interest level to its numeric
+    score: a literal level or an expression such as F('influence')
+    """
+    if isinstance(level, str):
+        return Value(LEVEL_SCORES.get(level, LEVEL_SCORES['medium']))
+    return Case(
+        *[When(Exact(level, Value(name)), then=Value(score)) for name, score in LEVEL_SCORES.items()],
+        default=Value(LEVEL_SCORES['medium']),
+        output_field=models.PositiveSmallIntegerField()
+    )
+
+
+def priority_score_expression(influence=F('influence'), interest=F('interest')):
+    """
+    Database expression computing the priority score.
+    Pass the new influence/interest (a literal level or an expression) to score
+    an UPDATE with them, since its SET clauses all see the row's old values.
+    """
+    influence_expr = level_score_expression(influence)
+    interest_expr = level_score_expression(interest)
+    return models.ExpressionWrapper(
+        influence_expr * interest_expr,
+        output_field=models.PositiveSmallIntegerField()
+    )
+
+
+class StakeholderQuerySet(models.QuerySet):
+    """QuerySet that keeps the stored priority_score in sync on bulk writes"""
+
+    # Columns rendered by the stakeholder cards; the large free-text fields are left out
+    LIST_FIELDS = (
+        'id', 'name', 'title', 'organization', 'email', 'influence', 'interest', 'category',
+        'description', 'priority_score', 'network_influence', 'created_at', 'updated_at',
+    )
+
+    def for_user(self, user):
+        return self.filter(created_by=user)
+
+    def for_list(self):
+        return self.only(*self.LIST_FIELDS)
+
+    def for_choices(self):
+        """Just enough to render a stakeholder <select>"""
+        return self.only('id', 'name').order_by('name')
+
+    def high_priority(self):
+        return self.filter(priority_score__gte=HIGH_PRIORITY_THRESHOLD)
+
+    def by_priority(self):
+        return self.order_by('-priority_score', '-updated_at')
+
+    def by_network_influence(self):
+        return self.order_by('-network_influence', '-id')
+
+    def with_engagement_stats(self):
+        """Annotate the stored last contact date and sentiment trend (a join; engagements aren't read)"""
+        return self.annotate(
+            last_contact_at=F('engagement_stats__last_contact_at'),
+            sentiment_trend=F('engagement_stats__sentiment_trend'),
+        )
+
+    def by_last_contact(self):
+        """Longest since last contact first, starting with stakeholders never contacted"""
+        return self.annotate(
+            contact_order=Coalesce('engagement_stats__last_contact_at', Value(NEVER_CONTACTED))
+        ).order_by('contact_order', 'id')
+
+    def by_sentiment_trend(self):
+        """Most declining sentiment first; stakeholders without a trend last"""
+        return self.annotate(
+            trend_order=Coalesce('engagement_stats__sentiment_trend', Value(NO_SENTIMENT_TREND))
+        ).order_by('trend_order', 'id')
+
+    def update(self, **kwargs):
+        if ('influence' in kwargs or 'interest' in kwargs) and 'priority_score' not in kwargs:
+            kwargs['priority_score'] = priority_score_expression(
+                kwargs.get('influence', F('influence')), kwargs.get('interest', F('interest'))
+            )
+        if 'influence' in kwargs:
+            kwargs.setdefault('network_influence_stale', True)
+        return super().update(**kwargs)
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        for obj in objs:
+            obj.priority_score = obj.compute_priority_score()
+        return super().bulk_create(objs, *args, **kwargs)
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        fields = list(fields)
+        if ('influence' in fields or 'interest' in fields) and 'priority_score' not in fields:
+            objs = list(objs)
+            for obj in objs:
+                obj.priority_score = obj.compute_priority_score()
+            fields.append('priority_score')
+        if 'influence' in fields and 'network_influence_stale' not in fields:
+            objs = list(objs)
+            for obj in objs:
+                obj.network_influence_stale = True
+            fields.append('network_influence_stale')
+        return super().bulk_update(objs, fields, *args, **kwargs)
+
 
 class Stakeholder(models.Model):
     INFLUENCE_CHOICES = [
@@ -48,33 +177,101 @@ class Stakeholder(models.Model):
     notes = models.TextField(blank=True)
     ai_generated_insights = models.TextField(blank=True, help_text="AI-generated insights about this stakeholder")
     
+    # Derived from influence * interest, stored so it can be filtered and sorted in SQL
+    priority_score = models.PositiveSmallIntegerField(
+        default=4,
+        editable=False,
+        help_text="Influence score multiplied by interest score (1-16)"
+    )
+    
+    # Influence propagated along relationships (see influence.py); stale rows are
+    # recomputed, with the rest of their network, by refresh_network_influence()
+    network_influence = models.FloatField(
+        default=0,
+        editable=False,
+        help_text="Own influence score plus influence passed on by related stakeholders"
+    )
+    network_influence_stale = models.BooleanField(default=True, editable=False)
+    
     # Tracking
     created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='stakeholders')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = StakeholderQuerySet.as_manager()
+    
     class Meta:
         ordering = ['-updated_at']
+        indexes = [
+            models.Index(fields=['created_by', '-priority_score', '-updated_at'], name='stakeholder_user_prio_upd_idx'),
+            models.Index(fields=['created_by', '-updated_at'], name='stakeholder_user_updated_idx'),
+            models.Index(fields=['created_by', 'influence', 'interest'], name='stakeholder_user_infl_int_idx'),
+            models.Index(fields=['created_by', 'category'], name='stakeholder_user_category_idx'),
+            models.Index(fields=['created_by', 'name'], name='stakeholder_user_name_idx'),
+            models.Index(fields=['created_by', '-network_influence', '-id'], name='stakeholder_user_network_idx'),
+            models.Index(
+                fields=['created_by'],
+                condition=models.Q(network_influence_stale=True),
+                name='stakeholder_user_stale_idx',
+            ),
+        ]
     
     def __str__(self):
         return f"{self.name} - {self.organization}"
     
+    def save(self, *args, **kwargs):
+        self.priority_score = self.compute_priority_score()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'influence' in update_fields:
+            self.network_influence_stale = True
+        if update_fields is not None and ('influence' in update_fields or 'interest' in update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'priority_score'}
+            if 'influence' in update_fields:
+                kwargs['update_fields'].add('network_influence_stale')
+        super().save(*args, **kwargs)
+    
     @property
     def influence_score(self):
         """Convert influence to numeric score for calculations"""
-        scores = {'low': 1, 'medium': 2, 'high': 3, 'very_high': 4}
-        return scores.get(self.influence, 2)
+        return LEVEL_SCORES.get(self.influence, 2)
     
     @property
     def interest_score(self):
         """Convert interest to numeric score for calculations"""
-        scores = {'low': 1, 'medium': 2, 'high': 3, 'very_high': 4}
-        return scores.get(self.interest, 2)
+        return LEVEL_SCORES.get(self.interest, 2)
     
-    @property
-    def priority_score(self):
+    def compute_priority_score(self):
         """Calculate priority based on influence and interest"""
         return self.influence_score * self.interest_score
+    
+    @property
+    def is_high_priority(self):
+        return self.priority_score >= HIGH_PRIORITY_THRESHOLD
+
+
+class EngagementQuerySet(models.QuerySet):
+    # Columns rendered by engagement tables, plus the related stakeholder's name
+    LIST_FIELDS = (
+        'id', 'title', 'type', 'status', 'scheduled_date', 'description',
+        'stakeholder', 'stakeholder__id', 'stakeholder__name',
+    )
+
+    def for_user(self, user):
+        return self.filter(created_by=user)
+
+    def with_stakeholder(self):
+        return self.select_related('stakeholder')
+
+    def for_list(self):
+        return self.select_related('stakeholder').only(*self.LIST_FIELDS)
+
+
+class StakeholderRelationshipQuerySet(models.QuerySet):
+    def involving(self, stakeholder):
+        """Relationships in either direction, with both ends loaded"""
+        return self.filter(
+            models.Q(from_stakeholder=stakeholder) | models.Q(to_stakeholder=stakeholder)
+        ).select_related('from_stakeholder', 'to_stakeholder')
 
 
 class Engagement(models.Model):
@@ -135,13 +332,103 @@ class Engagement(models.Model):
     # Tracking
     created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='engagements')
     created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    objects = EngagementQuerySet.as_manager()
+    
     class Meta:
         ordering = ['scheduled_date']  # Nearest dates first (ascending order)
+        indexes = [
+            # Upcoming/overdue lookups: created_by + status='planned' + date range
+            models.Index(fields=['created_by', 'status', 'scheduled_date'], name='engagement_user_status_idx'),
+            models.Index(fields=['created_by', 'scheduled_date'], name='engagement_user_date_idx'),
+            models.Index(fields=['created_by', 'type'], name='engagement_user_type_idx'),
+            models.Index(fields=['stakeholder', 'scheduled_date'], name='engagement_sh_date_idx'),
+        ]
     
     def __str__(self):
         return f"{self.title} - {self.stakeholder.name} ({self.scheduled_date.strftime('%Y-%m-%d')})"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remembered so moving an engagement to another stakeholder refreshes both of their stats
+        instance._loaded_stakeholder_id = instance.__dict__.get('stakeholder_id')
+        return instance
+
+
+class StakeholderEngagementStats(models.Model):
+    """
+    Engagement aggregates for one stakeholder, so lists can show and sort by
+    them without reading the engagement table. Kept up to date by the
+    engagement save/delete signals and by bulk writers (stats.py); the
+    reconcile_engagement_stats command repairs any drift. Stakeholders
+    without engagements have no row.
+    """
+    stakeholder = models.OneToOneField(
+        Stakeholder, on_delete=models.CASCADE, primary_key=True, related_name='engagement_stats'
+    )
+
+    # Engagements by status
+    total_count = models.PositiveIntegerField(default=0)
+    planned_count = models.PositiveIntegerField(default=0)
+    completed_count = models.PositiveIntegerField(default=0)
+    cancelled_count = models.PositiveIntegerField(default=0)
+    postponed_count = models.PositiveIntegerField(default=0)
+
+    # Latest completed engagement and earliest planned one (in the past when overdue)
+    last_contact_at = models.DateTimeField(null=True, blank=True)
+    next_planned_at = models.DateTimeField(null=True, blank=True)
+
+    # Effectiveness ratings, kept as a sum so the average stays exact
+    rating_count = models.PositiveIntegerField(default=0)
+    rating_total = models.PositiveIntegerField(default=0)
+
+    # Sentiment mix, and the average sentiment of the latest rated engagements
+    # minus that of the ones before them (-2..2; positive means improving)
+    positive_count = models.PositiveIntegerField(default=0)
+    neutral_count = models.PositiveIntegerField(default=0)
+    negative_count = models.PositiveIntegerField(default=0)
+    sentiment_trend = models.FloatField(null=True, blank=True)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = 'stakeholder engagement stats'
+
+    def __str__(self):
+        return f"Engagement stats for stakeholder {self.stakeholder_id}"
+
+    @property
+    def average_rating(self):
+        return self.rating_total / self.rating_count if self.rating_count else None
+
+    @property
+    def days_since_last_contact(self):
+        return days_since(self.last_contact_at)
+
+    @property
+    def sentiment_direction(self):
+        return sentiment_direction(self.sentiment_trend)
+
+
+def days_since(moment):
+    """Whole days from ``moment`` until now, or None"""
+    if moment is None:
+        return None
+    return max((timezone.now() - moment).days, 0)
+
+
+def sentiment_direction(trend):
+    """'improving', 'declining' or 'steady' for a sentiment trend; None when there isn't one"""
+    if trend is None:
+        return None
+    if trend >= SENTIMENT_TREND_THRESHOLD:
+        return 'improving'
+    if trend <= -SENTIMENT_TREND_THRESHOLD:
+        return 'declining'
+    return 'steady'
+
 
 class StakeholderRelationship(models.Model):
     """Track relationships between stakeholders"""
@@ -176,6 +463,8 @@ class StakeholderRelationship(models.Model):
     created_by = models.ForeignKey(User, on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
     
+    objects = StakeholderRelationshipQuerySet.as_manager()
+    
     class Meta:
         unique_together = ['from_stakeholder', 'to_stakeholder', 'relationship_type']
     
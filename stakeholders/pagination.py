@@ -0,0 +1,197 @@
+"""
+Keyset (cursor) pagination for the list views.
+
+Page-number pagination needs a COUNT(*) and an OFFSET scan that grows with
+the page number. Keyset pagination instead remembers the sort key of the last
+row shown and asks for rows after it, which an index can answer directly no
+matter how deep the page is.
+
+A listing is described as one or more *segments*: querysets traversed in
+order, each sorted by the same key fields. engagement_list uses two segments
+(upcoming, then past) so its "upcoming first" ordering needs no computed
+column. Cursors are signed, so clients can't forge or tamper with them, and
+record the sort keys they were made for: a cursor replayed against another
+ordering (or a tampered, expired or malformed one) starts from the first page.
+"""
+from django.core import signing
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+CURSOR_SALT = 'stakeholders.pagination.cursor'
+
+# Approximate counts stop counting past this many rows
+APPROXIMATE_COUNT_LIMIT = 1000
+
+
+def encode_cursor(segment, values, keys):
+    return signing.dumps([segment, values, list(keys)], salt=CURSOR_SALT, compress=True)
+
+
+def decode_cursor(token, keys):
+    """
+    Return (segment, values) or None if the token is missing, invalid or was
+    made for an ordering other than ``keys``
+    """
+    if not token:
+        return None
+    try:
+        segment, values, token_keys = signing.loads(token, salt=CURSOR_SALT)
+    except (signing.BadSignature, ValueError, TypeError):
+        return None
+    if token_keys != list(keys) or not isinstance(segment, int) or not isinstance(values, list):
+        return None
+    if len(values) != len(token_keys):
+        return None
+    return segment, values
+
+
+def keyset_filter(keys, values, forward=True):
+    """
+    Q object selecting rows strictly after (or before) the given key values
+    in the order described by ``keys`` (field names, '-' prefix for descending).
+    """
+    condition = Q()
+    equal = Q()
+    for key, value in zip(keys, values):
+        field = key.lstrip('-')
+        descending = key.startswith('-')
+        lookup = 'lt' if descending == forward else 'gt'
+        condition |= equal & Q(**{f'{field}__{lookup}': value})
+        equal &= Q(**{field: value})
+    return condition
+
+
+def reverse_keys(keys):
+    return [key[1:] if key.startswith('-') else f'-{key}' for key in keys]
+
+
+def approximate_count(queryset, limit=APPROXIMATE_COUNT_LIMIT):
+    """
+    Cheap row count: exact up to ``limit`` rows, after which it returns
+    ``limit`` and reports the count as truncated.
+    """
+    count = queryset.order_by()[:limit + 1].count()
+    return min(count, limit), count > limit
+
+
+class CursorPage:
+    """A page of results, iterable like django.core.paginator.Page"""
+
+    is_cursor = True
+
+    def __init__(self, object_list, next_cursor, previous_cursor, count=None, count_truncated=False):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.count = count
+        self.count_truncated = count_truncated
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """
+    Paginate segments of a listing by keyset.
+
+    ``keys`` must end in a unique field (normally ``id``) so every row has a
+    distinct position.
+    """
+
+    def __init__(self, segments, keys, per_page):
+        self.segments = list(segments)
+        self.keys = list(keys)
+        self.per_page = per_page
+
+    def key_values(self, obj):
+        return [getattr(obj, key.lstrip('-')) for key in self.keys]
+
+    def segment_queryset(self, segment, values=None, forward=True):
+        """A segment in keyset order, from the rows after (or before) ``values`` when given"""
+        queryset = self.segments[segment].order_by(*(self.keys if forward else reverse_keys(self.keys)))
+        if values is not None:
+            queryset = queryset.filter(keyset_filter(self.keys, values, forward))
+        return queryset
+
+    def _collect(self, start_segment, values, forward):
+        """Fetch up to per_page + 1 (segment, row) pairs walking from a position"""
+        step = 1 if forward else -1
+        rows = []
+        segment = start_segment
+        while 0 <= segment < len(self.segments) and len(rows) <= self.per_page:
+            queryset = self.segment_queryset(segment, values if segment == start_segment else None, forward)
+            remaining = self.per_page + 1 - len(rows)
+            rows.extend((segment, obj) for obj in queryset[:remaining])
+            segment += step
+        return rows
+
+    def _cursor(self, segment, obj):
+        return encode_cursor(segment, [
+            value.isoformat() if hasattr(value, 'isoformat') else value
+            for value in self.key_values(obj)
+        ], self.keys)
+
+    def get_page(self, after=None, before=None, count=False):
+        position = decode_cursor(before, self.keys)
+        if position is not None:
+            forward = False
+        else:
+            forward = True
+            position = decode_cursor(after, self.keys)
+
+        rows = None
+        if position is not None and 0 <= position[0] < len(self.segments):
+            segment, values = position
+            try:
+                rows = self._collect(segment, values, forward)
+            except ValidationError:
+                # Values the key fields can't hold
+                forward = True
+            else:
+                has_more, has_previous = len(rows) > self.per_page, True
+        if rows is None:
+            forward = True
+            rows = self._collect(0, None, forward=True)
+            has_more, has_previous = len(rows) > self.per_page, False
+
+        rows = rows[:self.per_page]
+        if forward:
+            has_next = has_more
+        else:
+            # Walking backwards: extra rows mean there is still an earlier page
+            rows.reverse()
+            has_next, has_previous = True, has_more
+
+        next_cursor = self._cursor(*rows[-1]) if rows and has_next else None
+        previous_cursor = self._cursor(*rows[0]) if rows and has_previous else None
+
+        total, truncated = None, False
+        if count:
+            total, truncated = 0, False
+            for queryset in self.segments:
+                segment_count, segment_truncated = approximate_count(queryset)
+                total += segment_count
+                truncated = truncated or segment_truncated
+
+        return CursorPage(
+            [obj for _segment, obj in rows],
+            next_cursor,
+            previous_cursor,
+            count=total,
+            count_truncated=truncated,
+        )
@@ -0,0 +1,111 @@
+"""
+Deleting all of a user's data (clearing demo data, regenerating benchmark
+tenants).
+
+The ORM's ``Stakeholder.objects.filter(...).delete()`` loads every
+stakeholder, engagement and relationship into Python to run the cascade
+collector and send delete signals. Here rows are removed with plain
+``DELETE`` statements in dependency order (relationships, engagements, then
+stakeholders with their engagement stats), a chunk of primary keys at a time
+with each chunk in its own transaction, so memory stays flat and locks are
+held briefly however big the tenant is. The counts come from the row counts of the deletes themselves.
+
+Delete signals are not sent, so the user's dashboard and relationship graph
+caches are bumped here once the purge (or the caller's enclosing transaction) commits. The
+full-text search index is kept in sync by its database triggers.
+"""
+from django.db import connection, transaction
+
+from .cache import bump_versions_on_commit
+from .models import Stakeholder, Engagement, StakeholderRelationship, StakeholderEngagementStats
+from .stats import refresh_engagement_stats
+
+CHUNK_SIZE = 2000
+
+# The dashboard clears tenants with more stakeholders than this in a background
+# job; smaller ones are purged within the request
+BACKGROUND_PURGE_THRESHOLD = 10000
+
+
+def _chunk_size(requested):
+    # Each statement binds one parameter per primary key
+    limit = connection.features.max_query_params
+    return max(1, min(requested, limit - 1 if limit else requested))
+
+
+def _delete_rows(cursor, model, column, values):
+    """``DELETE FROM <table> WHERE <column> IN (values)``; returns the number of rows deleted"""
+    quote = connection.ops.quote_name
+    placeholders = ', '.join(['%s'] * len(values))
+    cursor.execute(
+        f'DELETE FROM {quote(model._meta.db_table)} WHERE {quote(column)} IN ({placeholders})',
+        list(values),
+    )
+    return cursor.rowcount
+
+
+def _purge_owned(model, user_id, chunk_size, dependents=(), collect=None):
+    """
+    Delete ``model`` rows created by the user, chunk by chunk. ``dependents``
+    are (model, column) pairs whose rows point at a chunk and must go first.
+    The values of the ``collect`` column of deleted rows are added to the
+    ``collected`` set. Returns ({model: rows deleted}, collected).
+    """
+    deleted = {model: 0}
+    deleted.update((dependent, 0) for dependent, _column in dependents)
+    collected = set()
+    while True:
+        rows = model._default_manager.filter(created_by_id=user_id).order_by('pk')
+        if collect:
+            rows = list(rows.values_list('pk', collect)[:chunk_size])
+            ids = [pk for pk, _value in rows]
+            collected.update(value for _pk, value in rows)
+        else:
+            ids = list(rows.values_list('pk', flat=True)[:chunk_size])
+        if not ids:
+            return deleted, collected
+        with transaction.atomic(), connection.cursor() as cursor:
+            for dependent, column in dependents:
+                deleted[dependent] += _delete_rows(cursor, dependent, column, ids)
+            deleted[model] += _delete_rows(cursor, model, 'id', ids)
+
+
+def purge_user_data(user_id, chunk_size=CHUNK_SIZE, progress=None):
+    """
+    Delete every stakeholder, engagement and relationship created by the user.
+
+    Engagements and relationships that other users attached to this user's
+    stakeholders are removed with them, as the ORM cascade would. ``progress``
+    is called with a percentage after each step. Returns a dict with the
+    number of ``stakeholders``, ``engagements`` and ``relationships`` deleted.
+    """
+    chunk_size = _chunk_size(chunk_size)
+    counts = {'stakeholders': 0, 'engagements': 0, 'relationships': 0}
+
+    deleted, _ = _purge_owned(StakeholderRelationship, user_id, chunk_size)
+    counts['relationships'] += deleted[StakeholderRelationship]
+    if progress:
+        progress(30)
+
+    deleted, engaged = _purge_owned(Engagement, user_id, chunk_size, collect='stakeholder_id')
+    counts['engagements'] += deleted[Engagement]
+    if progress:
+        progress(60)
+
+    deleted, _ = _purge_owned(Stakeholder, user_id, chunk_size, dependents=(
+        (StakeholderEngagementStats, 'stakeholder_id'),
+        (StakeholderRelationship, 'from_stakeholder_id'),
+        (StakeholderRelationship, 'to_stakeholder_id'),
+        (Engagement, 'stakeholder_id'),
+    ))
+    counts['stakeholders'] += deleted[Stakeholder]
+    counts['engagements'] += deleted[Engagement]
+    counts['relationships'] += deleted[StakeholderRelationship]
+    # Of the stakeholders whose engagements were deleted, only other users' are left;
+    # losing the engagements this user had added to them changed their stats
+    refresh_engagement_stats(engaged)
+    if progress:
+        progress(100)
+
+    bump_versions_on_commit(user_id)
+    return counts
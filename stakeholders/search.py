@@ -0,0 +1,219 @@
+"""
+Full-text search for stakeholders.
+
+On SQLite builds with FTS5, stakeholders are indexed in an external-content
+FTS5 table kept in sync by triggers, so bulk inserts, queryset updates and raw
+SQL are all covered. Other backends (or SQLite without FTS5) fall back to the
+original icontains search.
+
+FTS5 matches whole words and word prefixes, so a fragment from inside a word
+('corp' in 'MegaCorp') matches nothing. When the full-text query finds none
+of the searched stakeholders the icontains condition applies instead, so such
+queries still find what they used to. Both are part of the same query.
+
+The MATCH is run once per query and its rows looked up by rowid, never once
+per stakeholder, so the cost grows with the number of matches rather than
+with its square.
+"""
+import re
+
+from django.db import connections
+from django.db.models import Exists, Q
+from django.db.models.expressions import RawSQL
+
+STAKEHOLDER_TABLE = 'stakeholders_stakeholder'
+FTS_TABLE = 'stakeholders_stakeholder_fts'
+
+# Indexed columns and their bm25 weights (matches in the name rank highest)
+FTS_COLUMNS = [
+    ('name', 10.0),
+    ('organization', 5.0),
+    ('title', 4.0),
+    ('department', 3.0),
+    ('description', 1.0),
+    ('notes', 1.0),
+    ('ai_generated_insights', 0.5),
+]
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+_availability = {}
+
+
+def _column_list(prefix=''):
+    return ', '.join(f'{prefix}{column}' for column, _weight in FTS_COLUMNS)
+
+
+def fts5_supported(connection):
+    """True when the connection is SQLite compiled with FTS5"""
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA compile_options')
+        return any(row[0] == 'ENABLE_FTS5' for row in cursor.fetchall())
+
+
+def install_search_index(connection):
+    """
+    Create the FTS5 table and sync triggers if they do not exist.
+
+    Safe to run repeatedly. Returns True when the index table was newly
+    created and therefore needs a rebuild.
+    """
+    if not fts5_supported(connection):
+        return False
+
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+        created = cursor.fetchone() is None
+
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+            f"{_column_list()}, content='{STAKEHOLDER_TABLE}', content_rowid='id', "
+            f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        )
+        # SQLite drops triggers when Django remakes the table during a migration,
+        # so these are re-created after every migrate (see signals.py)
+        cursor.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON {STAKEHOLDER_TABLE} BEGIN "
+            f"INSERT INTO {FTS_TABLE}(rowid, {_column_list()}) VALUES (new.id, {_column_list('new.')}); "
+            f"END"
+        )
+        cursor.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON {STAKEHOLDER_TABLE} BEGIN "
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_column_list()}) "
+            f"VALUES ('delete', old.id, {_column_list('old.')}); "
+            f"END"
+        )
+        cursor.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF {_column_list()} "
+            f"ON {STAKEHOLDER_TABLE} BEGIN "
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_column_list()}) "
+            f"VALUES ('delete', old.id, {_column_list('old.')}); "
+            f"INSERT INTO {FTS_TABLE}(rowid, {_column_list()}) VALUES (new.id, {_column_list('new.')}); "
+            f"END"
+        )
+
+    _availability[connection.alias] = True
+    return created
+
+
+def repair_search_index(connection):
+    """
+    Re-create sync triggers lost when a migration remade the stakeholder table,
+    rebuilding the index if any were missing. Does nothing before the index
+    has been installed.
+    """
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+        if cursor.fetchone() is None:
+            return False
+        cursor.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger' AND name LIKE %s",
+            [f'{FTS_TABLE}_%']
+        )
+        if cursor.fetchone()[0] == 3:
+            return False
+    rebuild_search_index(connection)
+    return True
+
+
+def uninstall_search_index(connection):
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for suffix in ('ai', 'ad', 'au'):
+            cursor.execute(f'DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}')
+        cursor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+    _availability.pop(connection.alias, None)
+
+
+def rebuild_search_index(connection, optimize=False):
+    """Re-index every stakeholder from the content table"""
+    install_search_index(connection)
+    with connection.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+        if optimize:
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
+        cursor.execute(f'SELECT COUNT(*) FROM {FTS_TABLE}')
+        return cursor.fetchone()[0]
+
+
+def search_index_available(using='default'):
+    if using not in _availability:
+        connection = connections[using]
+        available = False
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+                available = cursor.fetchone() is not None
+        _availability[using] = available
+    return _availability[using]
+
+
+def build_match_query(search_query):
+    """
+    Turn free text into a safe FTS5 MATCH expression.
+
+    Every word must match, and the last word is treated as a prefix so results
+    update as the user types. FTS5 syntax characters in the input are dropped.
+    """
+    tokens = TOKEN_RE.findall(search_query)
+    if not tokens:
+        return ''
+    terms = [f'"{token}"' for token in tokens[:-1]]
+    terms.append(f'"{tokens[-1]}"*')
+    return ' '.join(terms)
+
+
+def substring_filter(search_query):
+    """Q for the original icontains search over name, organization, title and department"""
+    return (
+        Q(name__icontains=search_query) |
+        Q(organization__icontains=search_query) |
+        Q(title__icontains=search_query) |
+        Q(department__icontains=search_query)
+    )
+
+
+def substring_search(queryset, search_query):
+    return queryset.filter(substring_filter(search_query))
+
+
+def search_stakeholders(queryset, search_query, ranked=True):
+    """
+    Filter a Stakeholder queryset by a free-text query.
+
+    With the FTS index available, results are annotated with ``search_rank``
+    (lower is better) and ordered by it when ``ranked`` is true. Otherwise,
+    or when the full-text query matches none of the queryset's rows, the
+    substring search is used. Either way it is a single query.
+    """
+    if not search_index_available(queryset.db):
+        return substring_search(queryset, search_query)
+
+    match_query = build_match_query(search_query)
+    if not match_query:
+        return substring_search(queryset, search_query)
+
+    # Uncorrelated subqueries: SQLite runs each MATCH once per query
+    matches = RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [match_query])
+    fallback = Q(~Exists(queryset.filter(id__in=matches))) & substring_filter(search_query)
+    if not ranked:
+        return queryset.filter(Q(id__in=matches) | fallback)
+
+    # The ranked matches are computed once and looked up by rowid through an automatic
+    # index; LIMIT keeps SQLite from flattening them into a per-row MATCH
+    weights = ', '.join(str(weight) for _column, weight in FTS_COLUMNS)
+    rank = RawSQL(
+        f'SELECT ranked.score FROM ('
+        f'SELECT rowid AS id, bm25({FTS_TABLE}, {weights}) AS score FROM {FTS_TABLE} '
+        f'WHERE {FTS_TABLE} MATCH %s LIMIT -1'
+        f') AS ranked WHERE ranked.id = {STAKEHOLDER_TABLE}.id',
+        [match_query]
+    )
+    return queryset.annotate(search_rank=rank).filter(
+        Q(search_rank__isnull=False) | fallback
+    ).order_by('search_rank', '-updated_at')
@@ -0,0 +1,109 @@
+import json
+
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .cache import get_dashboard_snapshot
+from .models import Stakeholder, Engagement, HIGH_PRIORITY_THRESHOLD, LEVEL_SCORES
+
+
+class DashboardStats:
+    """
+    Dashboard counters and histograms for a single user.
+
+    Everything is computed with conditional aggregation: one query over the
+    user's stakeholders and one over their engagements, regardless of how many
+    rows the account holds.
+    """
+
+    def __init__(self, user, now=None):
+        self.user = user
+        self.now = now or timezone.now()
+
+    def stakeholder_aggregates(self):
+        aggregates = {
+            'total': Count('id'),
+            'high_priority': Count('id', filter=Q(priority_score__gte=HIGH_PRIORITY_THRESHOLD)),
+        }
+        for field, choices in (
+            ('influence', Stakeholder.INFLUENCE_CHOICES),
+            ('interest', Stakeholder.INTEREST_CHOICES),
+            ('category', Stakeholder.CATEGORY_CHOICES),
+        ):
+            for value, _label in choices:
+                aggregates[f'{field}__{value}'] = Count('id', filter=Q(**{field: value}))
+        return Stakeholder.objects.filter(created_by=self.user).aggregate(**aggregates)
+
+    def engagement_aggregates(self):
+        aggregates = {
+            'total': Count('id'),
+            'upcoming': Count('id', filter=Q(status='planned', scheduled_date__gte=self.now)),
+            'overdue': Count('id', filter=Q(status='planned', scheduled_date__lt=self.now)),
+        }
+        for value, _label in Engagement.TYPE_CHOICES:
+            aggregates[f'type__{value}'] = Count('id', filter=Q(type=value))
+        return Engagement.objects.filter(created_by=self.user).aggregate(**aggregates)
+
+    @staticmethod
+    def histogram(aggregates, field, choices):
+        """Shape counts like values(field).annotate(count=...) output, skipping empty buckets"""
+        return [
+            {field: value, 'count': aggregates[f'{field}__{value}']}
+            for value, _label in choices
+            if aggregates[f'{field}__{value}']
+        ]
+
+    def as_dict(self):
+        """Return all dashboard statistics as a JSON-serializable dict"""
+        stakeholder_stats = self.stakeholder_aggregates()
+        engagement_stats = self.engagement_aggregates()
+
+        return {
+            'total_stakeholders': stakeholder_stats['total'],
+            'total_engagements': engagement_stats['total'],
+            'high_priority_count': stakeholder_stats['high_priority'],
+            'upcoming_engagements_count': engagement_stats['upcoming'],
+            'overdue_engagements_count': engagement_stats['overdue'],
+            'influence_data': self.histogram(stakeholder_stats, 'influence', Stakeholder.INFLUENCE_CHOICES),
+            'interest_data': self.histogram(stakeholder_stats, 'interest', Stakeholder.INTEREST_CHOICES),
+            'category_data': self.histogram(stakeholder_stats, 'category', Stakeholder.CATEGORY_CHOICES),
+            'engagement_types': self.histogram(engagement_stats, 'type', Engagement.TYPE_CHOICES),
+        }
+
+
+def stakeholder_grid_data(user):
+    """Influence/interest grid points for the dashboard's interactive matrix"""
+    return [
+        {
+            'id': stakeholder['id'],
+            'name': stakeholder['name'],
+            'title': stakeholder['title'] or 'N/A',
+            'organization': stakeholder['organization'] or 'N/A',
+            'influence': stakeholder['influence'],
+            'interest': stakeholder['interest'],
+            'influenceScore': LEVEL_SCORES.get(stakeholder['influence'], 1),
+            'interestScore': LEVEL_SCORES.get(stakeholder['interest'], 1),
+            'priorityScore': stakeholder['priority_score'],
+        }
+        for stakeholder in Stakeholder.objects.filter(created_by=user).values(
+            'id', 'name', 'title', 'organization', 'influence', 'interest', 'priority_score'
+        )
+    ]
+
+
+def build_dashboard_snapshot(user):
+    """Statistics plus the pre-serialized JSON blobs the dashboard template embeds"""
+    stats = DashboardStats(user).as_dict()
+    return {
+        'stats': stats,
+        'influence_data': json.dumps(stats['influence_data']),
+        'interest_data': json.dumps(stats['interest_data']),
+        'category_data': json.dumps(stats['category_data']),
+        'engagement_types': json.dumps(stats['engagement_types']),
+        'stakeholders_json': json.dumps(stakeholder_grid_data(user)),
+    }
+
+
+def get_cached_dashboard_snapshot(user):
+    """Dashboard snapshot served from the per-user cache, rebuilt when the user's data changes"""
+    return get_dashboard_snapshot(user.pk, lambda: build_dashboard_snapshot(user))
@@ -0,0 +1,57 @@
+from django.db import connections
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .cache import bump_dashboard_version, bump_graph_version
+from .models import Stakeholder, Engagement, StakeholderRelationship
+from .search import repair_search_index
+from .stats import refresh_engagement_stats
+
+
+@receiver(post_save, sender=Stakeholder)
+@receiver(post_delete, sender=Stakeholder)
+@receiver(post_save, sender=Engagement)
+@receiver(post_delete, sender=Engagement)
+@receiver(post_save, sender=StakeholderRelationship)
+@receiver(post_delete, sender=StakeholderRelationship)
+def invalidate_dashboard_snapshot(sender, instance, **kwargs):
+    """Any change to a user's data invalidates their cached dashboard"""
+    if instance.created_by_id:
+        bump_dashboard_version(instance.created_by_id)
+
+
+@receiver(post_save, sender=Stakeholder)
+@receiver(post_delete, sender=Stakeholder)
+@receiver(post_save, sender=StakeholderRelationship)
+@receiver(post_delete, sender=StakeholderRelationship)
+def invalidate_relationship_graph(sender, instance, created=False, **kwargs):
+    """New or removed stakeholders and any relationship change invalidate the user's graph"""
+    if sender is Stakeholder and kwargs.get('signal') is post_save and not created:
+        return
+    if instance.created_by_id:
+        bump_graph_version(instance.created_by_id)
+
+
+@receiver(post_save, sender=StakeholderRelationship)
+@receiver(post_delete, sender=StakeholderRelationship)
+def mark_network_influence_stale(sender, instance, **kwargs):
+    """Both ends of a changed relationship need their network influence recomputed"""
+    Stakeholder.objects.filter(
+        pk__in=[instance.from_stakeholder_id, instance.to_stakeholder_id]
+    ).update(network_influence_stale=True)
+
+
+@receiver(post_save, sender=Engagement)
+@receiver(post_delete, sender=Engagement)
+def update_engagement_stats(sender, instance, origin=None, **kwargs):
+    """Recompute the engagement stats of the stakeholder (and of the previous one, if it moved)"""
+    # Deleting a stakeholder deletes their engagements and their stats row with them
+    if isinstance(origin, Stakeholder) or getattr(origin, 'model', None) is Stakeholder:
+        return
+    refresh_engagement_stats({instance.stakeholder_id, getattr(instance, '_loaded_stakeholder_id', None)})
+    instance._loaded_stakeholder_id = instance.stakeholder_id
+
+
+def repair_search_index_after_migrate(sender, using, **kwargs):
+    """Restore full-text search triggers dropped by SQLite table rebuilds"""
+    repair_search_index(connections[using])
@@ -0,0 +1,156 @@
+"""
+Per-stakeholder engagement statistics (StakeholderEngagementStats).
+
+A stakeholder's stats are recomputed from their engagements whenever one of
+them is saved or deleted (signals.py): an indexed read of that stakeholder's
+engagements, a read of the stored row and an upsert, however many
+engagements the user has. Bulk writers that skip signals (imports, the
+benchmark generators) call refresh_engagement_stats() for the stakeholders
+they touched, or create_engagement_stats() for brand new ones (bulk_load),
+and reconcile_engagement_stats() recomputes every row to repair drift from
+writes that bypassed both, such as raw SQL.
+
+Rows are only written when they changed, so refreshing stakeholders whose
+stats are already right costs two reads.
+"""
+from contextlib import nullcontext
+from itertools import groupby
+
+from django.db import connection, transaction
+
+from .models import Engagement, Stakeholder, StakeholderEngagementStats, SENTIMENT_SCORES
+
+# Rated engagements compared by the sentiment trend: the latest this many against the ones before them
+SENTIMENT_TREND_WINDOW = 3
+
+STATS_FIELDS = [
+    'total_count', 'planned_count', 'completed_count', 'cancelled_count', 'postponed_count',
+    'last_contact_at', 'next_planned_at', 'rating_count', 'rating_total',
+    'positive_count', 'neutral_count', 'negative_count', 'sentiment_trend',
+]
+
+CHUNK_SIZE = 2000
+
+
+def summarize(engagements):
+    """
+    Stats field values for one stakeholder's engagements, given as
+    (status, scheduled_date, effectiveness_rating, sentiment) rows in
+    scheduled date order.
+    """
+    stats = dict.fromkeys(STATS_FIELDS, 0)
+    stats.update(last_contact_at=None, next_planned_at=None, sentiment_trend=None)
+    scores = []
+    for status, scheduled_date, rating, sentiment in engagements:
+        stats['total_count'] += 1
+        if f'{status}_count' in stats:
+            stats[f'{status}_count'] += 1
+        if status == 'completed':
+            stats['last_contact_at'] = scheduled_date
+        elif status == 'planned' and stats['next_planned_at'] is None:
+            stats['next_planned_at'] = scheduled_date
+        if rating is not None:
+            stats['rating_count'] += 1
+            stats['rating_total'] += rating
+        if sentiment in SENTIMENT_SCORES:
+            stats[f'{sentiment}_count'] += 1
+            scores.append(SENTIMENT_SCORES[sentiment])
+
+    recent = scores[-SENTIMENT_TREND_WINDOW:]
+    earlier = scores[-2 * SENTIMENT_TREND_WINDOW:-SENTIMENT_TREND_WINDOW]
+    if recent and earlier:
+        stats['sentiment_trend'] = sum(recent) / len(recent) - sum(earlier) / len(earlier)
+    return stats
+
+
+def _chunk_size(requested):
+    # The engagement read binds one parameter per stakeholder
+    limit = connection.features.max_query_params
+    return max(1, min(requested, limit - 1 if limit else requested))
+
+
+def _refresh_chunk(stakeholder_ids):
+    rows = (
+        Engagement.objects.filter(stakeholder_id__in=stakeholder_ids)
+        .order_by('stakeholder_id', 'scheduled_date', 'id')
+        .values_list('stakeholder_id', 'status', 'scheduled_date', 'effectiveness_rating', 'sentiment')
+    )
+    computed = {
+        stakeholder_id: summarize(row[1:] for row in group)
+        for stakeholder_id, group in groupby(rows.iterator(chunk_size=5000), key=lambda row: row[0])
+    }
+    stored = {
+        row[0]: dict(zip(STATS_FIELDS, row[1:]))
+        for row in StakeholderEngagementStats.objects.filter(stakeholder_id__in=stakeholder_ids)
+        .values_list('stakeholder_id', *STATS_FIELDS)
+    }
+
+    changed = [
+        StakeholderEngagementStats(stakeholder_id=stakeholder_id, **stats)
+        for stakeholder_id, stats in computed.items()
+        if stored.get(stakeholder_id) != stats
+    ]
+    # Stakeholders left without engagements lose their row
+    emptied = [stakeholder_id for stakeholder_id in stored if stakeholder_id not in computed]
+    with transaction.atomic() if changed and emptied else nullcontext():
+        if emptied:
+            StakeholderEngagementStats.objects.filter(stakeholder_id__in=emptied).delete()
+        if changed:
+            StakeholderEngagementStats.objects.bulk_create(
+                changed,
+                update_conflicts=True,
+                unique_fields=['stakeholder'],
+                update_fields=STATS_FIELDS + ['updated_at'],
+            )
+    return len(changed) + len(emptied)
+
+
+def refresh_engagement_stats(stakeholder_ids, chunk_size=CHUNK_SIZE):
+    """Recompute the stats of the given stakeholders; returns how many rows changed"""
+    ids = sorted({pk for pk in stakeholder_ids if pk is not None})
+    chunk_size = _chunk_size(chunk_size)
+    return sum(_refresh_chunk(ids[start:start + chunk_size]) for start in range(0, len(ids), chunk_size))
+
+
+def create_engagement_stats(engagements, batch_size=1000):
+    """
+    Insert stats for stakeholders that had no engagements before these
+    (saved) Engagement instances, computed without reading anything back.
+    """
+    rows = sorted(
+        (engagement.stakeholder_id, engagement.scheduled_date, engagement.pk,
+         engagement.status, engagement.effectiveness_rating, engagement.sentiment)
+        for engagement in engagements
+    )
+    StakeholderEngagementStats.objects.bulk_create(
+        [
+            StakeholderEngagementStats(
+                stakeholder_id=stakeholder_id,
+                **summarize((row[3], row[1], row[4], row[5]) for row in group)
+            )
+            for stakeholder_id, group in groupby(rows, key=lambda row: row[0])
+        ],
+        batch_size=batch_size,
+    )
+
+
+def reconcile_engagement_stats(user_id=None, chunk_size=CHUNK_SIZE):
+    """
+    Recompute the stats of every stakeholder of the user (of every user by
+    default). Returns (stakeholders checked, rows fixed).
+    """
+    stakeholders = Stakeholder.objects.order_by('id')
+    if user_id is not None:
+        stakeholders = stakeholders.filter(created_by_id=user_id)
+    chunk_size = _chunk_size(chunk_size)
+
+    checked = fixed = 0
+    last_id = 0
+    while True:
+        ids = list(stakeholders.filter(id__gt=last_id).values_list('id', flat=True)[:chunk_size])
+        if not ids:
+            break
+        checked += len(ids)
+        fixed += _refresh_chunk(ids)
+        last_id = ids[-1]
+    return checked, fixed
@@ -0,0 +1,102 @@
+"""
+Background job handlers for the AI features (run by manage.py run_worker).
+
+The AI handlers call the service methods that raise on errors, so a failed
+request fails the job and ai_assistant.jobs retries it with backoff instead
+of storing the error text as the result.
+"""
+from ai_assistant.jobs import enqueue, register
+from ai_assistant.models import Job
+from ai_assistant.services import get_gemini_service
+
+from .influence import refresh_network_influence
+from .models import Stakeholder, Engagement, DemoSession
+from .purge import purge_user_data
+
+STAKEHOLDER_PROFILE_JOB = 'stakeholder_profile'
+MEETING_SUMMARY_JOB = 'meeting_summary'
+CLEAR_DATA_JOB = 'clear_data'
+NETWORK_INFLUENCE_JOB = 'network_influence'
+
+
+def available_service():
+    service = get_gemini_service()
+    if not service.is_available():
+        raise RuntimeError('AI service not available')
+    return service
+
+
+def stakeholder_basic_info(stakeholder):
+    return {
+        'name': stakeholder.name,
+        'title': stakeholder.title,
+        'organization': stakeholder.organization,
+        'department': stakeholder.department,
+        'category': stakeholder.category,
+    }
+
+
+@register(STAKEHOLDER_PROFILE_JOB)
+def generate_stakeholder_profile(job):
+    """Fill in a stakeholder's AI insights"""
+    stakeholder = Stakeholder.objects.get(pk=job.payload['stakeholder_id'])
+    job.set_progress(10)
+
+    service = available_service()
+    insights = service.generate_content(service.stakeholder_profile_prompt(stakeholder_basic_info(stakeholder)))
+
+    stakeholder.ai_generated_insights = insights
+    stakeholder.save(update_fields=['ai_generated_insights', 'updated_at'])
+    return {'stakeholder_id': stakeholder.pk, 'insights': insights}
+
+
+@register(MEETING_SUMMARY_JOB)
+def summarize_engagement(job):
+    """Summarize meeting notes and store the analysis on the engagement"""
+    engagement = Engagement.objects.with_stakeholder().get(pk=job.payload['engagement_id'])
+    job.set_progress(10)
+
+    stakeholder_info = {
+        'name': engagement.stakeholder.name,
+        'title': engagement.stakeholder.title,
+        'organization': engagement.stakeholder.organization,
+    }
+    summary_data = available_service().request_meeting_summary(job.payload['meeting_notes'], stakeholder_info)
+
+    engagement.ai_summary = summary_data.get('summary', '')
+    engagement.ai_action_items = summary_data.get('action_items', '')
+    engagement.ai_sentiment_analysis = summary_data.get('sentiment', '')
+    engagement.save(update_fields=['ai_summary', 'ai_action_items', 'ai_sentiment_analysis', 'updated_at'])
+    return {
+        'engagement_id': engagement.pk,
+        'summary': summary_data.get('summary', ''),
+        'action_items': summary_data.get('action_items', ''),
+        'sentiment': summary_data.get('sentiment', ''),
+    }
+
+
+@register(NETWORK_INFLUENCE_JOB)
+def refresh_user_network_influence(job):
+    """Recompute the job owner's stale network influence scores"""
+    return {'updated': refresh_network_influence(job.created_by_id)}
+
+
+def schedule_network_influence_refresh(user):
+    """
+    Enqueue a network influence refresh if the user has stale scores and no
+    refresh is pending. Returns True while stale scores await a refresh.
+    """
+    if not Stakeholder.objects.filter(created_by=user, network_influence_stale=True).exists():
+        return False
+    pending = Job.objects.for_user(user).filter(kind=NETWORK_INFLUENCE_JOB, status__in=('queued', 'running'))
+    if not pending.exists():
+        enqueue(NETWORK_INFLUENCE_JOB, user=user)
+    return True
+
+
+@register(CLEAR_DATA_JOB)
+def clear_user_data(job):
+    """Delete all of the job owner's data and leave demo mode"""
+    counts = purge_user_data(job.created_by_id, progress=job.set_progress)
+    DemoSession.objects.filter(user_id=job.created_by_id).update(is_demo_mode=False)
+    return counts
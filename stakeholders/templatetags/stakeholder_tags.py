@@ -1,5 +1,7 @@
 from django import template
 
+from stakeholders import models
+
 register = template.Library()
 
 @register.filter
@@ -34,3 +36,23 @@ def interest_badge_class(interest):
         'very_high': 'bg-danger',
     }
     return interest_map.get(interest, 'bg-secondary')
+
+@register.filter
+def days_since(moment):
+    """Whole days since a date, or None"""
+    return models.days_since(moment)
+
+@register.filter
+def sentiment_direction(trend):
+    """'improving', 'declining' or 'steady' for a sentiment trend, or None"""
+    return models.sentiment_direction(trend)
+
+@register.filter
+def sentiment_badge_class(direction):
+    """Convert a sentiment direction to appropriate Bootstrap badge class"""
+    direction_map = {
+        'improving': 'bg-success',
+        'steady': 'bg-secondary',
+        'declining': 'bg-danger',
+    }
+    return direction_map.get(direction, 'bg-light text-dark')
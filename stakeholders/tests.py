@@ -1,3 +1,1137 @@
-from django.test import TestCase
+from datetime import timedelta
+from io import StringIO
+import gzip
+import io
+import json
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core import signing
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, models
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .cache import dashboard_cache_stats, get_dashboard_version
+from ai_assistant.jobs import claim_next, run_job
+from ai_assistant.models import Job
+
+from .models import Stakeholder, Engagement, StakeholderRelationship, DemoSession, StakeholderEngagementStats
+from . import influence
+from .graph import clear_graph_cache, get_graph
+from .imports import import_rows, read_rows
+from .pagination import CURSOR_SALT, CursorPaginator, decode_cursor, encode_cursor
+from .influence import propagate, refresh_network_influence
+from .purge import purge_user_data
+from .search import FTS_TABLE, fts5_supported, search_stakeholders
+from .services import DashboardStats
+from .signals import repair_search_index_after_migrate
+from .stats import reconcile_engagement_stats
+from .tasks import NETWORK_INFLUENCE_JOB
+
+# Upper bound on queries for an uncached dashboard render (session, user, demo session,
+# two aggregates, recent stakeholders, upcoming engagements, grid data)
+DASHBOARD_MAX_QUERIES = 10
+
+
+def seed_stakeholders(user, count, start=0):
+    levels = ['low', 'medium', 'high', 'very_high']
+    stakeholders = Stakeholder.objects.bulk_create([
+        Stakeholder(
+            name=f'Stakeholder {i}',
+            organization='Acme',
+            influence=levels[i % 4],
+            interest=levels[(i // 4) % 4],
+            category='customer' if i % 2 else 'internal',
+            created_by=user,
+        )
+        for i in range(start, start + count)
+    ])
+    now = timezone.now()
+    Engagement.objects.bulk_create([
+        Engagement(
+            stakeholder=stakeholder,
+            title=f'Meeting {i}',
+            type='meeting' if i % 3 else 'email',
+            status='planned',
+            scheduled_date=now + timedelta(days=1 if i % 2 else -1),
+            created_by=user,
+        )
+        for i, stakeholder in enumerate(stakeholders)
+    ])
+    return stakeholders
+
+
+def temp_path(test, name):
+    """A path in a temporary directory removed when the test finishes"""
+    directory = tempfile.TemporaryDirectory()
+    test.addCleanup(directory.cleanup)
+    return f'{directory.name}/{name}'
+
+
+class PriorityScoreTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('scorer', password='pw')
+
+    def stored_scores(self):
+        return dict(Stakeholder.objects.filter(created_by=self.user).values_list('name', 'priority_score'))
+
+    def test_save(self):
+        stakeholder = Stakeholder.objects.create(name='A', influence='high', interest='very_high', created_by=self.user)
+        self.assertEqual(self.stored_scores(), {'A': 12})
+
+        stakeholder.interest = 'low'
+        stakeholder.save(update_fields=['interest'])
+        self.assertEqual(self.stored_scores(), {'A': 3})
+
+    def test_queryset_update(self):
+        Stakeholder.objects.create(name='A', influence='high', interest='very_high', created_by=self.user)
+        Stakeholder.objects.create(name='B', influence='low', interest='medium', created_by=self.user)
+
+        Stakeholder.objects.filter(created_by=self.user).update(influence='medium')
+        self.assertEqual(self.stored_scores(), {'A': 8, 'B': 4})
+        Stakeholder.objects.filter(name='A').update(interest=models.F('influence'))
+        self.assertEqual(self.stored_scores(), {'A': 4, 'B': 4})
+        Stakeholder.objects.filter(name='B').update(influence='very_high', interest='very_high')
+        self.assertEqual(self.stored_scores(), {'A': 4, 'B': 16})
+
+    def test_bulk_create_and_bulk_update(self):
+        a, b = Stakeholder.objects.bulk_create([
+            Stakeholder(name='A', influence='very_high', interest='high', created_by=self.user),
+            Stakeholder(name='B', created_by=self.user),
+        ])
+        self.assertEqual(self.stored_scores(), {'A': 12, 'B': 4})
+
+        a.influence, b.interest = 'low', 'very_high'
+        Stakeholder.objects.bulk_update([a, b], ['influence', 'interest'])
+        self.assertEqual(self.stored_scores(), {'A': 3, 'B': 8})
+
+
+class DashboardStatsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('analyst', password='password')
+        seed_stakeholders(self.user, 16)
+
+    def test_counts_match_python_calculation(self):
+        stats = DashboardStats(self.user).as_dict()
+        stakeholders = list(Stakeholder.objects.filter(created_by=self.user))
+
+        self.assertEqual(stats['total_stakeholders'], 16)
+        self.assertEqual(stats['total_engagements'], 16)
+        self.assertEqual(
+            stats['high_priority_count'],
+            sum(1 for s in stakeholders if s.influence_score * s.interest_score >= 12)
+        )
+        self.assertEqual(stats['upcoming_engagements_count'], 8)
+        self.assertEqual(stats['overdue_engagements_count'], 8)
+        self.assertEqual(
+            {row['influence']: row['count'] for row in stats['influence_data']},
+            {'low': 4, 'medium': 4, 'high': 4, 'very_high': 4}
+        )
+        self.assertEqual(
+            {row['category']: row['count'] for row in stats['category_data']},
+            {'customer': 8, 'internal': 8}
+        )
+        self.assertEqual(
+            {row['type']: row['count'] for row in stats['engagement_types']},
+            {'email': 6, 'meeting': 10}
+        )
+
+    def test_stats_use_two_queries(self):
+        with self.assertNumQueries(2):
+            DashboardStats(self.user).as_dict()
+
+    def test_dashboard_query_count_is_bounded(self):
+        self.client.force_login(self.user)
+        url = reverse('dashboard')
+
+        with CaptureQueriesContext(connection) as small:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+        seed_stakeholders(self.user, 200, start=16)
+        cache.clear()
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+        self.assertLessEqual(len(large.captured_queries), DASHBOARD_MAX_QUERIES)
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+
+    def test_api_dashboard_stats(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('api_dashboard_stats'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['stats']['total_stakeholders'], 16)
+
+
+class DashboardSnapshotCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('analyst', password='password')
+        self.stakeholders = seed_stakeholders(self.user, 4)
+        self.client.force_login(self.user)
+
+    def render_dashboard(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.status_code, 200)
+        return response, len(ctx.captured_queries)
+
+    def test_second_render_is_served_from_cache(self):
+        _, cold_queries = self.render_dashboard()
+        _, warm_queries = self.render_dashboard()
+
+        # The two aggregates and the grid query are skipped
+        self.assertEqual(cold_queries - warm_queries, 3)
+        self.assertEqual(dashboard_cache_stats()['hits'], 1)
+        self.assertEqual(dashboard_cache_stats()['misses'], 1)
+
+    def test_model_changes_invalidate_snapshot(self):
+        response, _ = self.render_dashboard()
+        self.assertEqual(response.context['total_stakeholders'], 4)
+
+        Stakeholder.objects.create(name='New', created_by=self.user)
+        response, _ = self.render_dashboard()
+        self.assertEqual(response.context['total_stakeholders'], 5)
+
+        self.stakeholders[0].delete()
+        response, _ = self.render_dashboard()
+        self.assertEqual(response.context['total_stakeholders'], 4)
+        self.assertEqual(dashboard_cache_stats()['misses'], 3)
+
+    def test_other_users_changes_do_not_invalidate(self):
+        self.render_dashboard()
+        other = User.objects.create_user('other', password='password')
+        Stakeholder.objects.create(name='Elsewhere', created_by=other)
+        self.render_dashboard()
+        self.assertEqual(dashboard_cache_stats()['hits'], 1)
+
+
+class QueryBudgetMixin:
+    """
+    Render pages against seeded data and fail if they exceed a fixed query
+    budget, or if the count grows with the amount of data (an N+1 pattern).
+    """
+
+    def seed(self, user, count, start=0):
+        stakeholders = seed_stakeholders(user, count, start=start)
+        StakeholderRelationship.objects.bulk_create([
+            StakeholderRelationship(
+                from_stakeholder=stakeholders[0],
+                to_stakeholder=other,
+                relationship_type='manages',
+                created_by=user,
+            )
+            for other in stakeholders[1:]
+        ])
+        return stakeholders
+
+    def count_queries(self, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        return len(ctx.captured_queries)
+
+    def assertPageQueries(self, url, max_queries, grow=None):
+        """
+        Assert that rendering ``url`` stays within ``max_queries``. If ``grow`` is
+        given it is called to add more data, and the page must then issue the
+        same number of queries as before.
+        """
+        before = self.count_queries(url)
+        self.assertLessEqual(before, max_queries, f'{url} issued {before} queries (budget {max_queries})')
+        if grow is not None:
+            grow()
+            after = self.count_queries(url)
+            self.assertEqual(before, after, f'{url} issued {after} queries after adding data, {before} before')
+
+
+class PageQueryBudgetTests(QueryBudgetMixin, TestCase):
+    # Session and user lookups account for two queries on every page
+    BUDGETS = {
+        'dashboard': 8,
+        'stakeholder_list': 4,
+        'stakeholder_detail': 5,
+        'stakeholder_edit': 4,
+        'engagement_list': 5,
+        'engagement_detail': 3,
+        'engagement_edit': 4,
+        'engagement_create': 3,
+        # One aggregate for the ETag, one for the rows
+        'api_stakeholders': 4,
+    }
+
+    def setUp(self):
+        self.user = User.objects.create_user('analyst', password='password')
+        self.stakeholders = self.seed(self.user, 8)
+        self.client.force_login(self.user)
+        self.grown = 0
+
+    def grow(self):
+        self.seed(self.user, 40, start=100 + self.grown)
+        self.grown += 40
+
+    def test_list_pages(self):
+        for name in ('dashboard', 'stakeholder_list', 'engagement_list', 'engagement_create', 'api_stakeholders'):
+            with self.subTest(page=name):
+                self.assertPageQueries(reverse(name), self.BUDGETS[name], grow=self.grow)
+
+    def test_cursor_list_pages(self):
+        for name in ('stakeholder_list', 'engagement_list'):
+            with self.subTest(page=name):
+                self.assertPageQueries(
+                    reverse(name) + '?paginate=cursor', self.BUDGETS[name], grow=self.grow
+                )
+
+    def test_detail_pages(self):
+        stakeholder = self.stakeholders[0]
+        engagement = stakeholder.engagements.first()
+        pages = [
+            ('stakeholder_detail', stakeholder.pk),
+            ('stakeholder_edit', stakeholder.pk),
+            ('engagement_detail', engagement.pk),
+            ('engagement_edit', engagement.pk),
+        ]
+        for name, pk in pages:
+            with self.subTest(page=name):
+                self.assertPageQueries(reverse(name, args=[pk]), self.BUDGETS[name], grow=self.grow)
+
+
+class CursorPaginationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('pager', password='pw')
+        seed_stakeholders(self.user, 30)
+        self.client.force_login(self.user)
+
+    def test_encode_and_decode(self):
+        token = encode_cursor(1, ['Name 19', 7], ['name', 'id'])
+        self.assertEqual(decode_cursor(token, ['name', 'id']), (1, ['Name 19', 7]))
+        self.assertIsNone(decode_cursor(token, ['-updated_at', '-id']))
+        self.assertIsNone(decode_cursor(token[:-2] + 'xx', ['name', 'id']))
+        self.assertIsNone(decode_cursor('garbage', ['name', 'id']))
+        self.assertIsNone(decode_cursor('', ['name', 'id']))
+        # Signed but malformed payloads are rejected too
+        self.assertIsNone(decode_cursor(encode_cursor(0, ['x'], ['name', 'id']), ['name', 'id']))
+        self.assertIsNone(decode_cursor(signing.dumps([0, ['x', 1]], salt=CURSOR_SALT), ['name', 'id']))
+
+    def list_page(self, **params):
+        response = self.client.get(reverse('stakeholder_list'), {'paginate': 'cursor', **params})
+        self.assertEqual(response.status_code, 200)
+        return response.context['page_obj']
+
+    def test_pages_walk_every_row_once(self):
+        seen = []
+        page = self.list_page(sort='name')
+        while True:
+            seen += [stakeholder.pk for stakeholder in page]
+            if not page.has_next():
+                break
+            page = self.list_page(sort='name', after=page.next_cursor)
+        self.assertEqual(len(seen), 30)
+        self.assertEqual(len(set(seen)), 30)
+
+        previous = self.list_page(sort='name', before=page.previous_cursor)
+        self.assertEqual(len(previous), 12)
+        self.assertLess(previous.object_list[-1].name, page.object_list[0].name)
+
+    def test_cursor_for_another_sort_starts_over(self):
+        first = self.list_page(sort='name')
+        page = self.list_page(after=first.next_cursor)
+        self.assertEqual(
+            [stakeholder.pk for stakeholder in page],
+            [stakeholder.pk for stakeholder in self.list_page()],
+        )
+        self.assertFalse(page.has_previous())
+
+    def test_values_the_keys_cant_hold_start_over(self):
+        keys = ['-updated_at', '-id']
+        page = CursorPaginator([Stakeholder.objects.filter(created_by=self.user)], keys, 12).get_page(
+            after=encode_cursor(0, ['Name 19', 7], keys)
+        )
+        self.assertEqual(len(page), 12)
+        self.assertFalse(page.has_previous())
+
+
+@override_settings(GEMINI_BACKEND='fake', GEMINI_FAKE_LATENCY=0, AI_CACHE_ENABLED=False)
+class GenerateAIInsightsCommandTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('insights')
+        seed_stakeholders(self.user, 30)
+        Engagement.objects.update(status='completed')
+
+    def run_command(self, **options):
+        out = StringIO()
+        call_command('generate_ai_insights', user='insights', stdout=out, **options)
+        return out.getvalue()
+
+    def test_concurrent_run_fills_every_row_in_bulk(self):
+        with CaptureQueriesContext(connection) as queries:
+            output = self.run_command(concurrency=8, batch_size=20)
+        self.assertIn('Successfully generated', output)
+        self.assertFalse(Stakeholder.objects.filter(ai_generated_insights='').exists())
+        self.assertFalse(Engagement.objects.filter(ai_summary='').exists())
+        self.assertEqual(set(Engagement.objects.values_list('ai_sentiment_analysis', flat=True)), {'neutral'})
+        # Two reads plus a handful of bulk updates, not one save per row
+        self.assertLess(len(queries), 20)
+
+    def test_rerun_only_processes_missing_rows(self):
+        done = Stakeholder.objects.order_by('id')[:10]
+        Stakeholder.objects.filter(id__in=done.values('id')).update(ai_generated_insights='Already done')
+        output = self.run_command(concurrency=4)
+        self.assertIn('Generating 20 stakeholder profiles and 30 engagement summaries', output)
+        self.assertEqual(Stakeholder.objects.filter(ai_generated_insights='Already done').count(), 10)
+        self.assertIn('Generating 0 stakeholder profiles and 0 engagement summaries', self.run_command())
+
+    def test_batched_summaries_use_fewer_requests(self):
+        output = self.run_command(concurrency=4, batch_tokens=8000)
+        self.assertIn('30 stakeholder profiles and 30 engagement summaries in 33 requests', output)
+        self.assertFalse(Engagement.objects.filter(ai_summary='').exists())
+
+
+class DemoDataCommandTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('loader')
+
+    def load(self, command, **options):
+        call_command(command, user='loader', stdout=StringIO(), **options)
+        return (
+            Stakeholder.objects.filter(created_by=self.user).count(),
+            Engagement.objects.filter(created_by=self.user).count(),
+            StakeholderRelationship.objects.filter(created_by=self.user).count(),
+        )
+
+    def test_load_demo_data_inserts_in_bulk(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.load('load_demo_data'), (10, 7, 5))
+        # A fixed number of statements, with one INSERT per table (engagement stats included)
+        self.assertLessEqual(len(queries), 20)
+        ceo = Stakeholder.objects.get(name='Sarah Chen')
+        self.assertEqual(ceo.priority_score, Stakeholder(influence='very_high', interest='high').compute_priority_score())
+        self.assertTrue(ceo.relationships_from.filter(to_stakeholder__name='Michael Rodriguez').exists())
+
+    def test_load_demo_data_scale_replaces_existing_data(self):
+        self.load('load_demo_data')
+        self.assertEqual(self.load('load_demo_data', scale=3), (30, 21, 15))
+        self.assertTrue(Stakeholder.objects.filter(name='Sarah Chen (3)', email='sarah.chen+3@techcorp.com').exists())
+        # Relationships stay within each copy of the organization
+        self.assertFalse(StakeholderRelationship.objects.filter(
+            from_stakeholder__name='Sarah Chen (2)', to_stakeholder__name='Michael Rodriguez'
+        ).exists())
+
+    def test_populate_sample_data_is_repeatable_with_a_seed(self):
+        counts = self.load('populate_sample_data', scale=2, seed=7)
+        engagements = list(Engagement.objects.order_by('id').values_list('title', 'status'))
+        self.assertEqual(counts[0] % 2, 0)
+        self.assertEqual(self.load('populate_sample_data', scale=2, seed=7, clear=True), counts)
+        self.assertEqual(list(Engagement.objects.order_by('id').values_list('title', 'status')), engagements)
+
+    def test_dashboard_reflects_bulk_load(self):
+        self.client.force_login(self.user)
+        self.client.get(reverse('dashboard'))
+        version = get_dashboard_version(self.user.pk)
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.load('populate_sample_data')
+        # The caches are only invalidated once the load commits
+        self.assertEqual(get_dashboard_version(self.user.pk), version)
+        for callback in callbacks:
+            callback()
+        response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.context['total_stakeholders'], Stakeholder.objects.count())
+
+
+class BenchmarkCommandTests(TestCase):
+    def generate(self, **options):
+        out = StringIO()
+        options = dict({'users': 3, 'stakeholders': 200, 'engagements': 3, 'relationships': 2}, **options)
+        call_command('generate_benchmark_data', stdout=out, **options)
+        return out.getvalue()
+
+    def test_generate_benchmark_data_is_skewed_and_repeatable(self):
+        self.generate(seed=3)
+        sizes = [Stakeholder.objects.filter(created_by__username=f'bench_{k}').count() for k in range(3)]
+        self.assertEqual(sizes[0], 200)
+        self.assertGreater(sizes[0], sizes[1])
+        self.assertGreater(sizes[1], sizes[2])
+        self.assertFalse(StakeholderRelationship.objects.filter(
+            from_stakeholder=models.F('to_stakeholder')
+        ).exists())
+        engagements = list(Engagement.objects.order_by('id').values_list('title', 'type', 'status'))
+
+        self.assertIn('Skipping bench_0', self.generate(seed=3))
+        self.generate(seed=3, clear=True)
+        self.assertEqual(list(Engagement.objects.order_by('id').values_list('title', 'type', 'status')), engagements)
+
+    def test_run_benchmarks_reports_json(self):
+        self.generate(users=1)
+        out = StringIO()
+        call_command('run_benchmarks', iterations=2, warmup=1, stdout=out)
+        report = json.loads(out.getvalue())
+        self.assertEqual(report['meta']['stakeholders'], 200)
+        self.assertEqual(set(report['results']), {
+            'dashboard', 'stakeholder_list', 'engagement_list', 'stakeholder_detail', 'api_stakeholders'
+        })
+        for result in report['results'].values():
+            self.assertEqual(result['iterations'], 2)
+            self.assertLessEqual(result['p50_ms'], result['p95_ms'])
+            self.assertGreater(result['queries'], 0)
+            self.assertIn('peak_memory_kb', result)
+
+    def test_explain_queries_covers_every_view_ordering(self):
+        out = StringIO()
+        call_command('explain_queries', seed=50, stdout=out)
+        output = out.getvalue()
+        for label in ('stakeholder_list: network influence sort',
+                      'stakeholder_list (cursor, days since last contact sort): segment 0, next page',
+                      'engagement_list (cursor): segment 1, next page',
+                      'api_stakeholders: search'):
+            self.assertIn(label, output)
+
+
+class PurgeTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('purged', password='pw')
+        self.other = User.objects.create_user('kept')
+        stakeholders = seed_stakeholders(self.user, 30)
+        StakeholderRelationship.objects.bulk_create([
+            StakeholderRelationship(
+                from_stakeholder=stakeholders[i], to_stakeholder=stakeholders[i + 1],
+                relationship_type='reports_to', created_by=self.user,
+            )
+            for i in range(10)
+        ])
+        self.kept = seed_stakeholders(self.other, 5)
+        # Another user's engagement on one of this user's stakeholders goes with it, as with a cascade
+        Engagement.objects.create(
+            stakeholder=stakeholders[0], title='Cross-tenant', type='email', status='planned',
+            scheduled_date=timezone.now(), created_by=self.other,
+        )
+
+    def test_purge_deletes_in_chunks_and_counts_rows(self):
+        with CaptureQueriesContext(connection) as queries:
+            counts = purge_user_data(self.user.pk, chunk_size=7)
+        self.assertEqual(counts, {'stakeholders': 30, 'engagements': 31, 'relationships': 10})
+        self.assertFalse(Stakeholder.objects.filter(created_by=self.user).exists())
+        self.assertFalse(Engagement.objects.filter(stakeholder__created_by=self.user).exists())
+        self.assertEqual(Stakeholder.objects.filter(created_by=self.other).count(), 5)
+        self.assertEqual(Engagement.objects.filter(created_by=self.other).count(), 5)
+        # One DELETE per table and chunk, never one per row: 2 relationship chunks, 5 engagement
+        # chunks and 5 stakeholder chunks that each clear 4 dependent tables first
+        deletes = [query for query in queries if query['sql'].startswith('DELETE')]
+        self.assertEqual(len(deletes), 2 + 5 + 5 * 5)
+
+    def test_clear_demo_data_command_reports_counts(self):
+        DemoSession.objects.create(user=self.user, is_demo_mode=True)
+        out = StringIO()
+        call_command('clear_demo_data', user='purged', confirm=True, stdout=out)
+        self.assertIn('30 stakeholders, 31 engagements, 10 relationships', out.getvalue())
+        self.assertFalse(DemoSession.objects.get(user=self.user).is_demo_mode)
+
+    def test_clear_view_purges_and_refreshes_dashboard(self):
+        self.client.force_login(self.user)
+        # The dashboard clears small tenants within the request
+        self.assertFalse(self.client.get(reverse('dashboard')).context['clear_in_background'])
+        with mock.patch('stakeholders.views.BACKGROUND_PURGE_THRESHOLD', 10):
+            self.assertTrue(self.client.get(reverse('dashboard')).context['clear_in_background'])
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('clear_demo_data'))
+        self.assertEqual(response.json()['cleared'], {'stakeholders': 30, 'engagements': 31, 'relationships': 10})
+        self.assertEqual(self.client.get(reverse('dashboard')).context['total_stakeholders'], 0)
+
+    def test_clear_view_background_mode_queues_a_job(self):
+        self.client.force_login(self.user)
+        response = self.client.post(reverse('clear_demo_data'), {'background': '1'})
+        self.assertEqual(response.status_code, 202)
+        self.assertTrue(Stakeholder.objects.filter(created_by=self.user).exists())
+
+        job = run_job(claim_next('test'))
+        self.assertEqual(job.status, 'succeeded')
+        self.assertEqual(job.result['stakeholders'], 30)
+        self.assertEqual(self.client.get(response.json()['status_url']).json()['job']['progress'], 100)
+        self.assertFalse(Stakeholder.objects.filter(created_by=self.user).exists())
+
+
+class StakeholderAPITests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('api', password='pw')
+        self.client.force_login(self.user)
+        seed_stakeholders(self.user, 60)
+        Stakeholder.objects.create(name='Zelda Quartermaine', title='CFO', organization='Initech', created_by=self.user)
+        seed_stakeholders(User.objects.create_user('someone-else'), 5)
+
+    def get(self, **params):
+        return self.client.get(reverse('api_stakeholders'), params)
+
+    def test_lists_every_stakeholder_by_name_with_default_fields(self):
+        data = self.get().json()
+        self.assertEqual(len(data['stakeholders']), 61)
+        self.assertFalse(data['truncated'])
+        self.assertEqual(set(data['stakeholders'][0]), {'id', 'name', 'title', 'organization'})
+        names = [row['name'] for row in data['stakeholders']]
+        self.assertEqual(names, sorted(names))
+
+    def test_typeahead_filtering_limit_and_fields(self):
+        data = self.get(q='quarterm', fields='id,name').json()
+        self.assertEqual(data['stakeholders'], [
+            {'id': Stakeholder.objects.get(name='Zelda Quartermaine').pk, 'name': 'Zelda Quartermaine'}
+        ])
+        data = self.get(q='stakeholder', limit=5).json()
+        self.assertEqual(len(data['stakeholders']), 5)
+        self.assertTrue(data['truncated'])
+        self.assertEqual(self.get(fields='id,password').status_code, 400)
+        self.assertEqual(self.get(limit='0').status_code, 400)
+
+    def test_conditional_get(self):
+        response = self.get()
+        etag = response['ETag']
+        self.assertTrue(etag.startswith('"'))
+        self.assertNotIn('Last-Modified', response)
+        self.assertIn('no-cache', response['Cache-Control'])
+
+        again = self.client.get(reverse('api_stakeholders'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(again.status_code, 304)
+
+        # Deleting a stakeholder doesn't move max(updated_at) but must still invalidate
+        Stakeholder.objects.filter(created_by=self.user).order_by('updated_at').first().delete()
+        self.assertEqual(self.client.get(reverse('api_stakeholders'), HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        since = self.client.get(reverse('api_stakeholders'), HTTP_IF_MODIFIED_SINCE='Wed, 01 Jan 2120 00:00:00 GMT')
+        self.assertEqual(since.status_code, 200)
+
+    def test_gzip(self):
+        response = self.client.get(reverse('api_stakeholders'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(len(json.loads(gzip.decompress(response.content))['stakeholders']), 61)
+
+
+class SearchIndexTests(TestCase):
+    def setUp(self):
+        if not fts5_supported(connection):
+            self.skipTest('SQLite FTS5 is not available')
+        self.user = User.objects.create_user('searcher', password='pw')
+        self.megacorp = Stakeholder.objects.create(name='Ann Zephyr', organization='MegaCorp', created_by=self.user)
+
+    def search(self, text, **kwargs):
+        return list(search_stakeholders(Stakeholder.objects.filter(created_by=self.user), text, **kwargs))
+
+    def indexed(self, word):
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [f'"{word}"'])
+            return {row[0] for row in cursor.fetchall()}
+
+    def test_triggers_follow_every_write_path(self):
+        bulk, = Stakeholder.objects.bulk_create([Stakeholder(name='Bo Quillon', created_by=self.user)])
+        self.assertEqual(self.indexed('quillon'), {bulk.pk})
+
+        Stakeholder.objects.filter(pk=bulk.pk).update(name='Bo Marlowe')
+        self.assertEqual(self.indexed('quillon'), set())
+        self.assertEqual(self.indexed('marlowe'), {bulk.pk})
+
+        self.megacorp.title = 'Treasurer'
+        self.megacorp.save()
+        self.assertEqual(self.indexed('treasurer'), {self.megacorp.pk})
+
+        self.megacorp.delete()
+        self.assertEqual(self.indexed('zephyr'), set())
+
+    def test_words_prefixes_and_substring_fallback(self):
+        ranked = self.search('zeph')
+        self.assertEqual(ranked, [self.megacorp])
+        self.assertTrue(hasattr(ranked[0], 'search_rank'))
+        # No word starts with 'corp', so the substring search answers, even when
+        # another user has a stakeholder the full-text query does match
+        Stakeholder.objects.create(name='Corp Elsewhere', created_by=User.objects.create_user('other'))
+        self.assertEqual(self.search('corp'), [self.megacorp])
+        self.assertEqual(self.search('corp', ranked=False), [self.megacorp])
+        self.assertEqual(self.search('nothing like it'), [])
+
+        Stakeholder.objects.create(name='Zephyrine', created_by=self.user)
+        with self.assertNumQueries(1):
+            results = self.search('zephyr')
+        self.assertCountEqual([s.name for s in results], ['Ann Zephyr', 'Zephyrine'])
+        self.assertLessEqual(results[0].search_rank, results[1].search_rank)
+
+    def test_post_migrate_restores_dropped_triggers(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP TRIGGER {FTS_TABLE}_au')
+        Stakeholder.objects.filter(pk=self.megacorp.pk).update(name='Ann Quasar')
+        self.assertEqual(self.indexed('quasar'), set())
+
+        repair_search_index_after_migrate(sender=None, using=connection.alias)
+        self.assertEqual(self.indexed('quasar'), {self.megacorp.pk})
+        Stakeholder.objects.filter(pk=self.megacorp.pk).update(name='Ann Nebula')
+        self.assertEqual(self.indexed('nebula'), {self.megacorp.pk})
+
+    def test_rebuild_command(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('delete-all')")
+        self.assertEqual(self.indexed('zephyr'), set())
+
+        out = StringIO()
+        call_command('rebuild_search_index', optimize=True, stdout=out)
+        self.assertIn(f'Rebuilt search index for {Stakeholder.objects.count()} stakeholders', out.getvalue())
+        self.assertEqual(self.indexed('zephyr'), {self.megacorp.pk})
+
+
+class RelationshipGraphTests(TestCase):
+    def setUp(self):
+        clear_graph_cache()
+        self.user = User.objects.create_user('graph', password='pw')
+        self.client.force_login(self.user)
+        names = ['CEO', 'CFO', 'CTO', 'Engineer', 'Analyst', 'Rival A', 'Rival B', 'Loner']
+        self.people = {
+            name: Stakeholder.objects.create(name=name, created_by=self.user) for name in names
+        }
+        self.link('CFO', 'CEO', 'reports_to', 'strong')
+        self.link('CTO', 'CEO', 'reports_to', 'strong')
+        self.link('Engineer', 'CTO', 'reports_to')
+        self.link('Analyst', 'CFO', 'reports_to', 'weak')
+        self.link('Rival A', 'Rival B', 'conflicts')
+        self.link('Rival B', 'Engineer', 'conflicts')
+
+    def link(self, source, target, relationship_type, strength='moderate'):
+        return StakeholderRelationship.objects.create(
+            from_stakeholder=self.people[source], to_stakeholder=self.people[target],
+            relationship_type=relationship_type, strength=strength, created_by=self.user,
+        )
+
+    def pk(self, name):
+        return self.people[name].pk
+
+    def names(self, ids):
+        return {Stakeholder.objects.get(pk=pk).name for pk in ids}
+
+    def test_traversals(self):
+        graph = get_graph(self.user.pk)
+        self.assertEqual((len(graph), graph.edge_count), (8, 6))
+
+        # Who reaches the CEO within two hops of reporting lines
+        reach = dict(graph.reach(self.pk('CEO'), max_depth=2, direction='in', types=['reports_to']))
+        self.assertEqual(self.names(reach), {'CFO', 'CTO', 'Engineer', 'Analyst'})
+        self.assertEqual(reach[self.pk('Engineer')], 2)
+        self.assertEqual(graph.reach(self.pk('CEO'), direction='out'), [])
+
+        path = graph.shortest_path(self.pk('Rival A'), self.pk('CFO'))
+        self.assertEqual(len(path), 6)
+        self.assertIsNone(graph.shortest_path(self.pk('Rival A'), self.pk('CFO'), direction='out'))
+        self.assertIsNone(graph.shortest_path(self.pk('Loner'), self.pk('CEO')))
+
+    def test_centrality_and_components(self):
+        graph = get_graph(self.user.pk)
+        pagerank = graph.pagerank(types=['reports_to'])
+        self.assertAlmostEqual(sum(pagerank), 1.0)
+        self.assertEqual(graph.top(pagerank, 1)[0][0], self.pk('CEO'))
+        degrees = dict(zip(graph.ids, graph.degree()))
+        self.assertEqual(degrees[self.pk('CEO')], 2)
+        self.assertEqual(degrees[self.pk('Loner')], 0)
+
+        components = graph.components()
+        self.assertEqual([len(component) for component in components], [7, 1])
+        conflicts = [component for component in graph.components(types=['conflicts']) if len(component) > 1]
+        self.assertEqual([self.names(component) for component in conflicts], [{'Rival A', 'Rival B', 'Engineer'}])
+        with self.assertRaises(ValueError):
+            graph.components(types=['friends'])
+
+    def test_graph_is_cached_until_relationships_change(self):
+        graph = get_graph(self.user.pk)
+        self.assertIs(get_graph(self.user.pk), graph)
+        # Editing a stakeholder or an engagement leaves the graph alone
+        self.people['CEO'].save()
+        Engagement.objects.create(
+            stakeholder=self.people['CEO'], title='1:1', type='meeting', status='planned',
+            scheduled_date=timezone.now(), created_by=self.user,
+        )
+        self.assertIs(get_graph(self.user.pk), graph)
+
+        self.link('Loner', 'CEO', 'influences')
+        self.assertEqual(get_graph(self.user.pk).edge_count, 7)
+        self.people['Loner'].delete()
+        self.assertEqual(len(get_graph(self.user.pk)), 7)
+        with self.captureOnCommitCallbacks(execute=True):
+            purge_user_data(self.user.pk)
+        self.assertEqual(len(get_graph(self.user.pk)), 0)
+
+    def test_api(self):
+        summary = self.client.get(reverse('api_graph_summary')).json()
+        self.assertEqual((summary['stakeholders'], summary['relationships']), (8, 6))
+        self.assertEqual((summary['components'], summary['unconnected']), (1, 1))
+
+        url = reverse('api_graph_reach', args=[self.pk('CEO')])
+        data = self.client.get(url, {'direction': 'in', 'depth': 1}).json()
+        self.assertEqual({row['name'] for row in data['results']}, {'CFO', 'CTO'})
+        self.assertEqual(self.client.get(url, {'types': 'friends'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'depth': 'x'}).status_code, 400)
+
+        data = self.client.get(reverse('api_graph_path', args=[self.pk('Analyst'), self.pk('Engineer')])).json()
+        self.assertEqual([row['name'] for row in data['path']], ['Analyst', 'CFO', 'CEO', 'CTO', 'Engineer'])
+        self.assertEqual(data['hops'], 4)
+
+        data = self.client.get(reverse('api_graph_centrality'), {'limit': 2}).json()
+        self.assertEqual(data['results'][0]['name'], 'CEO')
+        self.assertEqual(len(data['results']), 2)
+        self.assertEqual(self.client.get(reverse('api_graph_centrality'), {'measure': 'fame'}).status_code, 400)
+
+        data = self.client.get(reverse('api_graph_components'), {'types': 'conflicts'}).json()
+        self.assertEqual(data['total'], 1)
+        self.assertEqual(data['components'][0]['size'], 3)
+
+        # Other users' stakeholders are not in the graph
+        other = Stakeholder.objects.create(name='Elsewhere', created_by=User.objects.create_user('other'))
+        self.assertEqual(self.client.get(reverse('api_graph_reach', args=[other.pk])).status_code, 404)
+
+
+class NetworkInfluenceTests(TestCase):
+    def setUp(self):
+        clear_graph_cache()
+        self.user = User.objects.create_user('influence', password='pw')
+        self.client.force_login(self.user)
+        self.ceo = Stakeholder.objects.create(name='CEO', influence='high', created_by=self.user)
+        self.vp = Stakeholder.objects.create(name='VP', influence='high', created_by=self.user)
+        self.lead = Stakeholder.objects.create(name='Lead', influence='medium', created_by=self.user)
+        self.loner = Stakeholder.objects.create(name='Loner', influence='very_high', created_by=self.user)
+        for source, target in ((self.vp, self.ceo), (self.lead, self.vp)):
+            StakeholderRelationship.objects.create(
+                from_stakeholder=source, to_stakeholder=target, relationship_type='reports_to',
+                strength='strong', created_by=self.user,
+            )
+
+    def scores(self):
+        return dict(Stakeholder.objects.filter(created_by=self.user).values_list('name', 'network_influence'))
+
+    def test_influence_flows_up_reporting_lines(self):
+        self.assertEqual(refresh_network_influence(self.user.pk), 4)
+        scores = self.scores()
+        # Each hop passes on half: Lead 2, VP 3 + 1, CEO 3 + 2
+        self.assertAlmostEqual(scores['Lead'], 2)
+        self.assertAlmostEqual(scores['VP'], 4)
+        self.assertAlmostEqual(scores['CEO'], 5)
+        self.assertAlmostEqual(scores['Loner'], 4)
+        self.assertFalse(Stakeholder.objects.filter(network_influence_stale=True).exists())
+        self.assertEqual(refresh_network_influence(self.user.pk), 0)
+
+    def test_only_changed_networks_are_recomputed(self):
+        refresh_network_influence(self.user.pk)
+        # A new relationship marks both ends stale; the loner's network is left alone
+        StakeholderRelationship.objects.create(
+            from_stakeholder=self.lead, to_stakeholder=self.ceo, relationship_type='influences',
+            created_by=self.user,
+        )
+        self.assertEqual(refresh_network_influence(self.user.pk), 3)
+        self.assertGreater(self.scores()['Lead'], 2)
+
+        Stakeholder.objects.filter(pk=self.loner.pk).update(influence='low')
+        self.assertEqual(refresh_network_influence(self.user.pk), 1)
+        self.assertAlmostEqual(self.scores()['Loner'], 1)
+
+    def test_engines_agree(self):
+        base = [1, 2, 3, 4, 2]
+        edges = ([0, 1, 2, 3, 0], [1, 2, 0, 1, 4], [1, 2, 3, 1, 2])
+        python = propagate(base, *edges, use_numpy=False)
+        warm = propagate(base, *edges, initial=[10] * 5, use_numpy=False)
+        for a, b in zip(python, warm):
+            self.assertAlmostEqual(a, b)
+        if influence.numpy is not None:
+            for a, b in zip(python, propagate(base, *edges, use_numpy=True)):
+                self.assertAlmostEqual(a, b)
+
+    def test_stakeholder_list_orders_by_network_influence(self):
+        # Stale scores are queued for a background refresh (once), not computed in the request
+        for _ in range(2):
+            response = self.client.get(reverse('stakeholder_list'), {'sort': 'influence'})
+            self.assertTrue(response.context['influence_refreshing'])
+        self.assertEqual(Job.objects.filter(kind=NETWORK_INFLUENCE_JOB).count(), 1)
+        self.assertTrue(Stakeholder.objects.filter(network_influence_stale=True).exists())
+        self.assertEqual(run_job(claim_next('worker')).status, 'succeeded')
+
+        # VP and Loner tie on 4; the newer stakeholder comes first
+        expected = ['CEO', 'Loner', 'VP', 'Lead']
+        response = self.client.get(reverse('stakeholder_list'), {'sort': 'influence'})
+        self.assertFalse(response.context['influence_refreshing'])
+        self.assertEqual([s.name for s in response.context['page_obj']], expected)
+        response = self.client.get(reverse('stakeholder_list'), {'sort': 'influence', 'paginate': 'cursor'})
+        self.assertEqual([s.name for s in response.context['page_obj']], expected)
+
+    def test_command(self):
+        out = StringIO()
+        call_command('compute_network_influence', user='influence', full=True, stdout=out)
+        self.assertIn('4 scores updated', out.getvalue())
+        call_command('compute_network_influence', benchmark=200, stdout=out)
+        self.assertIn('200 stakeholders', out.getvalue())
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('exporter', password='pw')
+        self.stakeholders = seed_stakeholders(self.user, 30)
+        seed_stakeholders(User.objects.create_user('other'), 5)
+        self.client.force_login(self.user)
+
+    def download(self, response):
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content)
+
+    def test_stakeholder_csv_with_columns_and_filters(self):
+        response = self.client.get(
+            reverse('export_stakeholders', args=['csv']),
+            {'columns': 'id,name,category', 'category': 'customer'},
+        )
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertIn('attachment; filename="stakeholders.csv"', response['Content-Disposition'])
+        lines = self.download(response).decode().splitlines()
+        self.assertEqual(lines[0], 'id,name,category')
+        self.assertEqual(len(lines), 16)
+        self.assertEqual(lines[1], f'{self.stakeholders[1].pk},Stakeholder 1,customer')
+
+    def test_engagement_jsonl_gzipped(self):
+        response = self.client.get(
+            reverse('export_engagements', args=['jsonl.gz']),
+            {'columns': 'title,type,stakeholder_name', 'type': 'email'},
+        )
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        rows = [json.loads(line) for line in gzip.decompress(self.download(response)).decode().splitlines()]
+        self.assertEqual(len(rows), 10)
+        self.assertEqual(rows[0], {'title': 'Meeting 0', 'type': 'email', 'stakeholder_name': 'Stakeholder 0'})
+
+    def test_rejects_unknown_columns_and_formats(self):
+        response = self.client.get(reverse('export_stakeholders', args=['csv']), {'columns': 'name,password'})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(reverse('export_stakeholders', args=['xml']))
+        self.assertEqual(response.status_code, 404)
+
+    async def test_streams_under_asgi(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse('export_stakeholders', args=['jsonl']), {'columns': 'id'})
+        self.assertTrue(response.is_async)
+        lines = b''.join([piece async for piece in response.streaming_content]).splitlines()
+        self.assertEqual(len(lines), 30)
+
+    def test_command_writes_gzip_file(self):
+        path = temp_path(self, 'engagements.jsonl.gz')
+        call_command(
+            'export_data', 'engagements', user='exporter', format='jsonl',
+            filter=['status=planned'], output=path, gzip=True, chunk_size=7, stderr=StringIO(),
+        )
+        with gzip.open(path, 'rt') as exported:
+            self.assertEqual(len(exported.readlines()), 30)
+
+        out = StringIO()
+        call_command('export_data', 'stakeholders', user='exporter', columns='name', filter=['priority=high'], stdout=out)
+        self.assertEqual(out.getvalue().splitlines()[0], 'name')
+        self.assertEqual(len(out.getvalue().splitlines()), 1 + Stakeholder.objects.for_user(self.user).high_priority().count())
+
+
+class ImportTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('importer', password='pw')
+        self.existing = Stakeholder.objects.create(
+            name='Ada Lovelace', email='ada@example.com', influence='low', interest='low', created_by=self.user,
+        )
+        # Same email, other tenant: must never be matched or touched
+        self.foreign = Stakeholder.objects.create(
+            name='Ada Lovelace', email='ada@example.com', created_by=User.objects.create_user('other'),
+        )
+        self.client.force_login(self.user)
+
+    def run_import(self, kind, text, fmt='csv', **kwargs):
+        return import_rows(self.user, kind, read_rows(io.BytesIO(text.encode()), fmt), **kwargs)
+
+    def test_stakeholders_upsert_and_report_errors(self):
+        result = self.run_import('stakeholders', (
+            'name,email,influence,interest,category\n'
+            'Ada Lovelace,ADA@example.com,very_high,high,internal\n'
+            'Grace Hopper,grace@example.com,high,medium,external\n'
+            ',bad-email,huge,low,internal\n'
+            'Grace Hopper,grace@example.com,high,high,external\n'
+        ), batch_size=10)
+        self.assertEqual((result['created'], result['updated'], result['failed']), (1, 2, 1))
+        self.assertEqual(result['errors'][0]['row'], 3)
+        self.assertEqual(set(result['errors'][0]['errors']), {'name', 'email', 'influence'})
+
+        self.existing.refresh_from_db()
+        self.assertEqual((self.existing.influence, self.existing.priority_score), ('very_high', 12))
+        self.assertTrue(self.existing.network_influence_stale)
+        grace = Stakeholder.objects.get(created_by=self.user, name='Grace Hopper')
+        self.assertEqual(grace.interest, 'high')
+        self.foreign.refresh_from_db()
+        self.assertEqual(self.foreign.influence, 'medium')
+
+    def test_rejects_ids_of_other_users(self):
+        result = self.run_import('stakeholders', json.dumps({'id': self.foreign.pk, 'name': 'Hijack'}) + '\n', 'jsonl')
+        self.assertEqual(result['failed'], 1)
+        self.assertEqual(Stakeholder.objects.get(pk=self.foreign.pk).name, 'Ada Lovelace')
+
+    def test_engagements_resolve_stakeholders_and_match_existing(self):
+        rows = [
+            {'stakeholder_email': 'ada@example.com', 'title': 'Kickoff', 'type': 'meeting',
+             'status': 'planned', 'scheduled_date': '2030-01-01T10:00:00Z'},
+            {'stakeholder': 'Ada Lovelace', 'title': 'Review', 'type': 'email',
+             'status': 'completed', 'scheduled_date': '2024-01-01T10:00:00Z', 'effectiveness_rating': 4},
+            {'stakeholder_name': 'Nobody', 'title': 'Lost', 'type': 'email', 'status': 'planned',
+             'scheduled_date': '2030-01-01T10:00:00Z'},
+            'not an object',
+        ]
+        text = ''.join(json.dumps(row) + '\n' for row in rows)
+        result = self.run_import('engagements', text, 'jsonl')
+        self.assertEqual((result['created'], result['updated'], result['failed']), (2, 0, 2))
+        self.assertEqual(self.existing.engagements.get(title='Kickoff').duration_minutes, 60)
+
+        # Importing again updates the same engagements (same stakeholder, title and date)
+        result = self.run_import('engagements', text.replace('"planned"', '"cancelled"'), 'jsonl')
+        self.assertEqual((result['created'], result['updated']), (0, 2))
+        self.assertEqual(self.existing.engagements.get(title='Kickoff').status, 'cancelled')
+
+    def test_partial_columns_update_only_those_columns(self):
+        Stakeholder.objects.filter(pk=self.existing.pk).update(
+            title='CFO', influence='high', interest='very_high', notes='keep me'
+        )
+        result = self.run_import('stakeholders', (
+            'name,email,phone\n'
+            'Ada Lovelace,ada@example.com,555\n'
+            'New Person,new@example.com,556\n'
+        ))
+        self.assertEqual((result['created'], result['updated'], result['failed']), (1, 1, 0))
+        self.existing.refresh_from_db()
+        self.assertEqual(
+            (self.existing.phone, self.existing.title, self.existing.influence, self.existing.notes),
+            ('555', 'CFO', 'high', 'keep me'),
+        )
+        self.assertEqual(self.existing.priority_score, 12)
+        # New rows still get the form defaults
+        self.assertEqual(Stakeholder.objects.get(email='new@example.com').influence, 'medium')
+
+        # An update by id may leave out required columns too
+        engagement = Engagement.objects.create(
+            stakeholder=self.existing, title='Kickoff', status='planned',
+            scheduled_date=timezone.now(), created_by=self.user,
+        )
+        result = self.run_import('engagements', json.dumps({'id': engagement.pk, 'status': 'completed'}) + '\n', 'jsonl')
+        self.assertEqual((result['updated'], result['failed']), (1, 0))
+        engagement.refresh_from_db()
+        self.assertEqual((engagement.status, engagement.title, engagement.stakeholder_id),
+                         ('completed', 'Kickoff', self.existing.pk))
+
+    def test_export_round_trips(self):
+        seed_stakeholders(self.user, 5)
+        exported = b''.join(self.client.get(reverse('export_stakeholders', args=['csv.gz'])).streaming_content)
+        result = import_rows(self.user, 'stakeholders', read_rows(io.BytesIO(exported), 'csv'))
+        self.assertEqual((result['created'], result['updated'], result['failed']), (0, 6, 0))
+
+    def test_upload_view_and_command(self):
+        upload = SimpleUploadedFile('people.csv', b'name,email\nAlan Turing,alan@example.com\nNo Email,\n')
+        response = self.client.post(reverse('import_data', args=['stakeholders']), {'file': upload})
+        self.assertEqual(response.json()['created'], 2)
+        response = self.client.post(reverse('import_data', args=['stakeholders']), {
+            'file': SimpleUploadedFile('people.txt', b'name\nX\n'),
+        })
+        self.assertEqual(response.status_code, 400)
+
+        path = temp_path(self, 'people.jsonl')
+        with open(path, 'w') as f:
+            f.write('{"name": "Alan Turing", "email": "alan@example.com", "influence": "high"}\n{"email": "x"}\n')
+        out = StringIO()
+        call_command('import_data', 'stakeholders', path, user='importer', stdout=out)
+        self.assertIn('0 created, 1 updated, 1 rejected', out.getvalue())
+        self.assertIn('row 2: name', out.getvalue())
+
+
+class EngagementStatsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('stats', password='pw')
+        self.client.force_login(self.user)
+        self.quiet = Stakeholder.objects.create(name='Quiet', created_by=self.user)
+        self.busy = Stakeholder.objects.create(name='Busy', created_by=self.user)
+        self.never = Stakeholder.objects.create(name='Never', created_by=self.user)
+        self.now = timezone.now()
+        sentiments = ['positive', 'positive', 'neutral', 'negative', 'negative', 'negative']
+        for days, sentiment in enumerate(sentiments):
+            self.engage(self.busy, -20 + days, 'completed', sentiment=sentiment, effectiveness_rating=days % 5 + 1)
+        self.engage(self.busy, 5, 'planned')
+        self.engage(self.busy, 9, 'planned')
+        self.engage(self.busy, 1, 'cancelled')
+        self.engage(self.quiet, -40, 'completed', sentiment='positive')
+
+    def engage(self, stakeholder, days, status, **fields):
+        return Engagement.objects.create(
+            stakeholder=stakeholder, title=f'{status} {days}', status=status,
+            scheduled_date=self.now + timedelta(days=days), created_by=self.user, **fields
+        )
+
+    def test_signals_keep_stats_current(self):
+        stats = StakeholderEngagementStats.objects.get(stakeholder=self.busy)
+        self.assertEqual(
+            (stats.total_count, stats.completed_count, stats.planned_count, stats.cancelled_count),
+            (9, 6, 2, 1),
+        )
+        self.assertEqual(stats.last_contact_at, self.now - timedelta(days=15))
+        self.assertEqual(stats.next_planned_at, self.now + timedelta(days=5))
+        self.assertEqual(stats.days_since_last_contact, 15)
+        self.assertAlmostEqual(stats.average_rating, 16 / 6)
+        self.assertEqual((stats.positive_count, stats.neutral_count, stats.negative_count), (2, 1, 3))
+        # Latest three (-1, -1, -1) against the three before them (1, 1, 0)
+        self.assertAlmostEqual(stats.sentiment_trend, -1 - 2 / 3)
+        self.assertEqual(stats.sentiment_direction, 'declining')
+        self.assertFalse(StakeholderEngagementStats.objects.filter(stakeholder=self.never).exists())
+
+        # Moving an engagement updates both stakeholders; deleting the last one removes the row
+        engagement = Engagement.objects.get(stakeholder=self.quiet)
+        engagement.stakeholder = self.never
+        engagement.save()
+        self.assertFalse(StakeholderEngagementStats.objects.filter(stakeholder=self.quiet).exists())
+        self.assertEqual(self.never.engagement_stats.completed_count, 1)
+        engagement.delete()
+        self.assertFalse(StakeholderEngagementStats.objects.filter(stakeholder=self.never).exists())
+
+        self.busy.delete()
+        self.assertFalse(StakeholderEngagementStats.objects.exists())
+
+    def test_reconcile_fixes_drift(self):
+        # Queryset updates send no signals
+        Engagement.objects.filter(stakeholder=self.busy, status='planned').update(status='completed')
+        self.assertEqual(reconcile_engagement_stats(self.user.pk), (3, 1))
+        self.assertEqual(StakeholderEngagementStats.objects.get(stakeholder=self.busy).completed_count, 8)
+        out = StringIO()
+        call_command('reconcile_engagement_stats', stdout=out)
+        self.assertIn('Checked 3 stakeholders', out.getvalue())
+        self.assertIn('fixed 0', out.getvalue())
+
+    def test_bulk_writers_maintain_stats(self):
+        # Purging a user refreshes other users' stakeholders they had engagements with
+        other = User.objects.create_user('visitor')
+        Engagement.objects.create(
+            stakeholder=self.quiet, title='Visit', status='completed', scheduled_date=self.now, created_by=other,
+        )
+        self.assertEqual(StakeholderEngagementStats.objects.get(stakeholder=self.quiet).completed_count, 2)
+        purge_user_data(other.pk)
+        self.assertEqual(StakeholderEngagementStats.objects.get(stakeholder=self.quiet).completed_count, 1)
+
+        call_command('load_demo_data', user='stats', stdout=StringIO())
+        self.assertTrue(StakeholderEngagementStats.objects.filter(stakeholder__created_by=self.user).exists())
+        result = import_rows(self.user, 'engagements', read_rows(io.BytesIO(
+            b'stakeholder_name,title,type,status,scheduled_date\nSarah Chen,Follow-up,email,completed,2020-01-01 10:00\n'
+        ), 'csv'))
+        self.assertEqual(result['created'], 1)
+        self.assertEqual(reconcile_engagement_stats(self.user.pk)[1], 0)
+
+    def test_stakeholder_list_sorts_by_stats(self):
+        for params in ({}, {'paginate': 'cursor'}):
+            response = self.client.get(reverse('stakeholder_list'), dict(params, sort='last_contact'))
+            self.assertEqual([s.name for s in response.context['page_obj']], ['Never', 'Quiet', 'Busy'])
+            response = self.client.get(reverse('stakeholder_list'), dict(params, sort='sentiment'))
+            self.assertEqual([s.name for s in response.context['page_obj']], ['Busy', 'Quiet', 'Never'])
+        self.assertContains(response, 'Last contact 15 days ago')
+        self.assertContains(response, 'Never contacted')
+        self.assertContains(response, 'Sentiment declining')
+
+    def test_stakeholder_detail_shows_stats(self):
+        response = self.client.get(reverse('stakeholder_detail', args=[self.busy.pk]))
+        self.assertEqual(response.context['stats'].total_count, 9)
+        self.assertContains(response, 'Declining')
+        response = self.client.get(reverse('stakeholder_detail', args=[self.never.pk]))
+        self.assertIsNone(response.context['stats'])
@@ -19,14 +19,29 @@ urlpatterns = [
     path('engagements/create/', views.engagement_create, name='engagement_create'),
     path('engagements/<int:pk>/', views.engagement_detail, name='engagement_detail'),
     path('engagements/<int:pk>/edit/', views.engagement_edit, name='engagement_edit'),
+
+    # Streaming exports (csv, jsonl, csv.gz, jsonl.gz)
+    path('export/stakeholders.<str:fmt>', views.export_stakeholders, name='export_stakeholders'),
+    path('export/engagements.<str:fmt>', views.export_engagements, name='export_engagements'),
+    path('import/<str:kind>/', views.import_data, name='import_data'),
     
     # AI Assistant URLs
     path('ai/generate-summary/<int:engagement_pk>/', views.generate_ai_summary, name='generate_ai_summary'),
     path('ai/draft-communication/', views.draft_communication, name='draft_communication'),
+    path('ai/draft-communication/stream/', views.draft_communication_stream, name='draft_communication_stream'),
     path('ai/meeting-summary/', views.meeting_summary, name='meeting_summary'),
+    path('ai/meeting-summary/stream/', views.meeting_summary_stream, name='meeting_summary_stream'),
     
     # API endpoints
     path('api/stakeholders/', views.api_stakeholders, name='api_stakeholders'),
+    path('api/dashboard/', views.api_dashboard_stats, name='api_dashboard_stats'),
+    path('api/graph/', views.api_graph_summary, name='api_graph_summary'),
+    path('api/graph/reach/<int:pk>/', views.api_graph_reach, name='api_graph_reach'),
+    path('api/graph/path/<int:source>/<int:target>/', views.api_graph_path, name='api_graph_path'),
+    path('api/graph/centrality/', views.api_graph_centrality, name='api_graph_centrality'),
+    path('api/graph/components/', views.api_graph_components, name='api_graph_components'),
+    path('api/jobs/<int:pk>/', views.api_job_status, name='api_job_status'),
+    path('api/ai/health/', views.api_ai_health, name='api_ai_health'),
     
     # Demo data management
     path('demo/load/', views.load_demo_data, name='load_demo_data'),
@@ -1,21 +1,79 @@
-from django.shortcuts import render, get_object_or_404, redirect
+from django.shortcuts import render, get_object_or_404, aget_object_or_404, redirect
+from django.urls import reverse
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
+from django.core.handlers.asgi import ASGIRequest
 from django.core.paginator import Paginator
-from django.db.models import Q, Count
-from django.views.decorators.http import require_POST
+from django.views.decorators.http import require_POST, condition
+from django.views.decorators.gzip import gzip_page
+from django.utils.cache import patch_cache_control
+from django.db.models import Count, Max
 from django.core.management import call_command
 import json
 from datetime import datetime, timedelta
 from django.utils import timezone
+from django.conf import settings
 from django.contrib.auth import logout
 import io
 import sys
 
 from .models import Stakeholder, Engagement, StakeholderRelationship, DemoSession
 from .forms import StakeholderForm, EngagementForm
-from ai_assistant.services import GeminiService
+from .services import get_cached_dashboard_snapshot
+from .search import search_stakeholders
+from .filters import (
+    ENGAGEMENT_CURSOR_KEYS, STAKEHOLDER_CURSOR_KEYS, engagement_segments, filter_engagements,
+    filter_stakeholders, sort_stakeholders, upcoming_first,
+)
+from .export import FORMATS as EXPORT_FORMATS, aiterate, export_queryset, export_stream, select_columns
+from .imports import FORMATS as IMPORT_FORMATS, IMPORTERS, import_rows, read_rows
+from .pagination import CursorPaginator
+from .cache import dashboard_cache_stats, get_dashboard_version
+from .purge import BACKGROUND_PURGE_THRESHOLD, purge_user_data
+from .graph import DIRECTIONS, get_graph, type_codes
+from ai_assistant.services import get_gemini_service
+from ai_assistant.client import health_check
+from ai_assistant.transport import transport_stats
+from ai_assistant.streaming import sse_response, sse_stream
+from ai_assistant.structured import meeting_summary_schema
+from ai_assistant.jobs import enqueue, aenqueue
+from ai_assistant.models import Job
+from .tasks import STAKEHOLDER_PROFILE_JOB, MEETING_SUMMARY_JOB, CLEAR_DATA_JOB, schedule_network_influence_refresh
+
+STAKEHOLDER_SORT_CHOICES = [
+    ('', 'Recently Updated'),
+    ('priority', 'Priority'),
+    ('influence', 'Network Influence'),
+    ('last_contact', 'Days Since Last Contact'),
+    ('sentiment', 'Sentiment Trend'),
+    ('name', 'Name'),
+]
+
+# Rows per page of stakeholder_list and engagement_list
+STAKEHOLDER_PAGE_SIZE = 12
+ENGAGEMENT_PAGE_SIZE = 15
+
+# Stakeholder columns api_stakeholders can return (?fields=), and the default selection
+API_STAKEHOLDER_FIELDS = (
+    'id', 'name', 'title', 'organization', 'department', 'email',
+    'influence', 'interest', 'category', 'priority_score',
+)
+API_STAKEHOLDER_DEFAULT_FIELDS = ('id', 'name', 'title', 'organization')
+
+# Matches returned for a typeahead query (?q=) when no ?limit= is given
+API_STAKEHOLDER_SEARCH_LIMIT = 20
+
+# Rows returned by the graph API when no ?limit= is given, and the most a request may ask for
+GRAPH_RESULT_LIMIT = 50
+GRAPH_MAX_LIMIT = 1000
+
+def use_cursor_pagination(request):
+    """Cursor pagination is opt-in per request (?paginate=cursor) or site-wide via settings"""
+    if 'after' in request.GET or 'before' in request.GET:
+        return True
+    mode = request.GET.get('paginate') or settings.LIST_PAGINATION_MODE
+    return mode == 'cursor'
 
 def welcome(request):
     """Welcome page for the application"""
@@ -24,78 +82,21 @@ def welcome(request):
 @login_required
 def dashboard(request):
     """Main dashboard with stakeholder analytics"""
-    user_stakeholders = Stakeholder.objects.filter(created_by=request.user)
-    user_engagements = Engagement.objects.filter(created_by=request.user)
-    
-    # Analytics data
-    total_stakeholders = user_stakeholders.count()
-    total_engagements = user_engagements.count()
-    
-    # Calculate high priority stakeholders (priority score >= 12)
-    high_priority_count = 0
-    for stakeholder in user_stakeholders.all():
-        influence_score = {
-            'low': 1, 'medium': 2, 'high': 3, 'very_high': 4
-        }.get(stakeholder.influence, 1)
-        
-        interest_score = {
-            'low': 1, 'medium': 2, 'high': 3, 'very_high': 4
-        }.get(stakeholder.interest, 1)
-        
-        priority_score = influence_score * interest_score
-        if priority_score >= 12:
-            high_priority_count += 1
-      # Recent activity
-    recent_stakeholders = user_stakeholders[:5]
-      # Get all upcoming engagements for count (not limited to 5)
-    upcoming_engagements_query = user_engagements.filter(
+    user_stakeholders = Stakeholder.objects.for_user(request.user)
+    
+    # Counters, histograms and grid data, cached per user until their data changes
+    snapshot = get_cached_dashboard_snapshot(request.user)
+    stats = snapshot['stats']
+    
+    # Recent activity
+    recent_stakeholders = user_stakeholders.for_list()[:5]
+    
+    # First 5 upcoming engagements for display in recent activity
+    upcoming_engagements = Engagement.objects.for_user(request.user).filter(
         scheduled_date__gte=timezone.now(),
         status='planned'
-    )
-    upcoming_engagements_count = upcoming_engagements_query.count()
+    ).for_list()[:5]
     
-    # Get overdue engagements (planned but past due)
-    overdue_engagements_count = user_engagements.filter(
-        scheduled_date__lt=timezone.now(),
-        status='planned'
-    ).count()
-    
-    # Get first 5 for display in recent activity
-    upcoming_engagements = upcoming_engagements_query[:5]
-    
-    # Stakeholder distribution by influence/interest
-    influence_data = user_stakeholders.values('influence').annotate(count=Count('influence'))
-    interest_data = user_stakeholders.values('interest').annotate(count=Count('interest'))
-    category_data = user_stakeholders.values('category').annotate(count=Count('category'))
-    
-    # Engagement metrics
-    engagement_types = user_engagements.values('type').annotate(count=Count('type'))
-      # Prepare stakeholder data for interactive grid
-    stakeholders_json = []
-    for stakeholder in user_stakeholders.all():
-        # Convert influence/interest to numeric scores for positioning
-        influence_score = {
-            'low': 1, 'medium': 2, 'high': 3, 'very_high': 4
-        }.get(stakeholder.influence, 1)
-        
-        interest_score = {
-            'low': 1, 'medium': 2, 'high': 3, 'very_high': 4
-        }.get(stakeholder.interest, 1)
-        
-        # Calculate priority score (max 16: 4*4)
-        priority_score = influence_score * interest_score
-        
-        stakeholders_json.append({
-            'id': stakeholder.id,
-            'name': stakeholder.name,
-            'title': stakeholder.title or 'N/A',
-            'organization': stakeholder.organization or 'N/A',
-            'influence': stakeholder.influence,
-            'interest': stakeholder.interest,
-            'influenceScore': influence_score,
-            'interestScore': interest_score,
-            'priorityScore': priority_score,
-        })    
     # Check demo mode status
     try:
         demo_session = request.user.demo_session
@@ -105,71 +106,73 @@ def dashboard(request):
         is_demo_mode = False
         demo_scenario = None
     
-    import json
     context = {
-        'total_stakeholders': total_stakeholders,
-        'overdue_engagements_count': overdue_engagements_count,
-        'high_priority_count': high_priority_count,
-        'upcoming_engagements_count': upcoming_engagements_count,
+        'total_stakeholders': stats['total_stakeholders'],
+        'overdue_engagements_count': stats['overdue_engagements_count'],
+        'high_priority_count': stats['high_priority_count'],
+        'upcoming_engagements_count': stats['upcoming_engagements_count'],
         'recent_stakeholders': recent_stakeholders,
         'upcoming_engagements': upcoming_engagements,
-        'influence_data': json.dumps(list(influence_data)),
-        'interest_data': json.dumps(list(interest_data)),
-        'category_data': json.dumps(list(category_data)),
-        'engagement_types': json.dumps(list(engagement_types)),
-        'stakeholders_json': json.dumps(stakeholders_json),
+        'influence_data': snapshot['influence_data'],
+        'interest_data': snapshot['interest_data'],
+        'category_data': snapshot['category_data'],
+        'engagement_types': snapshot['engagement_types'],
+        'stakeholders_json': snapshot['stakeholders_json'],
         'is_demo_mode': is_demo_mode,
         'demo_scenario': demo_scenario,
+        'clear_in_background': stats['total_stakeholders'] > BACKGROUND_PURGE_THRESHOLD,
     }
     
     return render(request, 'stakeholders/dashboard.html', context)
 
+@login_required
+def api_dashboard_stats(request):
+    """API endpoint returning the dashboard counters and histograms"""
+    try:
+        return JsonResponse({
+            'success': True,
+            'stats': get_cached_dashboard_snapshot(request.user)['stats'],
+            'cache': dashboard_cache_stats(),
+        })
+        
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=500)
+
 @login_required
 def stakeholder_list(request):
     """List all stakeholders with search and filtering"""
-    stakeholders = Stakeholder.objects.filter(created_by=request.user)
+    stakeholders = Stakeholder.objects.for_user(request.user).for_list().with_engagement_stats()
     
-    # Search functionality
+    # Search and filtering. Relevance isn't a stored column, so cursor mode
+    # keeps the regular ordering for searches.
     search_query = request.GET.get('search', '')
-    if search_query:
-        stakeholders = stakeholders.filter(
-            Q(name__icontains=search_query) |
-            Q(organization__icontains=search_query) |
-            Q(title__icontains=search_query) |
-            Q(department__icontains=search_query)
-        )
-    
-    # Filtering
     influence_filter = request.GET.get('influence', '')
-    if influence_filter:
-        stakeholders = stakeholders.filter(influence=influence_filter)
-    
     category_filter = request.GET.get('category', '')
-    if category_filter:
-        stakeholders = stakeholders.filter(category=category_filter)
-    
-    # Priority filtering (high priority = priority score >= 12)
     priority_filter = request.GET.get('priority', '')
-    if priority_filter == 'high':
-        high_priority_ids = []
-        for stakeholder in stakeholders:
-            influence_score = {
-                'low': 1, 'medium': 2, 'high': 3, 'very_high': 4
-            }.get(stakeholder.influence, 1)
-            
-            interest_score = {
-                'low': 1, 'medium': 2, 'high': 3, 'very_high': 4
-            }.get(stakeholder.interest, 1)
-            
-            priority_score = influence_score * interest_score
-            if priority_score >= 12:
-                high_priority_ids.append(stakeholder.id)
-        
-        stakeholders = stakeholders.filter(id__in=high_priority_ids)
-      # Pagination
-    paginator = Paginator(stakeholders, 12)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    cursor_mode = use_cursor_pagination(request)
+    stakeholders = filter_stakeholders(stakeholders, request.GET, ranked=not cursor_mode)
+    
+    # Ordering
+    sort_order = request.GET.get('sort', '')
+    influence_refreshing = False
+    if sort_order == 'influence':
+        # Sorts by the stored scores; networks changed since the last refresh are
+        # recomputed by a background job rather than during the request
+        influence_refreshing = schedule_network_influence_refresh(request.user)
+    stakeholders = sort_stakeholders(stakeholders, sort_order)
+    
+    # Pagination
+    if cursor_mode:
+        keys = STAKEHOLDER_CURSOR_KEYS.get(sort_order, STAKEHOLDER_CURSOR_KEYS[''])
+        page_obj = CursorPaginator([stakeholders], keys, STAKEHOLDER_PAGE_SIZE).get_page(
+            after=request.GET.get('after'),
+            before=request.GET.get('before'),
+            count=request.GET.get('count') == 'approx',
+        )
+    else:
+        paginator = Paginator(stakeholders, STAKEHOLDER_PAGE_SIZE)
+        page_number = request.GET.get('page')
+        page_obj = paginator.get_page(page_number)
     
     context = {
         'page_obj': page_obj,
@@ -177,6 +180,9 @@ def stakeholder_list(request):
         'influence_filter': influence_filter,
         'category_filter': category_filter,
         'priority_filter': priority_filter,
+        'sort_order': sort_order,
+        'sort_choices': STAKEHOLDER_SORT_CHOICES,
+        'influence_refreshing': influence_refreshing,
         'influence_choices': Stakeholder.INFLUENCE_CHOICES,
         'category_choices': Stakeholder.CATEGORY_CHOICES,
     }
@@ -186,30 +192,43 @@ def stakeholder_list(request):
 @login_required
 def stakeholder_detail(request, pk):
     """Detailed view of a stakeholder"""
-    stakeholder = get_object_or_404(Stakeholder, pk=pk, created_by=request.user)
+    stakeholder = get_object_or_404(
+        Stakeholder.objects.select_related('engagement_stats'), pk=pk, created_by=request.user
+    )
+    # Stored aggregates; stakeholders without engagements have none
+    stats = getattr(stakeholder, 'engagement_stats', None)
     
     # Smart ordering for engagements: show upcoming first, then recent past ones
-    from django.db.models import Case, When, Value, IntegerField
-    engagements = stakeholder.engagements.annotate(
-        is_future=Case(
-            When(scheduled_date__gte=timezone.now(), then=Value(0)),  # Future = 0 (first)
-            default=Value(1),  # Past = 1 (second)
-            output_field=IntegerField()
-        )
-    ).order_by('is_future', 'scheduled_date')[:10]  # Top 10 relevant engagements
+    engagements = upcoming_first(stakeholder.engagements.only(
+        'id', 'title', 'type', 'status', 'scheduled_date', 'stakeholder_id'
+    ))[:10]  # Top 10 relevant engagements
     
-    relationships = StakeholderRelationship.objects.filter(
-        Q(from_stakeholder=stakeholder) | Q(to_stakeholder=stakeholder)
-    )
+    relationships = StakeholderRelationship.objects.involving(stakeholder)
+    
+    # AI insights still being generated in the background (see redirect_to_profile_job)
+    ai_job = None
+    job_id = request.GET.get('job')
+    if job_id and job_id.isdigit():
+        ai_job = Job.objects.for_user(request.user).filter(pk=job_id).first()
+        if ai_job and ai_job.is_finished:
+            ai_job = None
     
     context = {
         'stakeholder': stakeholder,
         'engagements': engagements,
+        'stats': stats,
         'relationships': relationships,
+        'ai_job': ai_job,
     }
     
     return render(request, 'stakeholders/stakeholder_detail.html', context)
 
+def redirect_to_profile_job(request, stakeholder):
+    """Queue AI profile generation and send the user to the detail page, which follows the job"""
+    job = enqueue(STAKEHOLDER_PROFILE_JOB, {'stakeholder_id': stakeholder.pk}, user=request.user)
+    messages.info(request, 'AI insights are being generated and will appear here shortly.')
+    return redirect(f"{reverse('stakeholder_detail', args=[stakeholder.pk])}?job={job.pk}")
+
 @login_required
 def stakeholder_create(request):
     """Create new stakeholder"""
@@ -218,21 +237,12 @@ def stakeholder_create(request):
         if form.is_valid():
             stakeholder = form.save(commit=False)
             stakeholder.created_by = request.user
-            
-            # AI Profile Enhancement
-            if request.POST.get('generate_ai_insights'):
-                gemini_service = GeminiService()
-                basic_info = {
-                    'name': stakeholder.name,
-                    'title': stakeholder.title,
-                    'organization': stakeholder.organization,
-                    'department': stakeholder.department,
-                    'category': stakeholder.category,
-                }
-                stakeholder.ai_generated_insights = gemini_service.generate_stakeholder_profile(basic_info)
-            
             stakeholder.save()
             messages.success(request, f'Stakeholder "{stakeholder.name}" created successfully!')
+            
+            # AI Profile Enhancement runs in the background worker
+            if request.POST.get('generate_ai_insights'):
+                return redirect_to_profile_job(request, stakeholder)
             return redirect('stakeholder_detail', pk=stakeholder.pk)
     else:
         form = StakeholderForm()
@@ -253,21 +263,11 @@ def stakeholder_edit(request, pk):
         form = StakeholderForm(request.POST, instance=stakeholder)
         if form.is_valid():
             stakeholder = form.save()
+            messages.success(request, f'Stakeholder "{stakeholder.name}" updated successfully!')
             
             # Regenerate AI insights if requested
             if request.POST.get('regenerate_ai_insights'):
-                gemini_service = GeminiService()
-                basic_info = {
-                    'name': stakeholder.name,
-                    'title': stakeholder.title,
-                    'organization': stakeholder.organization,
-                    'department': stakeholder.department,
-                    'category': stakeholder.category,
-                }
-                stakeholder.ai_generated_insights = gemini_service.generate_stakeholder_profile(basic_info)
-                stakeholder.save()
-            
-            messages.success(request, f'Stakeholder "{stakeholder.name}" updated successfully!')
+                return redirect_to_profile_job(request, stakeholder)
             return redirect('stakeholder_detail', pk=stakeholder.pk)
     else:
         form = StakeholderForm(instance=stakeholder)
@@ -300,52 +300,33 @@ def stakeholder_delete(request, pk):
 @login_required
 def engagement_list(request):
     """List all engagements"""
-    engagements = Engagement.objects.filter(created_by=request.user)
-      # Filtering
+    engagements = Engagement.objects.for_user(request.user).for_list()
+    # Filtering
     status_filter = request.GET.get('status', '')
-    if status_filter:
-        engagements = engagements.filter(status=status_filter)
-    
     stakeholder_filter = request.GET.get('stakeholder', '')
-    if stakeholder_filter:
-        engagements = engagements.filter(stakeholder_id=stakeholder_filter)
-    
-    # Filter by engagement type
     type_filter = request.GET.get('type', '')
-    if type_filter:
-        engagements = engagements.filter(type=type_filter)
-      # Filter for upcoming meetings
     upcoming_filter = request.GET.get('upcoming', '')
-    if upcoming_filter == 'true':
-        engagements = engagements.filter(
-            scheduled_date__gte=timezone.now(),
-            status='planned'
-        )
-    
-    # Filter for overdue engagements
     overdue_filter = request.GET.get('overdue', '')
-    if overdue_filter == 'true':
-        engagements = engagements.filter(
-            scheduled_date__lt=timezone.now(),
-            status='planned'
-        )
-    
-    # Smart ordering: Show upcoming first (ascending), then past ones (descending)
-    from django.db.models import Case, When, Value, IntegerField
-    engagements = engagements.annotate(
-        is_future=Case(
-            When(scheduled_date__gte=timezone.now(), then=Value(0)),  # Future = 0 (first)
-            default=Value(1),  # Past = 1 (second)
-            output_field=IntegerField()
+    engagements = filter_engagements(engagements, request.GET)
+    
+    # Pagination
+    if use_cursor_pagination(request):
+        # Smart ordering without a computed sort column: walk upcoming engagements,
+        # then past ones, each in date order so the index serves both
+        page_obj = CursorPaginator(engagement_segments(engagements), ENGAGEMENT_CURSOR_KEYS, ENGAGEMENT_PAGE_SIZE).get_page(
+            after=request.GET.get('after'),
+            before=request.GET.get('before'),
+            count=request.GET.get('count') == 'approx',
         )
-    ).order_by('is_future', 'scheduled_date')
-      # Pagination
-    paginator = Paginator(engagements, 15)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    else:
+        # Smart ordering: Show upcoming first, then past ones
+        engagements = upcoming_first(engagements)
+        paginator = Paginator(engagements, ENGAGEMENT_PAGE_SIZE)
+        page_number = request.GET.get('page')
+        page_obj = paginator.get_page(page_number)
     
     # Get stakeholders for filter dropdown
-    user_stakeholders = Stakeholder.objects.filter(created_by=request.user)
+    user_stakeholders = Stakeholder.objects.for_user(request.user).for_choices()
     
     context = {
         'page_obj': page_obj,
@@ -395,7 +376,7 @@ def engagement_create(request):
 @login_required
 def engagement_detail(request, pk):
     """Detailed view of an engagement"""
-    engagement = get_object_or_404(Engagement, pk=pk, created_by=request.user)
+    engagement = get_object_or_404(Engagement.objects.with_stakeholder(), pk=pk, created_by=request.user)
     
     context = {
         'engagement': engagement,
@@ -425,11 +406,23 @@ def engagement_edit(request, pk):
     
     return render(request, 'stakeholders/engagement_form.html', context)
 
+def stakeholder_ai_info(stakeholder):
+    """Stakeholder details passed to the AI prompts"""
+    return {
+        'name': stakeholder.name,
+        'title': stakeholder.title,
+        'organization': stakeholder.organization,
+        'influence': stakeholder.influence,
+        'interest': stakeholder.interest,
+        'category': stakeholder.category,
+    }
+
 @login_required
 @require_POST
-def generate_ai_summary(request, engagement_pk):
-    """Generate AI summary for an engagement"""
-    engagement = get_object_or_404(Engagement, pk=engagement_pk, created_by=request.user)
+async def generate_ai_summary(request, engagement_pk):
+    """Queue an AI summary for an engagement; poll the returned status_url for the result"""
+    user = await request.auser()
+    engagement = await aget_object_or_404(Engagement, pk=engagement_pk, created_by=user)
     
     try:
         data = json.loads(request.body)
@@ -438,34 +431,24 @@ def generate_ai_summary(request, engagement_pk):
         if not meeting_notes:
             return JsonResponse({'error': 'No meeting notes provided'}, status=400)
         
-        gemini_service = GeminiService()
-        stakeholder_info = {
-            'name': engagement.stakeholder.name,
-            'title': engagement.stakeholder.title,
-            'organization': engagement.stakeholder.organization,
-        }
-        
-        summary_data = gemini_service.summarize_meeting(meeting_notes, stakeholder_info)
-        
-        # Update engagement with AI analysis
-        engagement.ai_summary = summary_data.get('summary', '')
-        engagement.ai_action_items = summary_data.get('action_items', '')
-        engagement.ai_sentiment_analysis = summary_data.get('sentiment', '')
-        engagement.save()
+        job = await aenqueue(MEETING_SUMMARY_JOB, {
+            'engagement_id': engagement.pk,
+            'meeting_notes': meeting_notes,
+        }, user=user)
         
         return JsonResponse({
             'success': True,
-            'summary': summary_data.get('summary', ''),
-            'action_items': summary_data.get('action_items', ''),
-            'sentiment': summary_data.get('sentiment', ''),
-        })
+            'job_id': job.pk,
+            'status': job.status,
+            'status_url': reverse('api_job_status', args=[job.pk]),
+        }, status=202)
         
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=500)
 
 @login_required
 @require_POST
-def draft_communication(request):
+async def draft_communication(request):
     """Draft communication using AI"""
     try:
         data = json.loads(request.body)
@@ -473,19 +456,13 @@ def draft_communication(request):
         communication_type = data.get('communication_type', 'email')
         purpose = data.get('purpose', '')
         
-        stakeholder = get_object_or_404(Stakeholder, pk=stakeholder_id, created_by=request.user)
+        user = await request.auser()
+        stakeholder = await aget_object_or_404(Stakeholder, pk=stakeholder_id, created_by=user)
         
-        gemini_service = GeminiService()
-        stakeholder_info = {
-            'name': stakeholder.name,
-            'title': stakeholder.title,
-            'organization': stakeholder.organization,
-            'influence': stakeholder.influence,
-            'interest': stakeholder.interest,
-            'category': stakeholder.category,
-        }
+        gemini_service = get_gemini_service()
+        stakeholder_info = stakeholder_ai_info(stakeholder)
         
-        draft = gemini_service.draft_communication(stakeholder_info, communication_type, purpose)
+        draft = await gemini_service.adraft_communication(stakeholder_info, communication_type, purpose)
         
         return JsonResponse({
             'success': True,
@@ -496,43 +473,363 @@ def draft_communication(request):
         return JsonResponse({'error': str(e)}, status=500)
 
 @login_required
-def api_stakeholders(request):
-    """API endpoint to get stakeholders list for dropdowns"""
+@require_POST
+async def draft_communication_stream(request):
+    """Draft communication using AI, streamed to the browser as server-sent events"""
     try:
-        stakeholders = Stakeholder.objects.filter(created_by=request.user).values(
-            'id', 'name', 'title', 'organization'
-        )
+        data = json.loads(request.body)
+        stakeholder_id = data.get('stakeholder_id')
+        communication_type = data.get('communication_type', 'email')
+        purpose = data.get('purpose', '')
         
-        return JsonResponse({
+        user = await request.auser()
+        stakeholder = await aget_object_or_404(Stakeholder, pk=stakeholder_id, created_by=user)
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=500)
+    
+    gemini_service = get_gemini_service()
+    if not gemini_service.is_available():
+        return JsonResponse({'error': 'AI service not available'}, status=503)
+    
+    prompt = gemini_service.draft_communication_prompt(stakeholder_ai_info(stakeholder), communication_type, purpose)
+    return sse_response(sse_stream(
+        gemini_service.astream_content(prompt),
+        lambda text: {'draft': text},
+    ))
+
+def stakeholder_list_state(request):
+    """
+    Newest updated_at and row count of the user's stakeholders, looked up once
+    per request for the api_stakeholders ETag. The dashboard version is
+    included because queryset updates and raw SQL don't touch updated_at.
+    """
+    if not hasattr(request, '_stakeholder_list_state'):
+        state = Stakeholder.objects.for_user(request.user).aggregate(
+            last_modified=Max('updated_at'), count=Count('id')
+        )
+        state['version'] = get_dashboard_version(request.user.pk)
+        request._stakeholder_list_state = state
+    return request._stakeholder_list_state
+
+def stakeholder_list_etag(request):
+    state = stakeholder_list_state(request)
+    last_modified = state['last_modified'].timestamp() if state['last_modified'] else 0
+    return f"{request.user.pk}-{state['version']}-{state['count']}-{last_modified:.6f}"
+
+# No Last-Modified: deletes and queryset updates change the list without moving
+# max(updated_at), so If-Modified-Since would answer 304 for a stale list
+@login_required
+@condition(etag_func=stakeholder_list_etag)
+@gzip_page
+def api_stakeholders(request):
+    """
+    API endpoint to get stakeholders for dropdowns and typeahead.
+
+    ``q`` filters with the stakeholder search (best matches first, at most
+    ``limit``, default API_STAKEHOLDER_SEARCH_LIMIT); without it every
+    stakeholder is returned by name unless ``limit`` is given. ``fields`` is a
+    comma-separated subset of API_STAKEHOLDER_FIELDS. Responses carry an ETag,
+    so a repeat request answers 304 until the user's stakeholders change, and
+    are gzipped for clients that accept it.
+    """
+    fields = [field for field in request.GET.get('fields', '').split(',') if field]
+    fields = fields or list(API_STAKEHOLDER_DEFAULT_FIELDS)
+    unknown = [field for field in fields if field not in API_STAKEHOLDER_FIELDS]
+    if unknown:
+        return JsonResponse({'error': f'Unknown fields: {", ".join(unknown)}'}, status=400)
+
+    search_query = request.GET.get('q', '').strip()
+    limit = request.GET.get('limit')
+    try:
+        limit = int(limit) if limit else (API_STAKEHOLDER_SEARCH_LIMIT if search_query else None)
+    except ValueError:
+        limit = 0
+    if limit is not None and limit < 1:
+        return JsonResponse({'error': 'limit must be a positive integer'}, status=400)
+
+    try:
+        stakeholders = Stakeholder.objects.for_user(request.user)
+        if search_query:
+            stakeholders = search_stakeholders(stakeholders, search_query)
+        else:
+            stakeholders = stakeholders.order_by('name', 'id')
+        stakeholders = stakeholders.values(*fields)
+
+        if limit is not None:
+            # One extra row tells whether the list was cut short
+            rows = list(stakeholders[:limit + 1])
+            truncated = len(rows) > limit
+            rows = rows[:limit]
+        else:
+            rows = list(stakeholders)
+            truncated = False
+
+        response = JsonResponse({
             'success': True,
-            'stakeholders': list(stakeholders)
+            'stakeholders': rows,
+            'truncated': truncated,
         })
+        # Let browsers keep the list but revalidate it (If-None-Match) on every use
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
         
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=500)
 
+def int_param(request, name, default, minimum=0, maximum=None):
+    """A non-negative integer query parameter, clamped to ``maximum``; ValueError when malformed"""
+    value = request.GET.get(name)
+    if not value:
+        return default
+    try:
+        value = int(value)
+    except ValueError:
+        raise ValueError(f'{name} must be an integer')
+    if value < minimum:
+        raise ValueError(f'{name} must be at least {minimum}')
+    return min(value, maximum) if maximum is not None else value
+
+def graph_params(request, direction='out'):
+    """The relationship types, direction and limit shared by the graph API endpoints"""
+    types = [name for name in request.GET.get('types', '').split(',') if name]
+    type_codes(types)
+    direction = request.GET.get('direction', direction)
+    if direction not in DIRECTIONS:
+        raise ValueError(f'direction must be one of {", ".join(DIRECTIONS)}')
+    limit = int_param(request, 'limit', GRAPH_RESULT_LIMIT, minimum=1, maximum=GRAPH_MAX_LIMIT)
+    return types, direction, limit
+
+def graph_stakeholder_rows(ids):
+    """id, name, title and organization of the given stakeholders, in the given order"""
+    rows = Stakeholder.objects.filter(pk__in=ids).values('id', 'name', 'title', 'organization')
+    by_id = {row['id']: row for row in rows}
+    return [by_id[pk] for pk in ids if pk in by_id]
+
+@login_required
+def api_graph_summary(request):
+    """Size of the user's relationship network"""
+    graph = get_graph(request.user.pk)
+    components = graph.components()
+    return JsonResponse({
+        'success': True,
+        'stakeholders': len(graph),
+        'relationships': graph.edge_count,
+        'relationship_types': graph.type_counts(),
+        'components': sum(1 for component in components if len(component) > 1),
+        'unconnected': sum(1 for component in components if len(component) == 1),
+    })
+
+@login_required
+def api_graph_reach(request, pk):
+    """
+    Stakeholders within ``depth`` relationships of a stakeholder (default 2).
+    ``direction=out`` follows relationships from it, ``in`` finds who can
+    reach it, ``both`` ignores direction; ``types`` restricts the relationship
+    types followed.
+    """
+    graph = get_graph(request.user.pk)
+    try:
+        types, direction, limit = graph_params(request)
+        depth = int_param(request, 'depth', 2, minimum=1)
+        found = graph.reach(pk, max_depth=depth, direction=direction, types=types)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    except KeyError:
+        return JsonResponse({'error': 'Stakeholder not found'}, status=404)
+
+    distances = dict(found[:limit])
+    results = graph_stakeholder_rows(list(distances))
+    for row in results:
+        row['distance'] = distances[row['id']]
+    return JsonResponse({
+        'success': True,
+        'stakeholder': pk,
+        'direction': direction,
+        'depth': depth,
+        'total': len(found),
+        'results': results,
+    })
+
+@login_required
+def api_graph_path(request, source, target):
+    """A shortest chain of relationships between two stakeholders (any direction unless ``direction`` is given)"""
+    graph = get_graph(request.user.pk)
+    try:
+        types, direction, _limit = graph_params(request, direction='both')
+        path = graph.shortest_path(source, target, direction=direction, types=types)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    except KeyError:
+        return JsonResponse({'error': 'Stakeholder not found'}, status=404)
+
+    return JsonResponse({
+        'success': True,
+        'hops': len(path) - 1 if path else None,
+        'path': graph_stakeholder_rows(path) if path else None,
+    })
+
+@login_required
+def api_graph_centrality(request):
+    """Most central stakeholders by ``measure``: pagerank (default, weighted by strength) or degree"""
+    graph = get_graph(request.user.pk)
+    measure = request.GET.get('measure', 'pagerank')
+    try:
+        types, direction, limit = graph_params(request, direction='both')
+        if measure == 'pagerank':
+            scores = graph.pagerank(types=types)
+        elif measure == 'degree':
+            scores = graph.degree_centrality(direction=direction, types=types)
+        else:
+            raise ValueError('measure must be pagerank or degree')
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    top = dict(graph.top(scores, limit))
+    results = graph_stakeholder_rows(list(top))
+    for row in results:
+        row['score'] = round(top[row['id']], 6)
+    return JsonResponse({
+        'success': True,
+        'measure': measure,
+        'results': results,
+    })
+
+@login_required
+def api_graph_components(request):
+    """
+    Clusters of connected stakeholders, largest first; e.g. ``types=conflicts``
+    for conflict clusters. Groups smaller than ``min_size`` (default 2) are
+    left out and each group lists at most ``members`` stakeholders (default 20).
+    """
+    graph = get_graph(request.user.pk)
+    try:
+        types, _direction, limit = graph_params(request)
+        min_size = int_param(request, 'min_size', 2, minimum=1)
+        members = int_param(request, 'members', 20, minimum=1, maximum=GRAPH_MAX_LIMIT)
+        components = [component for component in graph.components(types=types) if len(component) >= min_size]
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    return JsonResponse({
+        'success': True,
+        'total': len(components),
+        'components': [
+            {'size': len(component), 'stakeholders': graph_stakeholder_rows(component[:members])}
+            for component in components[:limit]
+        ],
+    })
+
+EXPORT_CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+}
+
+def export_response(request, kind, fmt):
+    """
+    Stream the user's ``kind`` rows as ``fmt`` (csv or jsonl, with .gz or
+    ``gzip=1`` to compress), filtered like the list view and limited to the
+    comma-separated ``columns``.
+    """
+    compress = fmt.endswith('.gz') or request.GET.get('gzip') in ('1', 'true')
+    fmt = fmt.removesuffix('.gz')
+    if fmt not in EXPORT_FORMATS:
+        return JsonResponse({'error': f'Unknown export format: {fmt}'}, status=404)
+    try:
+        columns = select_columns(kind, [name for name in request.GET.get('columns', '').split(',') if name])
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    queryset = export_queryset(kind, request.user, request.GET)
+    stream = export_stream(queryset, kind, columns, fmt, compress=compress)
+    if isinstance(request, ASGIRequest):
+        stream = aiterate(stream)
+    filename = f'{kind}.{fmt}.gz' if compress else f'{kind}.{fmt}'
+    response = StreamingHttpResponse(
+        stream,
+        content_type='application/gzip' if compress else EXPORT_CONTENT_TYPES[fmt],
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response['Cache-Control'] = 'no-store'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+@login_required
+def export_stakeholders(request, fmt):
+    return export_response(request, 'stakeholders', fmt)
+
+@login_required
+def export_engagements(request, fmt):
+    return export_response(request, 'engagements', fmt)
+
+# Rejected rows listed in an import response
+IMPORT_REPORTED_ERRORS = 100
+
+@login_required
+@require_POST
+def import_data(request, kind):
+    """
+    Add or update stakeholders or engagements from an uploaded CSV or JSON
+    Lines ``file`` (optionally gzipped; the format comes from the file name
+    or ``format``). Answers with the counts and the first rejected rows.
+    """
+    if kind not in IMPORTERS:
+        return JsonResponse({'error': f'Cannot import {kind}'}, status=404)
+    upload = request.FILES.get('file')
+    if upload is None:
+        return JsonResponse({'error': 'Upload a CSV or JSON Lines file as "file"'}, status=400)
+    fmt = request.POST.get('format') or next(
+        (name for name in IMPORT_FORMATS if upload.name.removesuffix('.gz').endswith(f'.{name}')), None
+    )
+    if fmt not in IMPORT_FORMATS:
+        return JsonResponse({'error': 'Cannot tell the file format; pass format=csv or format=jsonl'}, status=400)
+
+    errors = []
+    def on_error(number, row_errors):
+        if len(errors) < IMPORT_REPORTED_ERRORS:
+            errors.append({'row': number, 'errors': row_errors})
+
+    result = import_rows(request.user, kind, read_rows(upload.file, fmt), on_error=on_error)
+    return JsonResponse({
+        'success': True,
+        'created': result['created'],
+        'updated': result['updated'],
+        'failed': result['failed'],
+        'errors': errors,
+        'errors_truncated': result['failed'] > len(errors),
+    })
+
+@login_required
+def api_job_status(request, pk):
+    """Progress and result of a background job started by this user"""
+    job = get_object_or_404(Job.objects.for_user(request.user), pk=pk)
+    return JsonResponse({
+        'success': True,
+        'job': job.as_dict(),
+    })
+
+@login_required
+def api_ai_health(request):
+    """Whether the shared Gemini client can reach the model, with call metrics and breaker state"""
+    health = health_check()
+    health['transport'] = transport_stats()
+    return JsonResponse(health, status=200 if health['status'] == 'ok' else 503)
+
 @login_required
 @require_POST
-def meeting_summary(request):
+async def meeting_summary(request):
     """Generate AI meeting summary"""
     try:
         data = json.loads(request.body)
         stakeholder_id = data.get('stakeholder_id')
         meeting_notes = data.get('meeting_notes', '')
         
-        stakeholder = get_object_or_404(Stakeholder, pk=stakeholder_id, created_by=request.user)
+        user = await request.auser()
+        stakeholder = await aget_object_or_404(Stakeholder, pk=stakeholder_id, created_by=user)
         
-        gemini_service = GeminiService()
-        stakeholder_info = {
-            'name': stakeholder.name,
-            'title': stakeholder.title,
-            'organization': stakeholder.organization,
-            'influence': stakeholder.influence,
-            'interest': stakeholder.interest,
-            'category': stakeholder.category,
-        }
+        gemini_service = get_gemini_service()
+        stakeholder_info = stakeholder_ai_info(stakeholder)
         
-        summary = gemini_service.summarize_meeting(meeting_notes, stakeholder_info)
+        summary = await gemini_service.asummarize_meeting(meeting_notes, stakeholder_info)
         
         return JsonResponse({
             'success': True,
@@ -542,6 +839,30 @@ def meeting_summary(request):
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=500)
 
+@login_required
+@require_POST
+async def meeting_summary_stream(request):
+    """Generate AI meeting summary, streamed as server-sent events and parsed once complete"""
+    try:
+        data = json.loads(request.body)
+        stakeholder_id = data.get('stakeholder_id')
+        meeting_notes = data.get('meeting_notes', '')
+        
+        user = await request.auser()
+        stakeholder = await aget_object_or_404(Stakeholder, pk=stakeholder_id, created_by=user)
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=500)
+    
+    gemini_service = get_gemini_service()
+    if not gemini_service.is_available():
+        return JsonResponse({'error': 'AI service not available'}, status=503)
+    
+    prompt = gemini_service.meeting_summary_prompt(meeting_notes, stakeholder_ai_info(stakeholder))
+    return sse_response(sse_stream(
+        gemini_service.astream_content(prompt, response_schema=meeting_summary_schema()),
+        lambda text: {'summary': gemini_service.parse_meeting_summary(text)},
+    ))
+
 @login_required
 @require_POST
 def load_demo_data(request):
@@ -579,31 +900,34 @@ def load_demo_data(request):
 @login_required
 @require_POST
 def clear_demo_data(request):
-    """Clear all demo data for the current user"""
+    """
+    Clear all demo data for the current user. With ``background=1`` the purge
+    runs as a job; poll the returned status_url for the counts.
+    """
     try:
-        # Count data before deletion
-        stakeholder_count = Stakeholder.objects.filter(created_by=request.user).count()
-        engagement_count = Engagement.objects.filter(created_by=request.user).count()
-        relationship_count = StakeholderRelationship.objects.filter(created_by=request.user).count()
-        
-        # Clear data using management command
-        output = io.StringIO()
-        call_command('clear_demo_data', user=request.user.username, confirm=True, stdout=output)
-        
+        if request.POST.get('background'):
+            job = enqueue(CLEAR_DATA_JOB, user=request.user)
+            return JsonResponse({
+                'success': True,
+                'message': 'Clearing demo data in the background',
+                'job_id': job.pk,
+                'status': job.status,
+                'status_url': reverse('api_job_status', args=[job.pk]),
+            }, status=202)
+
+        cleared = purge_user_data(request.user.pk)
+        DemoSession.objects.filter(user=request.user).update(is_demo_mode=False)
+
         messages.success(
             request, 
-            f'All data cleared successfully! Removed {stakeholder_count} stakeholders, '
-            f'{engagement_count} engagements, and {relationship_count} relationships.'
+            f'All data cleared successfully! Removed {cleared["stakeholders"]} stakeholders, '
+            f'{cleared["engagements"]} engagements, and {cleared["relationships"]} relationships.'
         )
         
         return JsonResponse({
             'success': True,
             'message': 'Demo data cleared successfully!',
-            'cleared': {
-                'stakeholders': stakeholder_count,
-                'engagements': engagement_count,
-                'relationships': relationship_count
-            }
+            'cleared': cleared
         })
         
     except Exception as e: